@@ -0,0 +1,73 @@
+# agent/answer_cache.py
+from __future__ import annotations
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+# Process-wide cache of plan_and_answer results. Keys are the dataset version
+# (data["version"], a content id set by the loader) plus the routed query with
+# the fields each intent ignores dropped, so "cash runway now?" and "what's our
+# cash runway" share one entry. A reload with different content gets a new
+# version, so stale answers are never served; they age out via LRU/TTL.
+
+# route fields each intent's answer depends on (beyond the dataset itself)
+INTENT_FIELDS = {
+    "revenue_vs_budget": ("month", "by", "range"),
+    "gross_margin_trend": ("last_n", "month", "by", "range"),
+    "opex_breakdown": ("month", "by", "range"),
+    "ebitda": ("month", "by", "range"),
+    "cash_runway": (),
+    "runway_scenarios": (),  # seeded, so repeatable per dataset version
+    None: (),
+}
+
+def answer_key(version: str, route: Dict[str, Any]) -> Optional[Tuple[Hashable, ...]]:
+    intent = route.get("intent")
+    fields = INTENT_FIELDS.get(intent)
+    if fields is None:
+        return None  # unknown intent shape: don't cache
+    return (version, intent) + tuple(route.get(f) for f in fields)
+
+class AnswerCache:
+    def __init__(self, maxsize: int = 512, ttl: Optional[float] = 3600.0) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Dict[str, Any]]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (self.ttl is None or now - entry[0] < self.ttl):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: Hashable, answer: Dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic(), answer)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, version: Optional[str] = None) -> None:
+        """Drop every entry, or only those of one dataset version."""
+        with self._lock:
+            if version is None:
+                self._entries.clear()
+            else:
+                for key in [k for k in self._entries if k[0] == version]:
+                    del self._entries[key]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
+
+answer_cache = AnswerCache()
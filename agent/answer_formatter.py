@@ -6,6 +6,22 @@ from agent.tools.finance_utils import fmt_money, fmt_pct
 def fmt_month(m: pd.Period) -> str:
     return m.strftime("%b %Y")  # e.g., "Jun 2025"
 
+_MONTH_ABBRS = frozenset(("Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"))
+
+def fmt_range(label: str, start: pd.Period, end: pd.Period) -> str:
+    """'Q2 2025 (Apr–Jun 2025)', 'YTD (Jan–May 2025)'; spans asked as months show just the months."""
+    if start == end:
+        months = fmt_month(start)
+    elif start.year == end.year:
+        months = f"{start.strftime('%b')}–{fmt_month(end)}"
+    else:
+        months = f"{fmt_month(start)}–{fmt_month(end)}"
+    return months if label[:3] in _MONTH_ABBRS else f"{label} ({months})"
+
+def _period(m) -> str:
+    # drill-downs cover one month or a labelled range
+    return m if isinstance(m, str) else fmt_month(m)
+
 def revenue_vs_budget_text(month, actual, budget, var, var_pct):
     m = fmt_month(month)
     vp = fmt_pct(var_pct)
@@ -32,3 +48,88 @@ def cash_runway_text(asof, cash_current, avg_burn, runway):
                 f"Average burn is zero → runway is not applicable.")
     return (f"As of {m}, cash is {fmt_money(cash_current)}. "
             f"Average burn is {fmt_money(avg_burn)}/mo → runway ≈ {runway:.1f} months.")
+
+def ebitda_text(month, value):
+    return f"{fmt_month(month)} EBITDA was {fmt_money(value)}."
+
+# ---------- month ranges ----------
+
+def _per_month(avg, n) -> str:
+    return "" if avg is None else f", {fmt_money(avg)}/mo over {n} month{'s' if n != 1 else ''} with data"
+
+def revenue_range_text(label, res):
+    return (f"{label} revenue was {fmt_money(res['revenue_actual_usd'])} vs budget "
+            f"{fmt_money(res['revenue_budget_usd'])} ({fmt_money(res['variance_usd'])}; "
+            f"{fmt_pct(res['variance_pct'])}){_per_month(res['revenue_avg_usd'], res['months'])}.")
+
+def gm_range_text(label, res):
+    if res["gm_pct"] is None:
+        return f"No revenue in {label} to compute Gross Margin."
+    return f"Gross Margin for {label} was {fmt_pct(res['gm_pct'])} on revenue of {fmt_money(res['revenue_usd'])}."
+
+def opex_range_text(label, series):
+    if series.empty:
+        return f"No Opex for {label}."
+    return (f"Opex for {label} totaled {fmt_money(series.sum())}; "
+            f"largest is {series.index[0]} at {fmt_money(series.iloc[0])}.")
+
+def ebitda_range_text(label, res):
+    return f"{label} EBITDA was {fmt_money(res['ebitda_usd'])}{_per_month(res['ebitda_avg_usd'], res['months'])}."
+
+def runway_scenarios_text(res):
+    m = fmt_month(res["asof"])
+    base, rw = res["base"], res["runway_months"]
+    head = (f"As of {m}, cash is {fmt_money(res['cash_current_usd'])}. Across {res['paths']:,} simulated paths "
+            f"(revenue ±{base['revenue_sigma']:.1%}/mo, opex ±{base['opex_sigma']:.1%}/mo), ")
+    if res["prob_cash_out"] == 0:
+        return head + f"no path runs out of cash within {res['horizon']} months."
+    def fmt(v):
+        return f"{v:.1f}" if v is not None else f">{res['horizon']}"
+    out = res["cash_out_month"][50]
+    return head + (f"{fmt_pct(res['prob_cash_out'])} run out of cash within {res['horizon']} months; "
+                   f"runway P10 {fmt(rw[10])}, median {fmt(rw[50])}, P90 {fmt(rw[90])} months"
+                   + (f" (median cash-out {fmt_month(out)})." if out is not None else "."))
+
+# ---------- drill-downs (rows keyed by entity, or tuples of several columns) ----------
+
+def _key(k) -> str:
+    return " / ".join(map(str, k)) if isinstance(k, tuple) else str(k)
+
+def revenue_by_text(month, df, noun="entities"):
+    m = _period(month)
+    if df.empty:
+        return f"No revenue or budget by {noun} for {m}."
+    var = df["variance_usd"]
+    parts = [f"{m} revenue across {len(df)} {noun} was {fmt_money(df['revenue_actual_usd'].sum())} "
+             f"vs budget {fmt_money(df['revenue_budget_usd'].sum())}."]
+    if var.max() > 0:
+        parts.append(f"Largest beat: {_key(var.idxmax())} ({fmt_money(var.max())}).")
+    if var.min() < 0:
+        parts.append(f"Largest miss: {_key(var.idxmin())} ({fmt_money(var.min())}).")
+    return " ".join(parts)
+
+def gm_by_text(label, df, noun="entities"):
+    gm = df["gm_pct"].dropna()
+    if gm.empty:
+        return f"No revenue by {noun} to compute Gross Margin for {label}."
+    return (f"Gross Margin % for {label} across {len(gm)} {noun}: "
+            f"highest {_key(gm.idxmax())} ({fmt_pct(gm.max())}), lowest {_key(gm.idxmin())} ({fmt_pct(gm.min())}).")
+
+def opex_by_text(month, frame, noun="entities"):
+    m = _period(month)
+    totals = frame.sum(axis=1)
+    if totals.empty:
+        return f"No Opex by {noun} for {m}."
+    total = totals.sum()
+    top = totals.idxmax()
+    share = totals[top] / total if total else None
+    return (f"Opex for {m} across {len(totals)} {noun} (total {fmt_money(total)}); "
+            f"largest is {_key(top)} at {fmt_money(totals[top])} ({fmt_pct(share)} of total).")
+
+def ebitda_by_text(month, series, noun="entities"):
+    m = _period(month)
+    if series.empty:
+        return f"No EBITDA by {noun} for {m}."
+    return (f"{m} EBITDA across {len(series)} {noun} was {fmt_money(series.sum())}; "
+            f"best {_key(series.idxmax())} ({fmt_money(series.max())}), "
+            f"worst {_key(series.idxmin())} ({fmt_money(series.min())}).")
@@ -2,55 +2,289 @@
 from __future__ import annotations
 import re
 from dataclasses import dataclass
-from typing import Optional, Literal, Dict, Any, List
-import pandas as pd
-from agent.tools.finance_utils import parse_month_to_period
+from functools import lru_cache
+from typing import TYPE_CHECKING, Optional, Literal, Dict, Any, Iterable, List, Tuple
 
-Intent = Literal["revenue_vs_budget", "gross_margin_trend", "opex_breakdown", "cash_runway"]
+if TYPE_CHECKING:
+    import pandas as pd
 
-MONTH_RX = re.compile(r"\b(?:jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|jun(?:e)?|"
-                      r"jul(?:y)?|aug(?:ust)?|sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|"
-                      r"dec(?:ember)?)\s+\d{4}\b", re.I)
+# Routing itself is pure regex/set work; pandas is imported on the first query
+# that names a month, so keyword-only routing (and importing this module) stays
+# free of pandas/dateutil.
+
+Intent = Literal["revenue_vs_budget", "gross_margin_trend", "opex_breakdown", "ebitda", "cash_runway",
+                 "runway_scenarios"]
+
+_MONTH_NAME = (r"\b(?:jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|jun(?:e)?|"
+               r"jul(?:y)?|aug(?:ust)?|sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|"
+               r"dec(?:ember)?)\s+\d{4}\b")
+MONTH_RX = re.compile(_MONTH_NAME, re.I)
 YM_RX = re.compile(r"\b(20\d{2})[-/ ](0?[1-9]|1[0-2])\b")
 
-def _find_single_month(text: str) -> Optional[pd.Period]:
-    s = text.strip()
-    m1 = MONTH_RX.search(s)
-    if m1:
-        return parse_month_to_period(m1.group(0))
-    m2 = YM_RX.search(s)
-    if m2:
-        y, mm = int(m2.group(1)), int(m2.group(2))
-        return pd.Period(f"{y:04d}-{mm:02d}", freq="M")
+# The router scans each query at most twice, once per representation, instead
+# of once per keyword and pattern:
+#  - keywords are plain substring tests on text.lower(), except "gm", which
+#    must stand alone ("segment" is not a gross-margin question); the
+#    zero-width lookahead reports every occurrence, including overlapping ones
+#    ("budgetrend" has both "budget" and "trend").
+#  - date expressions are matched case-insensitively on the original text
+#    (exactly what MONTH_RX / YM_RX / the "last N months" pattern matched).
+#    At any position at most one alternative can match and no match can hide
+#    the start of a later one, so the first match of each kind is the one the
+#    separate searches would have found. This pass only runs for intents that
+#    read a month or window.
+_KEYWORDS = ("cash", "runway", "revenue", "budget", "vs", "gross margin", "gm",
+             "trend", "last", "opex", "breakdown", "by category", "ebitda",
+             "by entity", "per entity", "each entity", "which entity", "entities",
+             "by segment", "per segment", "each segment", "which segment", "segments",
+             "scenario", "simulat", "monte carlo", "stress", "shock", "percentile", "probab", "distribution")
+# phrases that ask for a drill-down; entities are the reporting segments
+_BY_ENTITY = frozenset(k for k in _KEYWORDS if "entit" in k or "segment" in k)
+# words that turn a runway question into a Monte Carlo one
+_SCENARIO = frozenset(("scenario", "simulat", "monte carlo", "stress", "shock", "percentile", "probab", "distribution"))
+# each pattern starts with a class of its possible first characters, which lets
+# the engine skip most positions without trying every alternative
+_WHOLE_WORD = frozenset(("gm",))
+_KEYWORD_RX = re.compile("(?=[%s])(?=(%s))" % (
+    "".join(sorted({k[0] for k in _KEYWORDS})),
+    "|".join(rf"\b{re.escape(k)}\b" if k in _WHOLE_WORD else re.escape(k) for k in _KEYWORDS)))
+_DATE_RX = re.compile(
+    r"(?=[adfjlmnost2])(?:"
+    rf"(?P<name>{_MONTH_NAME})"
+    r"|\b(?P<y>20\d{2})[-/ ](?P<mm>0?[1-9]|1[0-2])\b"
+    r"|last\s+(?P<n>\d+)\s+months?"
+    r"|(?P<trend>\btrend\b))",
+    re.I,
+)
+
+_DIGIT_RX = re.compile(r"\d")
+_TREND_RX = re.compile(r"\btrend\b", re.I)
+
+# ---------- month ranges: quarters, halves, fiscal years, to-date, spans ----------
+
+@dataclass(frozen=True)
+class MonthRange:
+    """
+    A run of whole months as asked ("Q2 2025", "H1", "YTD", "Jan–Jun 2025").
+    Years left out and to-date ranges are pinned down by resolve() against
+    the latest month with data, so one routed question stays cacheable.
+    """
+    label: str
+    start_month: int = 1
+    end_month: int = 12
+    start_year: Optional[int] = None
+    end_year: Optional[int] = None
+    to_date: Optional[Literal["year", "quarter"]] = None
+
+    def resolve(self, latest: pd.Period) -> Tuple[pd.Period, pd.Period]:
+        """(first, last) month; an implied year is the latest one in which the range has started."""
+        import pandas as pd
+        if self.to_date is not None:
+            first = 1 if self.to_date == "year" else (latest.month - 1) // 3 * 3 + 1
+            return pd.Period(year=latest.year, month=first, freq="M"), latest
+        wraps = self.end_month < self.start_month  # e.g. Nov–Feb
+        sy, ey = self.start_year, self.end_year
+        if sy is None:
+            sy = ey - wraps if ey is not None else latest.year - (latest.month < self.start_month)
+        if ey is None:
+            ey = sy + wraps
+        return pd.Period(year=sy, month=self.start_month, freq="M"), pd.Period(year=ey, month=self.end_month, freq="M")
+
+_MON = (r"(?:jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?|"
+        r"sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)")
+_TO = r"\s*(?:-|–|—|to|through|thru|until)\s*"
+
+def _year(g: str) -> str:
+    # "2025", "FY2025", "FY25", "'25"; a bare two-digit number is not a year
+    return rf"(?:\s*(?:fy\s*)?(?P<{g}>20\d{{2}})|\s*(?:fy\s*|')(?P<{g}2>\d{{2}}))"
+
+_RANGE_RX = re.compile(
+    r"(?=[2adfhjmnoqsy])\b(?:"
+    rf"(?P<q>q[1-4]){_year('qy')}?"
+    rf"|(?P<h>h[12]){_year('hy')}?"
+    r"|fy\s*'?(?:(?P<fy>20\d{2})|(?P<fy2>\d{2}))"
+    r"|(?P<ytd>ytd|year[\s-]to[\s-]date)"
+    r"|(?P<qtd>qtd|quarter[\s-]to[\s-]date)"
+    rf"|(?P<m1>{_MON})(?:\s+(?P<y1>20\d{{2}}))?{_TO}(?P<m2>{_MON})(?:\s+(?P<y2>20\d{{2}}))?"
+    rf"|(?P<ay>20\d{{2}})[-/](?P<am>0?[1-9]|1[0-2]){_TO}(?P<by>20\d{{2}})[-/](?P<bm>0?[1-9]|1[0-2])"
+    r")\b",
+    re.I,
+)
+
+def _year_of(m: re.Match, g: str) -> Optional[int]:
+    if m.group(g):
+        return int(m.group(g))
+    return 2000 + int(m.group(g + "2")) if m.group(g + "2") else None
+
+def _parse_range(text: str) -> Optional[MonthRange]:
+    m = _RANGE_RX.search(text)
+    if m is None:
+        return None
+    if m.group("q"):
+        q, y = int(m.group("q")[1]), _year_of(m, "qy")
+        return MonthRange(f"Q{q}" + (f" {y}" if y else ""), 3 * q - 2, 3 * q, y, y)
+    if m.group("h"):
+        h, y = int(m.group("h")[1]), _year_of(m, "hy")
+        return MonthRange(f"H{h}" + (f" {y}" if y else ""), 6 * h - 5, 6 * h, y, y)
+    if m.group("fy") or m.group("fy2"):
+        y = _year_of(m, "fy")
+        return MonthRange(f"FY{y}", 1, 12, y, y)
+    if m.group("ytd"):
+        return MonthRange("YTD", to_date="year")
+    if m.group("qtd"):
+        return MonthRange("QTD", to_date="quarter")
+    if m.group("m1"):
+        sm, em = (int(_MONTH_NUM[m.group(g)[:3].lower()]) for g in ("m1", "m2"))
+        sy = int(m.group("y1")) if m.group("y1") else None
+        ey = int(m.group("y2")) if m.group("y2") else None
+    else:
+        sm, em, sy, ey = int(m.group("am")), int(m.group("bm")), int(m.group("ay")), int(m.group("by"))
+    if sy is not None and ey is not None and (sy, sm) > (ey, em):  # written backwards: "2025-06 to 2025-01"
+        sm, em, sy, ey = em, sm, ey, sy
+    return MonthRange(f"{_span_end(sm, sy)}–{_span_end(em, ey)}", sm, em, sy, ey)
+
+def _span_end(month: int, year: Optional[int]) -> str:
+    name = _MONTH_ABBR[month - 1]
+    return name if year is None else f"{name} {year}"
+
+class _Scan:
+    """Keywords of one query; date expressions and ranges are scanned on first use."""
+    __slots__ = ("text", "keywords", "_dates", "_range")
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self.keywords = set(_KEYWORD_RX.findall(text.lower()))
+        self._dates = None
+        self._range = False  # not scanned yet (None: no range)
+
+    def range(self) -> Optional[MonthRange]:
+        if self._range is False:
+            self._range = _parse_range(self.text)
+        return self._range
+
+    def dates(self) -> Tuple[Optional[str], Optional[Tuple[str, str]], Optional[str], bool]:
+        """(first month name, first (year, month), first 'last N' count, any 'trend')."""
+        if self._dates is None:
+            text = self.text
+            if not _DIGIT_RX.search(text):  # every date form but 'trend' needs a digit
+                self._dates = (None, None, None, _TREND_RX.search(text) is not None)
+                return self._dates
+            month_name = ym = last_n = None
+            trend = False
+            for m in _DATE_RX.finditer(text):
+                kind = m.lastgroup
+                if kind == "name":
+                    if month_name is None:
+                        month_name = m.group("name")
+                elif kind == "mm":
+                    if ym is None:
+                        ym = (m.group("y"), m.group("mm"))
+                elif kind == "n":
+                    if last_n is None:
+                        last_n = m.group("n")
+                else:
+                    trend = True
+            self._dates = (month_name, ym, last_n, trend)
+        return self._dates
+
+_MONTH_ABBR = ("Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec")
+_MONTH_NUM = {m.lower(): str(i) for i, m in enumerate(_MONTH_ABBR, 1)}
+
+@lru_cache(maxsize=4096)
+def _named_month(label: str) -> pd.Period:
+    # MONTH_RX only matches '<month name> <yyyy>', so the first three letters name the month
+    name, year = label.split()
+    return _ym_month(year, _MONTH_NUM[name[:3].lower()])
+
+@lru_cache(maxsize=4096)
+def _ym_month(y: str, mm: str) -> pd.Period:
+    import pandas as pd
+    return pd.Period(f"{int(y):04d}-{int(mm):02d}", freq="M")
+
+def _single_month(scan: _Scan) -> Optional[pd.Period]:
+    month_name, ym, _, _ = scan.dates()
+    if month_name is not None:
+        return _named_month(month_name)
+    if ym is not None:
+        return _ym_month(*ym)
     return None
 
-def _find_last_n_months(text: str) -> Optional[int]:
-    m = re.search(r"last\s+(\d+)\s+months?", text, re.I)
-    if m:
-        return int(m.group(1))
+def _last_n_months(scan: _Scan) -> Optional[int]:
+    _, _, last_n, trend = scan.dates()
+    if last_n is not None:
+        return int(last_n)
     # default for “trend” without number → 3 months
-    if re.search(r"\btrend\b", text, re.I):
-        return 3
-    return None
+    return 3 if trend else None
 
-def route_intent(text: str) -> Dict[str, Any]:
-    """Return {'intent': ..., 'month': Period|None, 'last_n': int|None}"""
-    t = text.strip().lower()
+def _find_single_month(text: str) -> Optional[pd.Period]:
+    return _single_month(_Scan(text))
 
-    if "cash" in t and "runway" in t:
-        return {"intent": "cash_runway", "month": None, "last_n": None}
+def _find_last_n_months(text: str) -> Optional[int]:
+    return _last_n_months(_Scan(text))
 
-    if "revenue" in t and ("budget" in t or "vs" in t):
-        return {"intent": "revenue_vs_budget", "month": _find_single_month(text), "last_n": None}
+def _route(scan: _Scan) -> Dict[str, Any]:
+    kw = scan.keywords
+    by = "entity" if kw & _BY_ENTITY else None
 
-    if ("gross margin" in t or "gm" in t) and ("trend" in t or "last" in t):
-        return {"intent": "gross_margin_trend", "month": None, "last_n": _find_last_n_months(text)}
+    if "runway" in kw and kw & _SCENARIO:
+        return {"intent": "runway_scenarios", "month": None, "last_n": None, "by": None, "range": None}
 
-    if "opex" in t and ("breakdown" in t or "by category" in t):
-        return {"intent": "opex_breakdown", "month": _find_single_month(text), "last_n": None}
+    if "cash" in kw and "runway" in kw:
+        return {"intent": "cash_runway", "month": None, "last_n": None, "by": None, "range": None}
+
+    if "revenue" in kw and ("budget" in kw or "vs" in kw or by or scan.range()):
+        return _dated("revenue_vs_budget", scan, by)
+
+    if ("gross margin" in kw or "gm" in kw) and ("trend" in kw or "last" in kw or scan.range()):
+        rng = scan.range()
+        if rng is not None:
+            return {"intent": "gross_margin_trend", "month": None, "last_n": None, "by": by, "range": rng}
+        # a drill-down covers one month or the last N months combined
+        month = _single_month(scan) if by else None
+        return {"intent": "gross_margin_trend", "month": month, "last_n": _last_n_months(scan), "by": by,
+                "range": None}
+
+    if "opex" in kw and ("breakdown" in kw or "by category" in kw or by or scan.range()):
+        return _dated("opex_breakdown", scan, by)
+
+    if "ebitda" in kw:
+        return _dated("ebitda", scan, by)
 
     # fallback: try to guess month and map simple keywords
-    if "gross margin" in t:
-        return {"intent": "gross_margin_trend", "month": None, "last_n": 3}
+    if "gross margin" in kw:
+        if by:
+            return {"intent": "gross_margin_trend", "month": _single_month(scan),
+                    "last_n": _last_n_months(scan), "by": by, "range": None}
+        return {"intent": "gross_margin_trend", "month": None, "last_n": 3, "by": None, "range": None}
+
+    return {"intent": None, "month": _single_month(scan), "last_n": None, "by": None, "range": None}
+
+def _dated(intent: str, scan: _Scan, by: Optional[str]) -> Dict[str, Any]:
+    """Route of a one-month intent: a range ("Q2 2025", "YTD") takes the place of the month."""
+    rng = scan.range()
+    return {"intent": intent, "month": None if rng else _single_month(scan), "last_n": None, "by": by, "range": rng}
+
+def route_intent(text: str) -> Dict[str, Any]:
+    """
+    Return {'intent': ..., 'month': Period|None, 'last_n': int|None, 'by': 'entity'|None,
+    'range': MonthRange|None}
+    """
+    return _route(_Scan(text))
 
-    return {"intent": None, "month": _find_single_month(text), "last_n": None}
+def route_intents(texts: Iterable[str], dedupe: bool = True) -> List[Dict[str, Any]]:
+    """
+    route_intent over many queries (e.g. replayed logs). With `dedupe`,
+    repeated queries are routed once; every result is still its own dict.
+    """
+    if not dedupe:
+        return [_route(_Scan(t)) for t in texts]
+    seen: Dict[str, Dict[str, Any]] = {}
+    out = []
+    for t in texts:
+        r = seen.get(t)
+        if r is None:
+            r = seen[t] = _route(_Scan(t))
+            out.append(r)
+        else:
+            out.append(dict(r))
+    return out
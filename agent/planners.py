@@ -1,77 +1,370 @@
 # agent/planners.py
 from __future__ import annotations
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Tuple
 import pandas as pd
 
-from agent.intent_router import route_intent
+from agent.intent_router import MonthRange, route_intent, route_intents
+from agent.answer_cache import answer_cache, answer_key
+from agent.tools.timing import span, trace
 from agent.tools.metrics import (
     revenue_vs_budget, gross_margin_pct_trend, opex_breakdown_by_category,
-    ebitda_value, cash_runway_months
+    ebitda_value, cash_runway_months,
+    revenue_vs_budget_many, gross_margin_pct_trends, opex_breakdowns_by_category,
+    revenue_vs_budget_by, gross_margin_pct_by, opex_breakdown_by, ebitda_by,
+    revenue_vs_budget_range, gross_margin_pct_range, opex_breakdown_range, ebitda_range,
 )
+from agent.tools.kpi_cube import kpi_cube
+from agent.tools.runway_scenarios import simulate_runway
 from agent.tools.charts import (
-    bar_actual_vs_budget, line_gm_trend, pie_opex_breakdown, line_cash_trend
+    bar_actual_vs_budget, line_gm_trend, pie_opex_breakdown, line_cash_trend, figure_payload_bytes,
+    bar_ranked, bar_stacked_ranked, bar_actual_vs_budget_months, fan_chart,
 )
 from agent.answer_formatter import (
-    revenue_vs_budget_text, gm_trend_text, opex_breakdown_text, cash_runway_text
+    revenue_vs_budget_text, gm_trend_text, opex_breakdown_text, cash_runway_text,
+    ebitda_text, revenue_by_text, gm_by_text, opex_by_text, ebitda_by_text, fmt_month, fmt_range,
+    revenue_range_text, gm_range_text, opex_range_text, ebitda_range_text, runway_scenarios_text,
 )
 
 def _most_recent_complete_month(df: pd.DataFrame) -> pd.Period:
-    return df["month"].max()
+    months = kpi_cube(df).present_months()
+    return months[-1] if len(months) else df["month"].max()
 
-def plan_and_answer(query: str, data: Dict[str, pd.DataFrame]) -> Dict[str, Any]:
+def plan_and_answer(query: str, data: Dict[str, pd.DataFrame], cache: bool = True) -> Dict[str, Any]:
     """
     Returns a dict with keys:
       - 'intent'
       - 'text'
       - 'figure' (plotly fig or None)
+      - 'timings' (seconds per stage; only when timing is enabled, see tools/timing.py)
+      - 'figure_bytes' (figure JSON payload size; only when timing is enabled)
+
+    Answers are cached per (data["version"], routed query); the figure object
+    is shared between cache hits, so treat it as read-only.
     """
-    actuals = data["actuals_usd"]
-    budget  = data["budget_usd"]
-    cash    = data["cash_usd"]
+    with trace("plan") as t:
+        with span("plan.route"):
+            route = route_intent(query)
+        key = answer_key(data["version"], route) if cache and "version" in data else None
+        ans = None
+        if key is not None:
+            with span("plan.cache"):
+                ans = answer_cache.get(key)
+        if ans is None:
+            ans = _answer(route, data)
+            if key is not None:
+                answer_cache.put(key, ans)
+    out = dict(ans)
+    if t is not None:
+        out["timings"] = t.as_dict()
+        out["figure_bytes"] = figure_payload_bytes(out.get("figure"))
+    return out
 
-    route = route_intent(query)
-    intent = route.get("intent")
+def plan_and_answer_many(queries: List[str], data: Dict[str, pd.DataFrame],
+                         cache: bool = True) -> List[Dict[str, Any]]:
+    """
+    plan_and_answer for a batch of queries (e.g. a dashboard's fixed set).
+    Queries are routed together, identical routed questions are answered
+    once, and each intent's metrics are read for all its months in one pass.
+    Results match plan_and_answer query for query; duplicates share figures.
+    With timing enabled each answer carries the batch's 'timings'.
+    """
+    with trace("plan_many") as t:
+        with span("plan.route"):
+            routes = route_intents(queries)
+        version = data.get("version") if cache else None
+        keys = [answer_key(version, r) for r in routes]
+        answers: Dict[Any, Dict[str, Any]] = {}
+        pending: Dict[Any, Dict[str, Any]] = {}
+        with span("plan.cache"):
+            for key, route in zip(keys, routes):
+                if key in answers or key in pending:
+                    continue
+                hit = answer_cache.get(key) if version is not None else None
+                if hit is not None:
+                    answers[key] = hit
+                else:
+                    pending[key] = route
+        for key, ans in _answer_many(pending, data).items():
+            if version is not None:
+                answer_cache.put(key, ans)
+            answers[key] = ans
+    out = [dict(answers[k]) for k in keys]
+    if t is not None:
+        timings = t.as_dict()
+        for ans in out:
+            ans["timings"] = timings
+            ans["figure_bytes"] = figure_payload_bytes(ans.get("figure"))
+    return out
 
-    if intent == "revenue_vs_budget":
-        month = route.get("month") or _most_recent_complete_month(actuals)
-        res = revenue_vs_budget(actuals, budget, month)
+# ---------- answers (shared by the single and batched paths) ----------
+
+def _revenue_answer(res: Dict[str, Any]) -> Dict[str, Any]:
+    with span("plan.text"):
         text = revenue_vs_budget_text(month=res["month"],
                                       actual=res["revenue_actual_usd"],
                                       budget=res["revenue_budget_usd"],
                                       var=res["variance_usd"],
                                       var_pct=res["variance_pct"])
-        fig  = bar_actual_vs_budget(month_label=str(month),
+    with span("plan.figure"):
+        fig  = bar_actual_vs_budget(month_label=str(res["month"]),
                                     actual=res["revenue_actual_usd"],
                                     budget=res["revenue_budget_usd"])
-        return {"intent": intent, "text": text, "figure": fig}
+    return {"intent": "revenue_vs_budget", "text": text, "figure": fig}
 
-    if intent == "gross_margin_trend":
-        n = route.get("last_n") or 3
-        all_months = sorted(actuals["month"].unique())
-        months = all_months[-n:] if len(all_months) >= n else all_months
-        df = gross_margin_pct_trend(actuals, months=list(months))
+def _gm_answer(df: pd.DataFrame) -> Dict[str, Any]:
+    with span("plan.text"):
         text = gm_trend_text(df)
+    with span("plan.figure"):
         fig = line_gm_trend(df)
-        return {"intent": intent, "text": text, "figure": fig}
+    return {"intent": "gross_margin_trend", "text": text, "figure": fig}
 
-    if intent == "opex_breakdown":
-        month = route.get("month") or _most_recent_complete_month(actuals)
-        series = opex_breakdown_by_category(actuals, month)
+def _opex_answer(month: pd.Period, series: pd.Series) -> Dict[str, Any]:
+    with span("plan.text"):
         text = opex_breakdown_text(month, series)
+    with span("plan.figure"):
         fig = pie_opex_breakdown(series, month_label=str(month))
-        return {"intent": intent, "text": text, "figure": fig}
+    return {"intent": "opex_breakdown", "text": text, "figure": fig}
 
-    if intent == "cash_runway":
-        ans = cash_runway_months(actuals, cash)
+def _cash_answer(ans: Dict[str, Any], cash: pd.DataFrame) -> Dict[str, Any]:
+    with span("plan.text"):
         text = cash_runway_text(ans["asof"], ans["cash_current_usd"], ans["avg_burn_usd"], ans["runway_months"])
-        # optional: small trend chart for last 6 months
+    # optional: small trend chart for last 6 months
+    with span("plan.figure"):
         cash_tail = cash.sort_values("month").tail(12)
         fig = line_cash_trend(cash_tail, title="Cash (last 12 months)")
-        return {"intent": intent, "text": text, "figure": fig}
+    return {"intent": "cash_runway", "text": text, "figure": fig}
 
-    # Unknown intent
+def _scenarios_answer(res: Dict[str, Any]) -> Dict[str, Any]:
+    with span("plan.text"):
+        text = runway_scenarios_text(res)
+    with span("plan.figure"):
+        fig = fan_chart(res["cash_pct"], title=f"Cash scenarios — {res['paths']:,} paths")
+    return {"intent": "runway_scenarios", "text": text, "figure": fig}
+
+def _ebitda_answer(month: pd.Period, value: float) -> Dict[str, Any]:
+    with span("plan.text"):
+        text = ebitda_text(month, value)
+    return {"intent": "ebitda", "text": text, "figure": None}
+
+def _unknown_answer() -> Dict[str, Any]:
     return {
         "intent": None,
-        "text": "Sorry—I couldn’t classify that. Try asking about: revenue vs budget (for a month), gross margin trend, opex breakdown (for a month), or cash runway.",
+        "text": "Sorry—I couldn’t classify that. Try asking about: revenue vs budget (for a month or a range like Q2 2025), gross margin trend, opex breakdown, EBITDA, or cash runway (and runway scenarios) — optionally by entity.",
         "figure": None,
     }
+
+def _gm_window(actuals: pd.DataFrame, n: int) -> List[pd.Period]:
+    all_months = list(kpi_cube(actuals).present_months())
+    return all_months[-n:] if len(all_months) >= n else all_months
+
+# ---------- drill-downs: one row per value of route["by"], ranked charts ----------
+
+_PLURALS = {"entity": "entities"}
+
+def _drilldown_answer(route: Dict[str, Any], data: Dict[str, pd.DataFrame]) -> Dict[str, Any]:
+    actuals = data["actuals_usd"]
+    intent, by = route["intent"], route["by"]
+    noun = _PLURALS.get(by, f"{by} groups")
+    if route.get("range"):
+        months, m = _range_months(route["range"], actuals)
+        period = months  # the metrics sum a list of months
+    else:
+        period = route.get("month") or _most_recent_complete_month(actuals)
+        m = fmt_month(period) if not pd.isna(period) else "the latest month"  # NaT: no actuals
+
+    if intent == "revenue_vs_budget":
+        with span("plan.metric"):
+            df = revenue_vs_budget_by(actuals, data["budget_usd"], period, by)
+        with span("plan.text"):
+            text = revenue_by_text(m, df, noun)
+        with span("plan.figure"):
+            fig = bar_ranked(df["variance_usd"], f"Revenue vs Budget variance by {by} — {m}")
+        return {"intent": f"revenue_vs_budget_by_{by}", "text": text, "figure": fig}
+
+    if intent == "gross_margin_trend":
+        with span("plan.metric"):
+            if route.get("range"):
+                label = m
+            else:
+                months = [route["month"]] if route.get("month") else _gm_window(actuals, route.get("last_n") or 3)
+                if not months:
+                    return {"intent": f"gross_margin_by_{by}", "text": f"No data to compute Gross Margin by {by}.",
+                            "figure": None}
+                label = fmt_month(months[0]) if len(months) == 1 else f"{fmt_month(months[0])}–{fmt_month(months[-1])}"
+            df = gross_margin_pct_by(actuals, months, by)
+        with span("plan.text"):
+            text = gm_by_text(label, df, noun)
+        with span("plan.figure"):
+            fig = bar_ranked(df["gm_pct"] * 100, f"Gross Margin % by {by} — {label}", x_title="GM %")
+        return {"intent": f"gross_margin_by_{by}", "text": text, "figure": fig}
+
+    if intent == "opex_breakdown":
+        with span("plan.metric"):
+            frame = opex_breakdown_by(actuals, period, by)
+        with span("plan.text"):
+            text = opex_by_text(m, frame, noun)
+        with span("plan.figure"):
+            fig = bar_stacked_ranked(frame, f"Opex by {by} and category — {m}")
+        return {"intent": f"opex_by_{by}", "text": text, "figure": fig}
+
+    # ebitda
+    with span("plan.metric"):
+        series = ebitda_by(actuals, period, by)
+    with span("plan.text"):
+        text = ebitda_by_text(m, series, noun)
+    with span("plan.figure"):
+        fig = bar_ranked(series, f"EBITDA by {by} — {m}")
+    return {"intent": f"ebitda_by_{by}", "text": text, "figure": fig}
+
+# ---------- month ranges: totals from the cubes' running sums ----------
+
+def _range_months(rng: MonthRange, actuals: pd.DataFrame) -> Tuple[List[pd.Period], str]:
+    """The range's months (resolved against the latest month with data) and its display label."""
+    start, end = rng.resolve(_most_recent_complete_month(actuals))
+    return list(pd.period_range(start, end, freq="M")), fmt_range(rng.label, start, end)
+
+def _range_answer(route: Dict[str, Any], data: Dict[str, pd.DataFrame]) -> Dict[str, Any]:
+    actuals = data["actuals_usd"]
+    intent = route["intent"]
+    months, label = _range_months(route["range"], actuals)
+    start, end = months[0], months[-1]
+
+    if intent == "revenue_vs_budget":
+        with span("plan.metric"):
+            res = revenue_vs_budget_range(actuals, data["budget_usd"], start, end)
+            monthly = revenue_vs_budget_many(actuals, data["budget_usd"], months)
+        with span("plan.text"):
+            text = revenue_range_text(label, res)
+        with span("plan.figure"):
+            fig = bar_actual_vs_budget_months([str(r["month"]) for r in monthly],
+                                              [r["revenue_actual_usd"] for r in monthly],
+                                              [r["revenue_budget_usd"] for r in monthly],
+                                              f"Revenue vs Budget — {label}")
+        return {"intent": "revenue_vs_budget_range", "text": text, "figure": fig}
+
+    if intent == "gross_margin_trend":
+        with span("plan.metric"):
+            res = gross_margin_pct_range(actuals, start, end)
+            df = gross_margin_pct_trend(actuals, months)
+        with span("plan.text"):
+            text = gm_range_text(label, res)
+        with span("plan.figure"):
+            fig = line_gm_trend(df)
+        return {"intent": "gross_margin_range", "text": text, "figure": fig}
+
+    if intent == "opex_breakdown":
+        with span("plan.metric"):
+            series = opex_breakdown_range(actuals, start, end)
+        with span("plan.text"):
+            text = opex_range_text(label, series)
+        with span("plan.figure"):
+            fig = pie_opex_breakdown(series, month_label=label)
+        return {"intent": "opex_breakdown_range", "text": text, "figure": fig}
+
+    # ebitda
+    with span("plan.metric"):
+        res = ebitda_range(actuals, start, end)
+    with span("plan.text"):
+        text = ebitda_range_text(label, res)
+    return {"intent": "ebitda_range", "text": text, "figure": None}
+
+def _answer(route: Dict[str, Any], data: Dict[str, pd.DataFrame]) -> Dict[str, Any]:
+    actuals = data["actuals_usd"]
+    budget  = data["budget_usd"]
+    cash    = data["cash_usd"]
+    intent = route.get("intent")
+
+    if route.get("by") and intent in ("revenue_vs_budget", "gross_margin_trend", "opex_breakdown", "ebitda"):
+        return _drilldown_answer(route, data)
+
+    if route.get("range") and intent in ("revenue_vs_budget", "gross_margin_trend", "opex_breakdown", "ebitda"):
+        return _range_answer(route, data)
+
+    if intent == "revenue_vs_budget":
+        with span("plan.metric"):
+            month = route.get("month") or _most_recent_complete_month(actuals)
+            res = revenue_vs_budget(actuals, budget, month)
+        return _revenue_answer(res)
+
+    if intent == "gross_margin_trend":
+        with span("plan.metric"):
+            months = _gm_window(actuals, route.get("last_n") or 3)
+            df = gross_margin_pct_trend(actuals, months=list(months))
+        return _gm_answer(df)
+
+    if intent == "opex_breakdown":
+        with span("plan.metric"):
+            month = route.get("month") or _most_recent_complete_month(actuals)
+            series = opex_breakdown_by_category(actuals, month)
+        return _opex_answer(month, series)
+
+    if intent == "ebitda":
+        with span("plan.metric"):
+            month = route.get("month") or _most_recent_complete_month(actuals)
+            value = ebitda_value(actuals, month)
+        return _ebitda_answer(month, value)
+
+    if intent == "cash_runway":
+        with span("plan.metric"):
+            res = cash_runway_months(actuals, cash)
+        return _cash_answer(res, cash)
+
+    if intent == "runway_scenarios":
+        with span("plan.metric"):
+            res = simulate_runway(actuals, cash)
+        return _scenarios_answer(res)
+
+    # Unknown intent
+    return _unknown_answer()
+
+def _answer_many(routes: Dict[Any, Dict[str, Any]], data: Dict[str, pd.DataFrame]) -> Dict[Any, Dict[str, Any]]:
+    """Answer {key: route} grouped by intent; each distinct month/window is computed once."""
+    actuals = data["actuals_usd"]
+    budget  = data["budget_usd"]
+    cash    = data["cash_usd"]
+    out: Dict[Any, Dict[str, Any]] = {}
+    by_intent: Dict[Any, List[Any]] = {}
+    for key, route in routes.items():
+        if route.get("by") or route.get("range") or route.get("intent") in ("ebitda", "runway_scenarios"):
+            out[key] = _answer(route, data)  # drill-downs and ranges are one cube read each already
+        else:
+            by_intent.setdefault(route.get("intent"), []).append(key)
+    latest = _most_recent_complete_month(actuals) if {"revenue_vs_budget", "opex_breakdown"} & by_intent.keys() else None
+
+    keys = by_intent.pop("revenue_vs_budget", [])
+    if keys:
+        months = {k: routes[k].get("month") or latest for k in keys}
+        uniq = list(dict.fromkeys(months.values()))
+        with span("plan.metric"):
+            results = revenue_vs_budget_many(actuals, budget, uniq)
+        by_month = {m: _revenue_answer(res) for m, res in zip(uniq, results)}
+        out.update((k, by_month[m]) for k, m in months.items())
+
+    keys = by_intent.pop("gross_margin_trend", [])
+    if keys:
+        ns = {k: routes[k].get("last_n") or 3 for k in keys}
+        uniq = list(dict.fromkeys(ns.values()))
+        with span("plan.metric"):
+            frames = gross_margin_pct_trends(actuals, [_gm_window(actuals, n) for n in uniq])
+        by_n = {n: _gm_answer(df) for n, df in zip(uniq, frames)}
+        out.update((k, by_n[n]) for k, n in ns.items())
+
+    keys = by_intent.pop("opex_breakdown", [])
+    if keys:
+        months = {k: routes[k].get("month") or latest for k in keys}
+        uniq = list(dict.fromkeys(months.values()))
+        with span("plan.metric"):
+            series = opex_breakdowns_by_category(actuals, uniq)
+        by_month = {m: _opex_answer(m, s) for m, s in zip(uniq, series)}
+        out.update((k, by_month[m]) for k, m in months.items())
+
+    keys = by_intent.pop("cash_runway", [])
+    if keys:
+        with span("plan.metric"):
+            res = cash_runway_months(actuals, cash)
+        ans = _cash_answer(res, cash)
+        out.update((k, ans) for k in keys)
+
+    for keys in by_intent.values():  # unknown intents
+        out.update((k, _unknown_answer()) for k in keys)
+    return out
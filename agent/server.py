@@ -0,0 +1,395 @@
+# agent/server.py
+from __future__ import annotations
+import argparse
+import asyncio
+import functools
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+import pandas as pd
+
+from agent.planners import plan_and_answer, plan_and_answer_many
+from agent.tools import timing
+from agent.tools.finance_utils import parse_month_to_period
+from agent.tools.kpi_cube import kpi_cube
+
+# Headless JSON/PDF service over one in-memory dataset (stdlib asyncio only).
+#
+#     python -m agent.server data/finance.xlsx --port 8765
+#
+#     GET  /ask?q=...            POST /ask {"q": "...", "figure": true}
+#     POST /ask_many {"queries": [...]}
+#     GET  /pdf?month=2025-06[&entity=E001][&renderer=vector|plotly]
+#     POST /reload               re-read the workbook (changed months only), or with
+#                                --shared, attach to the latest published version
+#     GET  /healthz, GET /metrics (Prometheus; stage timings with FPNA_TIMING=1)
+#
+# The event loop only parses requests and writes responses; planning and PDF
+# builds run on one bounded thread pool, so every request shares the loaded
+# frames and their KPI cubes. Each kind of work has its own admission gate:
+# at most `limit` requests run at once and at most `backlog` more wait for a
+# slot. Anything beyond that is answered 503 with Retry-After straight away,
+# so queueing delay (and tail latency) stays bounded under a burst instead of
+# growing without limit. A slot is held until its work finishes, even when
+# the request times out (504) or the client disconnects.
+
+MAX_BODY = 1 << 20
+MAX_HEADER = 16 << 10
+
+class Overloaded(Exception):
+    pass
+
+class HttpError(Exception):
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large", 500: "Internal Server Error", 503: "Service Unavailable",
+           504: "Gateway Timeout"}
+
+class Gate:
+    """Admission control: `limit` concurrent holders, at most `backlog` waiting."""
+    def __init__(self, limit: int, backlog: int) -> None:
+        self.limit, self.backlog = limit, backlog
+        self._sem = asyncio.Semaphore(limit)
+        self.active = self.waiting = 0
+        self.rejected = 0
+
+    async def acquire(self) -> None:
+        if self._sem.locked() and self.waiting >= self.backlog:
+            self.rejected += 1
+            raise Overloaded()
+        self.waiting += 1
+        try:
+            await self._sem.acquire()
+        finally:
+            self.waiting -= 1
+        self.active += 1
+
+    def release(self) -> None:
+        self.active -= 1
+        self._sem.release()
+
+    def stats(self) -> Dict[str, int]:
+        return {"limit": self.limit, "backlog": self.backlog, "active": self.active,
+                "waiting": self.waiting, "rejected": self.rejected}
+
+@dataclass(frozen=True)
+class ServerConfig:
+    host: str = "127.0.0.1"
+    port: int = 8765
+    ask_limit: int = 8          # concurrent /ask and /ask_many requests
+    ask_backlog: int = 64
+    pdf_limit: int = 2          # concurrent PDF builds (each renders 3 charts)
+    pdf_backlog: int = 8
+    pdf_renderer: Optional[str] = None  # "plotly" | "vector"; None: pdf_export.DEFAULT_RENDERER
+    timeout: float = 30.0       # seconds per request before 504
+    keepalive: float = 15.0     # idle seconds before a kept-alive connection is closed
+
+class FinanceServer:
+    def __init__(self, data: Dict[str, Any], config: ServerConfig = ServerConfig(),
+                 xlsx: Optional[str | Path] = None, shared_dir: Optional[str | Path] = None) -> None:
+        self.config = config
+        self.data = data
+        self.xlsx = xlsx
+        self.shared_dir = shared_dir
+        self.pool = ThreadPoolExecutor(max_workers=config.ask_limit + config.pdf_limit + 1,
+                                       thread_name_prefix="fpna-server")
+        self._views: "OrderedDict[Tuple[str, str], Dict[str, Any]]" = OrderedDict()
+        self._views_lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self._server: Optional[asyncio.AbstractServer] = None
+        self.started = time.time()
+        self.requests = 0
+        self.gates: Dict[str, Gate] = {}
+
+    # ---------- lifecycle ----------
+
+    async def start(self) -> asyncio.AbstractServer:
+        cfg = self.config
+        # gates belong to the running loop
+        self.gates = {"ask": Gate(cfg.ask_limit, cfg.ask_backlog), "pdf": Gate(cfg.pdf_limit, cfg.pdf_backlog),
+                      "reload": Gate(1, 0)}
+        await asyncio.get_running_loop().run_in_executor(self.pool, self._warm)
+        self._server = await asyncio.start_server(self._handle, cfg.host, cfg.port, limit=MAX_HEADER)
+        return self._server
+
+    @property
+    def port(self) -> int:
+        return self._server.sockets[0].getsockname()[1] if self._server else self.config.port
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+    def _warm(self) -> None:
+        kpi_cube(self.data["actuals_usd"])
+        kpi_cube(self.data["budget_usd"])
+
+    # ---------- work ----------
+
+    async def _run(self, gate: str, fn: Callable[..., Any], *args: Any) -> Any:
+        g = self.gates[gate]
+        await g.acquire()
+        try:
+            fut = asyncio.get_running_loop().run_in_executor(self.pool, functools.partial(fn, *args))
+        except BaseException:
+            g.release()
+            raise
+        fut.add_done_callback(lambda _: g.release())
+        try:
+            return await asyncio.wait_for(asyncio.shield(fut), self.config.timeout)
+        except asyncio.TimeoutError:
+            raise HttpError(504, f"timed out after {self.config.timeout:g}s") from None
+
+    def _entity_view(self, data: Dict[str, Any], entity: str) -> Dict[str, Any]:
+        from agent.tools.batch_export import entity_view
+        key = (data.get("version", ""), entity)
+        with self._views_lock:
+            view = self._views.get(key)
+            if view is not None:
+                self._views.move_to_end(key)
+                return view
+        view = entity_view(data, entity)
+        with self._views_lock:
+            self._views[key] = view
+            while len(self._views) > 32:
+                self._views.popitem(last=False)
+        return view
+
+    def _pdf(self, data: Dict[str, Any], month: pd.Period, entity: Optional[str], renderer: Optional[str]) -> bytes:
+        from agent.tools.pdf_export import build_board_pdf
+        if entity is not None:
+            data = self._entity_view(data, entity)
+        return build_board_pdf(data, month, subtitle=entity, renderer=renderer)
+
+    def _reload(self) -> Dict[str, Any]:
+        from agent.tools.refresh import refresh_finance_data
+        if self.shared_dir is not None:
+            from agent.tools.shared_data import attach, current_version
+            with self._reload_lock:
+                before = self.data.get("version")
+                if current_version(self.shared_dir) != before:
+                    self.data = attach(self.shared_dir)
+            return {"version": self.data.get("version"), "changed": self.data.get("version") != before}
+        if self.xlsx is None:
+            raise HttpError(400, "server was started without a workbook")
+        with self._reload_lock:
+            stats: Dict[str, Any] = {}
+            before = self.data.get("version")
+            data = refresh_finance_data(self.xlsx, self.data, stats=stats)
+            kpi_cube(data["actuals_usd"]), kpi_cube(data["budget_usd"])  # built before requests see it
+            self.data = data
+        return {"version": self.data.get("version"), "changed": self.data.get("version") != before,
+                "stats": {k: v for k, v in stats.items() if isinstance(v, (int, float, str))}}
+
+    # ---------- endpoints ----------
+
+    async def _ask(self, params: Dict[str, Any]) -> bytes:
+        q = params.get("q")
+        if not isinstance(q, str) or not q.strip():
+            raise HttpError(400, "missing query 'q'")
+        ans = await self._run("ask", plan_and_answer, q, self.data)
+        return _answer_json(ans, _flag(params.get("figure", True)))
+
+    async def _ask_many(self, params: Dict[str, Any]) -> bytes:
+        queries = params.get("queries")
+        if not isinstance(queries, list) or not all(isinstance(q, str) for q in queries):
+            raise HttpError(400, "'queries' must be a list of strings")
+        answers = await self._run("ask", plan_and_answer_many, queries, self.data)
+        figure = _flag(params.get("figure", True))
+        return b"[" + b",".join(_answer_json(a, figure) for a in answers) + b"]"
+
+    async def _pdf_endpoint(self, params: Dict[str, Any]) -> bytes:
+        data = self.data
+        try:
+            month = parse_month_to_period(params["month"]) if params.get("month") else \
+                kpi_cube(data["actuals_usd"]).present_months()[-1]
+        except (ValueError, IndexError) as e:
+            raise HttpError(400, f"bad month: {e}") from None
+        entity = params.get("entity") or None
+        if entity is not None and entity not in set(map(str, kpi_cube(data["actuals_usd"]).entities)):
+            raise HttpError(404, f"unknown entity {entity!r}")
+        from agent.tools.pdf_export import RENDERERS
+        renderer = params.get("renderer") or self.config.pdf_renderer
+        if renderer is not None and renderer not in RENDERERS:
+            raise HttpError(400, f"unknown renderer {renderer!r}; expected one of {', '.join(RENDERERS)}")
+        return await self._run("pdf", self._pdf, data, month, entity, renderer)
+
+    def _health(self) -> Dict[str, Any]:
+        return {"status": "ok", "version": self.data.get("version"), "uptime_s": round(time.time() - self.started, 1),
+                "requests": self.requests, "gates": {k: g.stats() for k, g in self.gates.items()}}
+
+    def _metrics(self) -> str:
+        lines = ["# TYPE fpna_server_requests_total counter", f"fpna_server_requests_total {self.requests}"]
+        for name, g in self.gates.items():
+            for field, value in g.stats().items():
+                lines.append(f'fpna_server_gate_{field}{{gate="{name}"}} {value}')
+        return "\n".join(lines) + "\n" + timing.prometheus_text()
+
+    async def _dispatch(self, method: str, path: str, params: Dict[str, Any]) -> Tuple[int, str, bytes]:
+        if path == "/ask" and method in ("GET", "POST"):
+            return 200, "application/json", await self._ask(params)
+        if path == "/ask_many" and method == "POST":
+            return 200, "application/json", await self._ask_many(params)
+        if path == "/pdf" and method in ("GET", "POST"):
+            return 200, "application/pdf", await self._pdf_endpoint(params)
+        if path == "/reload" and method == "POST":
+            return 200, "application/json", _json(await self._run("reload", self._reload))
+        if path == "/healthz" and method == "GET":
+            return 200, "application/json", _json(self._health())
+        if path == "/metrics" and method == "GET":
+            return 200, "text/plain; version=0.0.4", self._metrics().encode()
+        if path in ("/ask", "/ask_many", "/pdf", "/reload", "/healthz", "/metrics"):
+            raise HttpError(405, f"{method} not allowed on {path}")
+        raise HttpError(404, f"no route for {path}")
+
+    # ---------- HTTP/1.1 ----------
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), self.config.keepalive)
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+                    return
+                except asyncio.LimitOverrunError:
+                    await _respond(writer, 413, "application/json", _error("headers too large"), False)
+                    return
+                self.requests += 1
+                keep_alive = True
+                extra: Dict[str, str] = {}
+                try:
+                    method, target, headers = _parse_head(head)
+                    keep_alive = headers.get("connection", "").lower() != "close"
+                    length = int(headers.get("content-length") or 0)
+                    if length > MAX_BODY:
+                        keep_alive = False
+                        raise HttpError(413, "request body too large")
+                    body = await reader.readexactly(length) if length else b""
+                    url = urlsplit(target)
+                    params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+                    if body:
+                        try:
+                            payload = json.loads(body)
+                        except ValueError:
+                            raise HttpError(400, "body must be JSON") from None
+                        if not isinstance(payload, dict):
+                            raise HttpError(400, "body must be a JSON object")
+                        params.update(payload)
+                    status, ctype, out = await self._dispatch(method, url.path, params)
+                except Overloaded:
+                    status, ctype, out = 503, "application/json", _error("server busy, retry shortly")
+                    extra["Retry-After"] = "1"
+                except HttpError as e:
+                    status, ctype, out = e.status, "application/json", _error(str(e))
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    return
+                except Exception as e:  # the request's own failure, not the server's
+                    status, ctype, out = 500, "application/json", _error(f"{type(e).__name__}: {e}")
+                await _respond(writer, status, ctype, out, keep_alive, extra)
+                if not keep_alive:
+                    return
+        finally:
+            writer.close()
+
+def _parse_head(head: bytes) -> Tuple[str, str, Dict[str, str]]:
+    try:
+        lines = head.decode("latin-1").split("\r\n")
+        method, target, _version = lines[0].split(" ", 2)
+    except ValueError:
+        raise HttpError(400, "malformed request line") from None
+    headers = {}
+    for line in lines[1:]:
+        if ":" in line:
+            k, v = line.split(":", 1)
+            headers[k.strip().lower()] = v.strip()
+    return method.upper(), target, headers
+
+async def _respond(writer: asyncio.StreamWriter, status: int, ctype: str, body: bytes,
+                   keep_alive: bool, extra: Optional[Dict[str, str]] = None) -> None:
+    head = [f"HTTP/1.1 {status} {REASONS.get(status, '')}", f"Content-Type: {ctype}",
+            f"Content-Length: {len(body)}", f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+    head += [f"{k}: {v}" for k, v in (extra or {}).items()]
+    writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+    try:
+        await writer.drain()
+    except ConnectionError:
+        pass
+
+def _flag(value: Any) -> bool:
+    return value not in (False, 0, "0", "false", "no", "off")
+
+def _json(obj: Any) -> bytes:
+    return json.dumps(obj, default=str).encode()
+
+def _error(message: str) -> bytes:
+    return _json({"error": message})
+
+def _answer_json(ans: Dict[str, Any], figure: bool) -> bytes:
+    body = {k: v for k, v in ans.items() if k != "figure"}
+    out = _json(body)
+    fig = ans.get("figure")
+    if not figure or fig is None:
+        return out[:-1] + b', "figure": null}'
+    # the figure is already serialized by plotly; splice it in rather than re-parse it
+    return out[:-1] + b', "figure": ' + fig.to_json().encode() + b"}"
+
+# ---------- CLI ----------
+
+async def serve(server: FinanceServer) -> None:
+    srv = await server.start()
+    cfg = server.config
+    print(f"fpna server on http://{cfg.host}:{server.port} (dataset {server.data.get('version')}; "
+          f"ask {cfg.ask_limit}+{cfg.ask_backlog} queued, pdf {cfg.pdf_limit}+{cfg.pdf_backlog} queued)", flush=True)
+    try:
+        async with srv:
+            await srv.serve_forever()
+    finally:
+        await server.close()
+
+def main(argv: Optional[List[str]] = None) -> None:
+    from agent.tools.data_loader import load_finance_data
+
+    ap = argparse.ArgumentParser(description="Serve plan_and_answer and board PDFs over HTTP/JSON.")
+    ap.add_argument("xlsx", nargs="?", default="data/finance.xlsx")
+    ap.add_argument("--host", default=ServerConfig.host)
+    ap.add_argument("--port", type=int, default=ServerConfig.port)
+    ap.add_argument("--ask-limit", type=int, default=ServerConfig.ask_limit, help="concurrent questions")
+    ap.add_argument("--ask-backlog", type=int, default=ServerConfig.ask_backlog, help="queued questions before 503")
+    ap.add_argument("--pdf-limit", type=int, default=ServerConfig.pdf_limit, help="concurrent PDF builds")
+    ap.add_argument("--pdf-backlog", type=int, default=ServerConfig.pdf_backlog, help="queued PDFs before 503")
+    ap.add_argument("--pdf-renderer", choices=("plotly", "vector"), default=None,
+                    help="default chart renderer for /pdf (default: $FPNA_PDF_RENDERER or plotly)")
+    ap.add_argument("--timeout", type=float, default=ServerConfig.timeout, help="seconds per request before 504")
+    ap.add_argument("--shared", default=None, metavar="DIR",
+                    help="attach to the dataset published in DIR (agent.tools.shared_data) instead of loading xlsx")
+    args = ap.parse_args(argv)
+
+    config = ServerConfig(host=args.host, port=args.port, ask_limit=args.ask_limit, ask_backlog=args.ask_backlog,
+                          pdf_limit=args.pdf_limit, pdf_backlog=args.pdf_backlog, pdf_renderer=args.pdf_renderer,
+                          timeout=args.timeout)
+    t0 = time.perf_counter()
+    if args.shared:
+        from agent.tools.shared_data import attach
+        data = attach(args.shared)
+    else:
+        data = load_finance_data(args.xlsx)
+    print(f"loaded {args.shared or args.xlsx} in {time.perf_counter() - t0:.2f}s", flush=True)
+    try:
+        asyncio.run(serve(FinanceServer(data, config, xlsx=None if args.shared else args.xlsx,
+                                        shared_dir=args.shared)))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+# agent/tools/batch_export.py
+from __future__ import annotations
+import argparse
+import multiprocessing
+import os
+import re
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+import pandas as pd
+
+from agent.tools.finance_utils import parse_month_to_period
+
+# Batch board-pack export: months × (consolidated | one pack per entity).
+# Work is split into (entity, months) tasks for a process pool; every worker
+# gets the dataset once at start-up, filters it per entity at most once, and
+# returns the PDF bytes to the parent, which writes them to a directory or a
+# zip as they complete. When the dataset is published under shared_dir
+# ($FPNA_SHARED_DIR, see shared_data.py) workers attach to that one mapped
+# copy; otherwise each worker receives its own pickled copy. Workers are
+# spawned, never forked: a fork would inherit kaleido's browser-server state
+# without its thread, and the child's first chart render would block forever.
+#
+# The module globals below are only set inside pool workers; a serial export
+# (workers=0) keeps its dataset and entity views local to the call.
+
+@dataclass(frozen=True)
+class PackResult:
+    month: pd.Period
+    entity: Optional[str]
+    filename: str
+    seconds: float
+    size_bytes: int
+    png_cache_hits: int = 0
+
+_worker_data: Optional[Dict[str, pd.DataFrame]] = None
+_worker_views: Dict[Optional[str], Dict[str, pd.DataFrame]] = {}
+
+def _slug(entity: str) -> str:
+    return re.sub(r"[^\w.-]+", "-", str(entity)).strip("-") or "entity"
+
+def pack_filename(month: pd.Period, entity: Optional[str] = None, slug: Optional[str] = None) -> str:
+    """File name of one pack; `slug` overrides the name part derived from `entity`."""
+    if slug is None and entity is not None:
+        slug = _slug(entity)
+    return f"fpna_board_{month}{'' if slug is None else '_' + slug}.pdf"
+
+def pack_slugs(entities: Sequence[Optional[str]]) -> Dict[Optional[str], Optional[str]]:
+    """File-name part per entity; distinct names that sanitize alike ("A/B", "A B") get -2, -3, ..."""
+    out: Dict[Optional[str], Optional[str]] = {}
+    taken = set()
+    for entity in dict.fromkeys(entities):
+        if entity is None:
+            out[None] = None
+            continue
+        base = slug = _slug(entity)
+        n = 1
+        while slug.lower() in taken:  # lower(): case-insensitive filesystems and zip extractors
+            n += 1
+            slug = f"{base}-{n}"
+        taken.add(slug.lower())
+        out[entity] = slug
+    return out
+
+def entity_view(data: Dict[str, pd.DataFrame], entity: Optional[str]) -> Dict[str, pd.DataFrame]:
+    """Dataset restricted to one entity's P&L (cash stays consolidated)."""
+    if entity is None:
+        return data
+    view = dict(data)
+    if "version" in data:
+        view["version"] = f"{data['version']}:{entity}"
+    for key in ("actuals_usd", "budget_usd"):
+        df = data[key]
+        view[key] = df[df["entity"] == entity].reset_index(drop=True)
+    return view
+
+def _published(data: Dict[str, pd.DataFrame], shared_dir: Optional[str | Path]) -> Optional[Tuple[str, str]]:
+    """(shared_dir, version) when `data`'s version is published under shared_dir, else None."""
+    version = data.get("version")
+    if not shared_dir or not version or not (Path(shared_dir) / str(version) / "meta.json").exists():
+        return None
+    return str(shared_dir), str(version)
+
+def _init_worker(data: Optional[Dict[str, pd.DataFrame]], png_cache_dir: Optional[str] = None,
+                 shared: Optional[Tuple[str, str]] = None) -> None:
+    global _worker_data
+    if shared is not None:
+        from agent.tools.shared_data import attach
+        data = attach(*shared)
+    _worker_data = data
+    _worker_views.clear()
+    if png_cache_dir:
+        from agent.tools.pdf_export import png_cache
+        png_cache.disk_dir = Path(png_cache_dir)
+
+def _build_packs(data: Dict[str, pd.DataFrame], views: Dict[Optional[str], Dict[str, pd.DataFrame]],
+                 entity: Optional[str], slug: Optional[str], months: Sequence[pd.Period],
+                 renderer: Optional[str] = None) -> List[Tuple[PackResult, bytes]]:
+    from agent.tools.pdf_export import build_board_pdf, png_cache
+
+    view = views.get(entity)
+    if view is None:
+        view = views[entity] = entity_view(data, entity)
+    out = []
+    for month in months:
+        t0 = time.perf_counter()
+        hits0 = png_cache.hits + png_cache.disk_hits
+        pdf = build_board_pdf(view, month, subtitle=entity, renderer=renderer)
+        res = PackResult(month, entity, pack_filename(month, entity, slug), time.perf_counter() - t0, len(pdf),
+                         png_cache.hits + png_cache.disk_hits - hits0)
+        out.append((res, pdf))
+    return out
+
+def _build_task(entity: Optional[str], slug: Optional[str], months: Sequence[pd.Period],
+                renderer: Optional[str] = None) -> List[Tuple[PackResult, bytes]]:
+    # pool workers only: the dataset arrived through _init_worker
+    return _build_packs(_worker_data, _worker_views, entity, slug, months, renderer)
+
+def _tasks(months: Sequence[pd.Period], entities: Sequence[Optional[str]],
+           workers: int) -> Iterator[Tuple[Optional[str], List[pd.Period]]]:
+    # enough tasks to keep every worker busy, but months of one entity stay together
+    per_task = max(1, -(-len(months) * len(entities) // (4 * max(workers, 1))))
+    for entity in entities:
+        for i in range(0, len(months), per_task):
+            yield entity, list(months[i:i + per_task])
+
+class _Sink:
+    """Writes packs into a directory, or into a zip when `out` ends with .zip."""
+    def __init__(self, out: Path) -> None:
+        self.zip = None
+        if out.suffix.lower() == ".zip":
+            out.parent.mkdir(parents=True, exist_ok=True)
+            self.zip = zipfile.ZipFile(out, "w", compression=zipfile.ZIP_STORED)
+        else:
+            out.mkdir(parents=True, exist_ok=True)
+        self.out = out
+
+    def write(self, name: str, pdf: bytes) -> None:
+        if self.zip is not None:
+            self.zip.writestr(name, pdf)
+        else:
+            (self.out / name).write_bytes(pdf)
+
+    def close(self) -> None:
+        if self.zip is not None:
+            self.zip.close()
+
+def export_board_packs(
+    data: Dict[str, pd.DataFrame],
+    months: Iterable[pd.Period],
+    out: str | Path,
+    entities: Optional[Sequence[str]] = None,
+    workers: Optional[int] = None,
+    png_cache_dir: Optional[str | Path] = None,
+    renderer: Optional[str] = None,
+    shared_dir: Optional[str | Path] = None,
+) -> List[PackResult]:
+    """
+    Build one board PDF per month (and per entity, if `entities` is given)
+    into directory/zip `out`. `workers=None` uses every core; `workers=0`
+    builds serially in this process. `png_cache_dir` lets workers share
+    rendered charts through the on-disk PNG cache tier; `renderer` is passed
+    to build_board_pdf ("vector" needs neither). Workers attach to `data`
+    published under `shared_dir` (default $FPNA_SHARED_DIR) instead of each
+    receiving a copy. Returns per-pack timings in completion order.
+    """
+    months = [m if isinstance(m, pd.Period) else parse_month_to_period(m) for m in months]
+    groups: List[Optional[str]] = list(dict.fromkeys(entities)) if entities else [None]
+    slugs = pack_slugs(groups)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    sink = _Sink(Path(out))
+    results: List[PackResult] = []
+    try:
+        if workers == 0:
+            # this is the caller's process (an app or server): leave its PNG cache as it was
+            from agent.tools.pdf_export import png_cache
+            disk_dir = png_cache.disk_dir
+            if png_cache_dir:
+                png_cache.disk_dir = Path(png_cache_dir)
+            views: Dict[Optional[str], Dict[str, pd.DataFrame]] = {}
+            try:
+                for entity, chunk in _tasks(months, groups, 1):
+                    for res, pdf in _build_packs(data, views, entity, slugs[entity], chunk, renderer):
+                        sink.write(res.filename, pdf)
+                        results.append(res)
+            finally:
+                png_cache.disk_dir = disk_dir
+            return results
+        shared = _published(data, shared_dir or os.environ.get("FPNA_SHARED_DIR"))
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                                 initializer=_init_worker,
+                                 initargs=(None if shared else data, png_cache_dir and str(png_cache_dir),
+                                           shared)) as pool:
+            futures = [pool.submit(_build_task, e, slugs[e], chunk, renderer)
+                       for e, chunk in _tasks(months, groups, workers)]
+            for fut in as_completed(futures):
+                for res, pdf in fut.result():
+                    sink.write(res.filename, pdf)
+                    results.append(res)
+    finally:
+        sink.close()
+    return results
+
+# ---------- CLI ----------
+
+def _parse_months(specs: Sequence[str], available: pd.PeriodIndex) -> List[pd.Period]:
+    months: List[pd.Period] = []
+    for spec in specs:
+        if spec == "all":
+            months.extend(available)
+        elif ":" in spec:
+            lo, hi = (parse_month_to_period(p) for p in spec.split(":", 1))
+            months.extend(pd.period_range(lo, hi, freq="M"))
+        else:
+            months.append(parse_month_to_period(spec))
+    return list(dict.fromkeys(months))
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    from agent.tools.data_loader import load_finance_data
+    from agent.tools.kpi_cube import kpi_cube
+    from agent.tools.pdf_export import DEFAULT_RENDERER, RENDERERS
+
+    ap = argparse.ArgumentParser(description="Build board PDFs for many months/entities.")
+    ap.add_argument("xlsx", nargs="?", default="data/finance.xlsx")
+    ap.add_argument("--months", nargs="+", default=["all"],
+                    help="'all', months like 2025-06, or ranges like 2025-01:2025-12")
+    ap.add_argument("--entities", nargs="*", help="one pack per listed entity")
+    ap.add_argument("--all-entities", action="store_true", help="one pack per entity in actuals")
+    ap.add_argument("--out", default="board_packs.zip", help="output directory or .zip")
+    ap.add_argument("--workers", type=int, default=None, help="processes (default: all cores, 0 = serial)")
+    ap.add_argument("--png-cache", default=None, help="directory for the shared rendered-chart cache")
+    ap.add_argument("--renderer", choices=RENDERERS, default=DEFAULT_RENDERER,
+                    help="charts as kaleido PNGs (plotly) or reportlab vector graphics (vector)")
+    args = ap.parse_args(argv)
+
+    t0 = time.perf_counter()
+    data = load_finance_data(args.xlsx)
+    cube = kpi_cube(data["actuals_usd"])
+    entities = list(cube.entities) if args.all_entities else args.entities
+    months = _parse_months(args.months, cube.present_months())
+    load_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    results = export_board_packs(data, months, args.out, entities=entities, workers=args.workers,
+                                 png_cache_dir=args.png_cache, renderer=args.renderer)
+    wall = time.perf_counter() - t0
+    for r in sorted(results, key=lambda r: (str(r.entity), r.month)):
+        print(f"{r.filename:<48} {r.seconds:7.2f}s {r.size_bytes / 1024:8.1f} KiB")
+    busy = sum(r.seconds for r in results)
+    hits = sum(r.png_cache_hits for r in results)
+    charts = f"{hits}/{3 * len(results)} charts from the PNG cache" if args.renderer == "plotly" else "vector charts"
+    print(f"{len(results)} packs -> {args.out}: load {load_s:.2f}s, build {wall:.2f}s wall "
+          f"({busy:.2f}s summed, {busy / wall if wall else 0:.1f}x parallel); {charts}")
+
+if __name__ == "__main__":
+    main()
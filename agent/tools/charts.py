@@ -1,29 +1,190 @@
 # agent/tools/charts.py
 from __future__ import annotations
-import plotly.graph_objects as go
+from typing import Optional
+import numpy as np
 import pandas as pd
 
+# plotly.graph_objects is imported inside each builder: importing it (and the
+# validators behind the first Figure) costs ~150 ms, which the router, metrics
+# and headless callers that never draw a chart should not pay.
+
+MAX_POINTS = 1000    # line traces longer than this are LTTB-downsampled to it
+WEBGL_POINTS = 500   # drawn points above which a line switches to Scattergl
+MARKER_POINTS = 60   # markers only while they stay readable
+
 def bar_actual_vs_budget(month_label: str, actual: float, budget: float):
+    import plotly.graph_objects as go
     fig = go.Figure()
     fig.add_trace(go.Bar(name="Actual", x=[month_label], y=[actual]))
     fig.add_trace(go.Bar(name="Budget", x=[month_label], y=[budget]))
     fig.update_layout(barmode="group", title=f"Revenue vs Budget — {month_label}", height=380)
     return fig
 
-def line_gm_trend(df: pd.DataFrame):
+def bar_actual_vs_budget_months(labels: list, actual, budget, title: str):
+    """Grouped actual vs budget bars, one pair per month (e.g. the months of a quarter)."""
+    import plotly.graph_objects as go
+    fig = go.Figure([go.Bar(name="Actual", x=labels, y=actual), go.Bar(name="Budget", x=labels, y=budget)])
+    fig.update_layout(barmode="group", title=title, height=380)
+    return fig
+
+def line_gm_trend(df: pd.DataFrame, max_points: Optional[int] = MAX_POINTS):
+    import plotly.graph_objects as go
     # df: columns month (Period), gm_pct (float or None)
-    x = [str(m) for m in df["month"].tolist()]
-    y = [None if v is None else v*100 for v in df["gm_pct"].tolist()]
-    fig = go.Figure(go.Scatter(x=x, y=y, mode="lines+markers"))
+    y = pd.to_numeric(df["gm_pct"], errors="coerce").to_numpy(dtype=np.float64) * 100
+    fig = go.Figure(_line_trace(df["month"], y, max_points))
     fig.update_layout(title="Gross Margin % Trend", yaxis_title="GM %", height=380)
     return fig
 
 def pie_opex_breakdown(series: pd.Series, month_label: str):
+    import plotly.graph_objects as go
     fig = go.Figure(go.Pie(labels=series.index.tolist(), values=series.values.tolist(), hole=0.3))
     fig.update_layout(title=f"Opex Breakdown — {month_label}", height=380)
     return fig
 
-def line_cash_trend(df: pd.DataFrame, title="Cash Trend"):
-    fig = go.Figure(go.Scatter(x=df["month"].astype(str), y=df["cash_usd"], mode="lines+markers"))
+def line_cash_trend(df: pd.DataFrame, title="Cash Trend", max_points: Optional[int] = MAX_POINTS):
+    import plotly.graph_objects as go
+    y = df["cash_usd"].to_numpy(dtype=np.float64)
+    fig = go.Figure(_line_trace(df["month"], y, max_points))
     fig.update_layout(title=title, yaxis_title="USD", height=320)
     return fig
+
+# ---------- long series: LTTB downsampling, WebGL traces ----------
+
+def lttb(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Indices of the `n_out` points kept by largest-triangle-three-buckets.
+    The first and last points are always kept; each interior bucket keeps
+    the point spanning the largest triangle with the previously kept point
+    and the next bucket's mean, which preserves peaks and troughs. NaN y
+    values are only kept where a whole bucket is NaN (so gaps survive).
+    """
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    finite = np.isfinite(y)
+    # bucket means from prefix sums over the finite points, all buckets at once
+    cx = np.concatenate(([0.0], np.cumsum(np.where(finite, x, 0.0))))
+    cy = np.concatenate(([0.0], np.cumsum(np.where(finite, y, 0.0))))
+    cn = np.concatenate(([0], np.cumsum(finite)))
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)  # n_out - 2 interior buckets
+    starts, ends = edges[:-1], edges[1:]
+    nxt_s, nxt_e = np.append(starts[1:], n - 1), np.append(ends[1:], n)  # the last one looks at the final point
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cnt = cn[nxt_e] - cn[nxt_s]
+        avg_x = (cx[nxt_e] - cx[nxt_s]) / cnt
+        avg_y = (cy[nxt_e] - cy[nxt_s]) / cnt
+
+        out = np.empty(n_out, dtype=np.int64)
+        out[0], out[-1] = 0, n - 1
+        # the triangle's doubled area, |y_j (x_a - avg_x) + x_j (avg_y - y_a) + (avg_x y_a - x_a avg_y)|,
+        # depends on the previously kept point a, so the buckets are walked in order
+        has_nan = not finite.all()
+        a = 0
+        for i, (s, e, ax, ay) in enumerate(zip(starts.tolist(), ends.tolist(), avg_x.tolist(), avg_y.tolist()), 1):
+            xa, ya = x[a], y[a]
+            area = np.abs(y[s:e] * (xa - ax) + x[s:e] * (ay - ya) + (ax * ya - xa * ay))
+            if has_nan:
+                area[np.isnan(area)] = -1.0
+            a = s + int(area.argmax())
+            out[i] = a
+    return out
+
+def _x_positions(x: pd.Series) -> np.ndarray:
+    """Numeric positions of a month/date/number column, for LTTB."""
+    if isinstance(x.dtype, pd.PeriodDtype):
+        return x.array.asi8
+    if pd.api.types.is_datetime64_any_dtype(x.dtype):
+        if x.dt.tz is not None:
+            x = x.dt.tz_localize(None)
+        return x.to_numpy().astype("datetime64[s]").view(np.int64)
+    values = x.to_numpy()
+    return values if values.dtype.kind in "iuf" else np.arange(len(values))
+
+def _x_values(x: pd.Series) -> np.ndarray:
+    """What to plot for the (kept) x values: month labels, ISO dates or timestamps."""
+    if isinstance(x.dtype, pd.PeriodDtype):
+        return x.astype(str).to_numpy()
+    if pd.api.types.is_datetime64_any_dtype(x.dtype):
+        if x.dt.tz is not None:
+            x = x.dt.tz_localize(None)
+        values = x.to_numpy()  # keeps the column's unit (pandas may use us/s for far dates)
+        if (values.astype("datetime64[s]").view(np.int64) % 86_400 == 0).all():
+            return np.datetime_as_string(values, unit="D")  # '2025-06-01', not full timestamps
+        return values
+    values = x.to_numpy()
+    return values if values.dtype.kind in "iuf" else values.astype(str)
+
+def _line_trace(x: pd.Series, y: np.ndarray, max_points: Optional[int] = MAX_POINTS):
+    """
+    Line trace from whole arrays (no per-point Python). Series longer than
+    `max_points` are LTTB-downsampled before any labels are formatted; more
+    than WEBGL_POINTS drawn points use Scattergl.
+    """
+    import plotly.graph_objects as go
+    if max_points and len(y) > max_points:
+        keep = lttb(_x_positions(x), y, max_points)
+        x, y = x.iloc[keep], y[keep]
+    trace = go.Scattergl if len(y) > WEBGL_POINTS else go.Scatter
+    return trace(x=_x_values(x), y=y, mode="lines+markers" if len(y) <= MARKER_POINTS else "lines")
+
+def figure_payload_bytes(fig) -> int:
+    """Size of the figure JSON sent to the browser (what Streamlit/the server ship)."""
+    return 0 if fig is None else len(fig.to_json().encode())
+
+def fan_chart(pct: pd.DataFrame, title: str = "Cash scenarios", y_title: str = "USD"):
+    """
+    Percentile bands over months: `pct` has a month index and columns like
+    p5..p95. Outer pairs (p5/p95, p25/p75, ...) are shaded, the middle one
+    (p50) is drawn as a line, and a zero line marks cash-out.
+    """
+    import plotly.graph_objects as go
+    x = pct.index.astype(str) if isinstance(pct.index, pd.PeriodIndex) else pct.index
+    cols = list(pct.columns)
+    fig = go.Figure()
+    for i in range(len(cols) // 2):
+        low, high = cols[i], cols[-1 - i]
+        fig.add_trace(go.Scatter(x=x, y=pct[high].to_numpy(), mode="lines", line=dict(width=0),
+                                 showlegend=False, hoverinfo="skip"))
+        fig.add_trace(go.Scatter(x=x, y=pct[low].to_numpy(), mode="lines", line=dict(width=0), fill="tonexty",
+                                 fillcolor=f"rgba(31, 119, 180, {0.12 + 0.1 * i:.2f})", name=f"{low}–{high}"))
+    if len(cols) % 2:
+        mid = cols[len(cols) // 2]
+        fig.add_trace(go.Scatter(x=x, y=pct[mid].to_numpy(), mode="lines", line=dict(color="rgb(31, 119, 180)"),
+                                 name=mid))
+    fig.add_hline(y=0, line=dict(color="firebrick", dash="dot", width=1))
+    fig.update_layout(title=title, yaxis_title=y_title, height=380)
+    return fig
+
+# ---------- ranked drill-down charts (one bar per entity/segment) ----------
+
+def _labels(index: pd.Index) -> list:
+    return [" / ".join(map(str, k)) if isinstance(k, tuple) else str(k) for k in index]
+
+def bar_ranked(series: pd.Series, title: str, top: int = 20, x_title: str = "USD"):
+    """
+    Horizontal bars sorted by value, highest at the top. With more than `top`
+    groups only the extremes are drawn: the top//2 highest and the rest lowest.
+    """
+    import plotly.graph_objects as go
+    s = series.dropna().sort_values(ascending=False)
+    if len(s) > top:
+        s = pd.concat([s.iloc[:top // 2], s.iloc[len(s) - (top - top // 2):]])
+        title = f"{title} (top and bottom {top} of {series.notna().sum()})"
+    s = s.iloc[::-1]  # plotly draws the first bar at the bottom
+    fig = go.Figure(go.Bar(x=s.values.tolist(), y=_labels(s.index), orientation="h"))
+    fig.update_layout(title=title, xaxis_title=x_title, height=max(320, 22 * len(s) + 120))
+    return fig
+
+def bar_stacked_ranked(frame: pd.DataFrame, title: str, top: int = 20):
+    """Stacked horizontal bars (one segment per column) for the `top` largest row totals."""
+    import plotly.graph_objects as go
+    totals = frame.sum(axis=1).sort_values(ascending=False)
+    if len(totals) > top:
+        title = f"{title} (top {top} of {len(totals)})"
+    rows = frame.loc[totals.index[:top][::-1]]
+    labels = _labels(rows.index)
+    fig = go.Figure([go.Bar(name=str(c), x=rows[c].tolist(), y=labels, orientation="h") for c in rows.columns])
+    fig.update_layout(barmode="stack", title=title, xaxis_title="USD", height=max(320, 22 * len(rows) + 120))
+    return fig
@@ -0,0 +1,104 @@
+# agent/tools/data_cache.py
+from __future__ import annotations
+import hashlib
+import json
+import os
+import shutil
+import uuid
+from pathlib import Path
+from typing import Dict, Optional
+import pandas as pd
+
+# Sidecar Parquet cache of the USD-projected frames, stored next to the workbook:
+#   data/.finance.xlsx.cache/manifest.json
+#   data/.finance.xlsx.cache/<sha256[:16]>/{actuals_usd,budget_usd,cash_usd,fx,month_digests}.parquet
+# The manifest is swapped in last (os.replace), so concurrent readers see either
+# the old or the new snapshot, never a half-written one.
+
+CACHE_FORMAT = 4  # bump when the loader's output schema changes
+CACHED_FRAMES = ("actuals_usd", "budget_usd", "cash_usd", "fx", "month_digests")
+
+def cache_available() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+def cache_dir_for(xlsx: Path) -> Path:
+    return xlsx.parent / f".{xlsx.name}.cache"
+
+def file_sha256(path: Path, chunk: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def workbook_fingerprint(xlsx: Path) -> dict:
+    st = xlsx.stat()
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": file_sha256(xlsx)}
+
+def _read_manifest(cache_dir: Path) -> Optional[dict]:
+    try:
+        manifest = json.loads((cache_dir / "manifest.json").read_text())
+    except (OSError, ValueError):
+        return None
+    return manifest if manifest.get("format") == CACHE_FORMAT else None
+
+def _write_manifest(cache_dir: Path, manifest: dict) -> None:
+    tmp = cache_dir / f"manifest.{uuid.uuid4().hex}.tmp"
+    tmp.write_text(json.dumps(manifest))
+    os.replace(tmp, cache_dir / "manifest.json")
+
+def read_cached(xlsx: Path) -> Optional[Dict[str, pd.DataFrame]]:
+    """
+    Return the cached frames if they were built from this exact workbook.
+    A matching (size, mtime) is trusted as-is; otherwise the content hash
+    decides, so a touched-but-unchanged file stays warm.
+    """
+    cache_dir = cache_dir_for(xlsx)
+    manifest = _read_manifest(cache_dir)
+    if manifest is None:
+        return None
+    st = xlsx.stat()
+    if (manifest["size"], manifest["mtime_ns"]) != (st.st_size, st.st_mtime_ns):
+        if manifest["size"] != st.st_size or manifest["sha256"] != file_sha256(xlsx):
+            return None
+        manifest.update(mtime_ns=st.st_mtime_ns)
+        try:
+            _write_manifest(cache_dir, manifest)
+        except OSError:
+            pass
+    snap = cache_dir / manifest["snapshot"]
+    try:
+        return {name: pd.read_parquet(snap / f"{name}.parquet") for name in CACHED_FRAMES}
+    except Exception:
+        return None  # missing or unreadable snapshot -> rebuild
+
+def write_cached(xlsx: Path, frames: Dict[str, pd.DataFrame], fingerprint: dict) -> None:
+    """
+    Persist `frames` as the snapshot for the workbook described by
+    `fingerprint` (taken *before* parsing, so a concurrent edit can't be
+    cached under the new content's hash).
+    """
+    cache_dir = cache_dir_for(xlsx)
+    snapshot = fingerprint["sha256"][:16]
+    tmp = cache_dir / f"{snapshot}.{uuid.uuid4().hex}.tmp"
+    try:
+        cache_dir.mkdir(exist_ok=True)
+        tmp.mkdir()
+        for name in CACHED_FRAMES:
+            frames[name].to_parquet(tmp / f"{name}.parquet", index=False)
+        if (cache_dir / snapshot).exists():
+            shutil.rmtree(tmp, ignore_errors=True)
+        else:
+            os.replace(tmp, cache_dir / snapshot)
+        _write_manifest(cache_dir, {"format": CACHE_FORMAT, "snapshot": snapshot, **fingerprint})
+    except Exception:
+        shutil.rmtree(tmp, ignore_errors=True)
+        return  # read-only location, unserializable column, ...: the cache is best-effort
+    # drop snapshots of older workbook versions
+    for child in cache_dir.iterdir():
+        if child.is_dir() and child.name != snapshot and not child.name.endswith(".tmp"):
+            shutil.rmtree(child, ignore_errors=True)
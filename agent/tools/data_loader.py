@@ -1,8 +1,13 @@
 # agent/tools/data_loader.py
 from __future__ import annotations
+from dataclasses import dataclass
+import hashlib
+import numpy as np
 import pandas as pd
 from pathlib import Path
-from .finance_utils import normalize_month_column
+from .finance_utils import normalize_month_column, to_month_periods
+from .kpi_cube import kpi_cube, read_only_frame, account_group, REVENUE, COGS, OPEX, OTHER, OPEX_PREFIX
+from . import data_cache
 
 REQUIRED_SHEETS = ["actuals", "budget", "fx", "cash"]
 
@@ -15,62 +20,213 @@ def _require_sheets(xlsx: Path, xl: pd.ExcelFile) -> None:
         raise DataLoadError(f"Missing sheet(s) in {xlsx.name}: {', '.join(missing)}")
 
 def _clean_columns(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.copy()
+    df = df.copy(deep=False)
     df.columns = [c.strip().lower() for c in df.columns]
     return df
 
+@dataclass(frozen=True)
+class FxRates:
+    """Dense rate_to_usd matrix indexed by (month ordinal - base_ordinal, currency code)."""
+    base_ordinal: int
+    currencies: pd.Index
+    rates: np.ndarray  # (months, currencies), NaN where no rate
+
+    def currency_codes(self, currencies) -> np.ndarray:
+        """Upper-cased currency labels -> column codes (-1 if unknown)."""
+        return self.currencies.get_indexer(pd.Index(currencies).astype(str).str.upper())
+
+    def gather(self, month_ordinals: np.ndarray, currency_codes: np.ndarray) -> np.ndarray:
+        """rate_to_usd per row; NaN where the (month, currency) has no rate."""
+        m = np.asarray(month_ordinals, dtype=np.int64) - self.base_ordinal
+        c = np.asarray(currency_codes)
+        ok = (m >= 0) & (m < self.rates.shape[0]) & (c >= 0)
+        out = np.full(len(m), np.nan)
+        out[ok] = self.rates[m[ok], c[ok]]
+        return out
+
+def _fx_rate_matrix(fx_df: pd.DataFrame) -> FxRates:
+    if not {"month", "currency", "rate_to_usd"}.issubset(fx_df.columns):
+        raise DataLoadError("FX missing required columns: month, currency, rate_to_usd")
+    ords = to_month_periods(fx_df["month"]).array.asi8
+    cur_codes, currencies = pd.factorize(fx_df["currency"].astype(str).str.upper(), sort=True)
+    valid = ords != np.iinfo(np.int64).min
+    base = int(ords[valid].min()) if valid.any() else 0
+    n_months = int(ords[valid].max()) - base + 1 if valid.any() else 0
+
+    keys = (ords[valid] - base) * len(currencies) + cur_codes[valid]
+    if len(np.unique(keys)) != len(keys):
+        dup = fx_df.loc[valid].loc[pd.Series(keys).duplicated(keep=False).to_numpy(), ["month", "currency"]]
+        raise DataLoadError(f"Duplicate FX rate_to_usd for some (month,currency). Examples: {dup.head(5).to_dict('records')}")
+
+    rates = np.full((n_months, len(currencies)), np.nan)
+    rates[ords[valid] - base, cur_codes[valid]] = fx_df["rate_to_usd"].to_numpy(dtype=float, na_value=np.nan)[valid]
+    return FxRates(base_ordinal=base, currencies=pd.Index(currencies), rates=rates)
+
+def _missing_rate_error(months: pd.Series, currencies: pd.Series) -> DataLoadError:
+    bad = pd.DataFrame({"month": months, "currency": currencies}).drop_duplicates()
+    sample = bad.head(5).to_dict("records")
+    return DataLoadError(f"Missing FX rate_to_usd for some (month,currency). Examples: {sample}")
+
+def compact_pl_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Compact dtypes for a USD P&L frame: categorical entity/account_category,
+    plus precomputed is_revenue/is_cogs/is_opex flags and the opex_category
+    label (text after "Opex:", NaN for non-opex lines). Account labels are
+    classified once per distinct category, never per row. The local-currency
+    amount_local and categorical currency columns are carried along when
+    present (see fx_scenarios.py).
+    """
+    entity = df["entity"].astype("category")
+    account = df["account_category"].astype("category")
+    labels = account.cat.categories
+    codes = account.cat.codes.to_numpy()
+
+    groups = np.array([account_group(c) for c in labels] + [OTHER], dtype=np.int8)
+    row_group = groups[codes]  # code -1 (missing) -> OTHER
+    is_opex_line = groups[:-1] == OPEX
+    opex_categories = pd.Index([str(c)[len(OPEX_PREFIX):] for c in labels[is_opex_line]])
+    opex_lookup = np.full(len(labels) + 1, -1, dtype=np.int32)
+    opex_lookup[np.flatnonzero(is_opex_line)] = np.arange(len(opex_categories))
+
+    out = pd.DataFrame({
+        "month": df["month"],
+        "entity": entity,
+        "account_category": account,
+        "amount_usd": df["amount_usd"].astype(float),
+        "is_revenue": row_group == REVENUE,
+        "is_cogs": row_group == COGS,
+        "is_opex": row_group == OPEX,
+        "opex_category": pd.Categorical.from_codes(opex_lookup[codes], categories=opex_categories),
+    }, index=df.index)
+    if {"amount_local", "currency"}.issubset(df.columns):
+        out["amount_local"] = df["amount_local"].astype(float)
+        out["currency"] = df["currency"].astype("category")
+    return out
+
 def _project_usd(pl_df: pd.DataFrame, fx_df: pd.DataFrame) -> pd.DataFrame:
     """
-    Join P&L (actuals or budget) with FX on (month, currency) and compute amount_usd.
+    Look up each P&L (actuals or budget) row's FX rate by (month, currency) and compute amount_usd.
     Expects columns: month, entity, account_category, amount, currency
     FX expects columns: month, currency, rate_to_usd
+    The local amount is kept as amount_local, and currency as a categorical of
+    the upper-cased FX currency codes, so the rows can be reprojected later.
     """
     required = {"month", "entity", "account_category", "amount", "currency"}
     if not required.issubset(pl_df.columns):
         raise DataLoadError(f"P&L missing columns: {required - set(pl_df.columns)}")
 
-    if not {"month", "currency", "rate_to_usd"}.issubset(fx_df.columns):
-        raise DataLoadError("FX missing required columns: month, currency, rate_to_usd")
+    rates = _fx_rate_matrix(fx_df)
 
-    pl = pl_df.copy()
-    fx = fx_df.copy()
+    # gather rate_to_usd per row from the dense (month, currency) matrix
+    months = to_month_periods(pl_df["month"])
+    cur_codes, cur_uniques = pd.factorize(pl_df["currency"])
+    cur = np.append(rates.currency_codes(cur_uniques), -1)[cur_codes]
+    rate = rates.gather(months.array.asi8, cur)
 
-    # normalize
-    pl["currency"] = pl["currency"].astype(str).str.upper()
-    fx["currency"] = fx["currency"].astype(str).str.upper()
+    # detect missing rates
+    missing_rates = np.isnan(rate)
+    if missing_rates.any():
+        raise _missing_rate_error(months[missing_rates].reset_index(drop=True),
+                                  pl_df["currency"][missing_rates].astype(str).str.upper().to_numpy())
 
-    pl = normalize_month_column(pl, "month")
-    fx = normalize_month_column(fx, "month")
+    # standard projection
+    amount = pl_df["amount"].to_numpy(dtype=float, na_value=np.nan)
+    return pd.DataFrame({
+        "month": months,
+        "entity": pl_df["entity"],
+        "account_category": pl_df["account_category"],
+        "amount_usd": amount * rate,
+        "amount_local": amount,
+        "currency": pd.Categorical.from_codes(cur, categories=rates.currencies),
+    }, index=pl_df.index)
 
-    # join
-    merged = pl.merge(fx[["month", "currency", "rate_to_usd"]],
-                      on=["month", "currency"], how="left", validate="many_to_one")
+def _compact_fx(fx: pd.DataFrame) -> pd.DataFrame:
+    return pd.DataFrame({
+        "month": fx["month"],
+        "currency": fx["currency"].astype("category"),
+        "rate_to_usd": fx["rate_to_usd"].astype(float),
+    })
 
-    # detect missing rates
-    missing_rates = merged["rate_to_usd"].isna()
-    if missing_rates.any():
-        bad = merged.loc[missing_rates, ["month", "currency"]].drop_duplicates()
-        sample = bad.head(5).to_dict("records")
-        raise DataLoadError(f"Missing FX rate_to_usd for some (month,currency). Examples: {sample}")
+def concat_pl_frames(frames: list[pd.DataFrame]) -> pd.DataFrame:
+    """Concatenate compact P&L frames, unioning categories so columns stay categorical."""
+    frames = [f for f in frames if len(f)] or frames[:1]
+    out = []
+    for col in ("entity", "account_category", "opex_category", "currency"):
+        if not all(col in f.columns for f in frames):
+            continue
+        cats = pd.Index([])
+        for f in frames:
+            cats = cats.union(f[col].cat.categories)
+        out.append((col, cats))
+    aligned = [f.assign(**{col: f[col].cat.set_categories(cats) for col, cats in out}) for f in frames]
+    return pd.concat(aligned, ignore_index=True)
 
-    merged["amount_usd"] = merged["amount"].astype(float) * merged["rate_to_usd"].astype(float)
+# ---------- per-month content digests (for incremental refresh) ----------
 
-    # standard projection
-    out = merged[["month", "entity", "account_category", "amount_usd"]].copy()
-    return out
+DIGEST_COLUMNS = {
+    "actuals": ("entity", "account_category", "amount", "currency"),
+    "budget": ("entity", "account_category", "amount", "currency"),
+    "fx": ("currency", "rate_to_usd"),
+}
+_NUMERIC = {"amount", "rate_to_usd"}
+
+def _canonical(values, numeric: bool):
+    s = pd.Series(values)
+    if numeric:
+        return s.to_numpy(dtype=float, na_value=np.nan)
+    if isinstance(s.dtype, pd.CategoricalDtype) and not s.isna().any():
+        labels = s.cat.categories.astype(str)
+        if labels.is_unique:  # hashes like the str values, computed once per category
+            return s.cat.rename_categories(labels).array
+    return s.astype(str).to_numpy()
 
-def load_finance_data(xlsx_path: str | Path) -> dict[str, pd.DataFrame]:
+def _accumulate_digests(acc: dict, month_ordinals: np.ndarray, rows, columns) -> dict:
     """
-    Returns dict with:
-      - actuals_usd: month, entity, account_category, amount_usd
-      - budget_usd:  month, entity, account_category, amount_usd
-      - cash_usd:    month, cash_usd
-      - fx:          month, currency, rate_to_usd
+    Fold rows into acc[month ordinal] = (row count, sum of row hashes mod 2**64).
+    The sum makes a month's digest independent of row order within the sheet.
     """
-    xlsx = Path(xlsx_path)
-    if not xlsx.exists():
-        raise DataLoadError(f"File not found: {xlsx}")
+    canon = pd.DataFrame({c: _canonical(rows[c], c in _NUMERIC) for c in columns})
+    hashes = pd.util.hash_pandas_object(canon, index=False).to_numpy()
+    uniq, inv = np.unique(np.asarray(month_ordinals), return_inverse=True)
+    sums = np.zeros(len(uniq), dtype=np.uint64)
+    np.add.at(sums, inv, hashes)
+    counts = np.bincount(inv, minlength=len(uniq))
+    for o, n, d in zip(uniq.tolist(), counts.tolist(), sums.tolist()):
+        n0, d0 = acc.get(o, (0, 0))
+        acc[o] = (n0 + n, (d0 + d) % 2**64)
+    return acc
+
+def _digest_frame(per_sheet: dict[str, dict]) -> pd.DataFrame:
+    rows = [(sheet, o, n, d) for sheet, acc in per_sheet.items() for o, (n, d) in sorted(acc.items())]
+    return pd.DataFrame({
+        "sheet": pd.Series([r[0] for r in rows], dtype="str"),
+        "month": pd.PeriodIndex.from_ordinals(np.array([r[1] for r in rows], dtype=np.int64), freq="M"),
+        "rows": np.array([r[2] for r in rows], dtype=np.int64),
+        "digest": np.array([r[3] for r in rows], dtype=np.uint64),
+    })
+
+def _month_digests(**sheets: pd.DataFrame) -> pd.DataFrame:
+    return _digest_frame({
+        name: _accumulate_digests({}, df["month"].array.asi8, df, DIGEST_COLUMNS[name])
+        for name, df in sheets.items()
+    })
 
+def dataset_version(data: dict) -> str:
+    """Short content id of a loaded dataset (P&L/fx month digests + cash), stable across reloads."""
+    h = hashlib.sha256()
+    d = data["month_digests"]
+    h.update("\0".join(d["sheet"].tolist()).encode())
+    for col in (d["month"].array.asi8, d["rows"].to_numpy(), d["digest"].to_numpy()):
+        h.update(np.ascontiguousarray(col).tobytes())
+    cash = data["cash_usd"]
+    h.update(cash["month"].array.asi8.tobytes())
+    h.update(cash["cash_usd"].to_numpy(dtype=float, na_value=np.nan).tobytes())
+    return h.hexdigest()[:16]
+
+# ---------- workbook parsing ----------
+
+def _read_sheets(xlsx: Path) -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    """Raw actuals, budget, fx, cash sheets with cleaned headers and period[M] months."""
     xl = pd.ExcelFile(xlsx)
     _require_sheets(xlsx, xl)
 
@@ -80,22 +236,79 @@ def load_finance_data(xlsx_path: str | Path) -> dict[str, pd.DataFrame]:
     fx      = _clean_columns(pd.read_excel(xl, sheet_name="fx"))
     cash    = _clean_columns(pd.read_excel(xl, sheet_name="cash"))
 
-    # normalize month columns where present
-    fx = normalize_month_column(fx, "month")
-    cash = normalize_month_column(cash, "month")
-
-    # project to USD
-    actuals_usd = _project_usd(actuals, fx)
-    budget_usd  = _project_usd(budget, fx)
-
     # ensure cash_usd shape: month, cash_usd
     if not {"month", "cash_usd"}.issubset(cash.columns):
         raise DataLoadError("cash sheet must have columns: month, cash_usd")
-    cash_usd = cash[["month", "cash_usd"]].copy()
+
+    # normalize month columns where present
+    for df in (actuals, budget, fx, cash):
+        if "month" in df.columns:
+            df["month"] = to_month_periods(df["month"])
+    return actuals, budget, fx, cash
+
+def _parse_workbook(xlsx: Path) -> dict[str, pd.DataFrame]:
+    actuals, budget, fx, cash = _read_sheets(xlsx)
+
+    # project to USD
+    actuals_usd = compact_pl_frame(_project_usd(actuals, fx))
+    budget_usd  = compact_pl_frame(_project_usd(budget, fx))
 
     return {
         "actuals_usd": actuals_usd,
         "budget_usd": budget_usd,
-        "cash_usd": cash_usd,
-        "fx": fx[["month", "currency", "rate_to_usd"]].copy(),
+        "cash_usd": cash[["month", "cash_usd"]].copy(),
+        "fx": _compact_fx(fx),
+        "month_digests": _month_digests(actuals=actuals, budget=budget, fx=fx),
     }
+
+def load_finance_data(
+    xlsx_path: str | Path,
+    cache: bool = True,
+    streaming: bool = False,
+    chunk_size: int | None = None,
+    stats: dict | None = None,
+) -> dict[str, pd.DataFrame]:
+    """
+    Returns dict with:
+      - actuals_usd: month, entity, account_category, amount_usd
+                     (+ is_revenue, is_cogs, is_opex, opex_category; see compact_pl_frame)
+                     (+ amount_local, currency: the row in its reporting currency)
+      - budget_usd:  same columns as actuals_usd
+      - cash_usd:    month, cash_usd
+      - fx:          month, currency, rate_to_usd
+      - month_digests: sheet, month, rows, digest (used by refresh.refresh_finance_data)
+      - version:     content id of the above (see dataset_version); keys answer caches
+
+    month is period[M]; entity, account_category and currency are categorical.
+
+    With `cache=True` (and pyarrow installed) the projected frames are kept in
+    a Parquet sidecar next to the workbook (see data_cache.py) and reused
+    until the workbook's content changes.
+
+    `streaming=True` parses with the bounded-memory chunked reader in
+    stream_loader.py (for very large exports); `stats` then receives rows,
+    chunks, timings and peak memory for the parse.
+    """
+    xlsx = Path(xlsx_path)
+    if not xlsx.exists():
+        raise DataLoadError(f"File not found: {xlsx}")
+
+    use_cache = cache and data_cache.cache_available()
+    data = data_cache.read_cached(xlsx) if use_cache else None
+    if data is None:
+        fingerprint = data_cache.workbook_fingerprint(xlsx) if use_cache else None
+        if streaming:
+            from .stream_loader import DEFAULT_CHUNK_SIZE, stream_workbook
+            data = stream_workbook(xlsx, chunk_size or DEFAULT_CHUNK_SIZE, stats)
+        else:
+            data = _parse_workbook(xlsx)
+        if use_cache:
+            data_cache.write_cached(xlsx, data, fingerprint)
+
+    data["version"] = dataset_version(data)
+    # pre-aggregate once so metric calls don't rescan the ledgers; the cubes
+    # stay valid because the frames can't be edited in place (see kpi_cube.py)
+    for key in ("actuals_usd", "budget_usd"):
+        data[key] = read_only_frame(data[key])
+        kpi_cube(data[key])
+    return data
@@ -1,8 +1,10 @@
 # agent/tools/finance_utils.py
 from __future__ import annotations
+import re
 from dataclasses import dataclass
 from datetime import datetime
-from dateutil import parser as dateparser
+from functools import lru_cache
+import numpy as np
 import pandas as pd
 
 # --- Month handling ---------------------------------------------------------
@@ -20,12 +22,49 @@ def parse_month_to_period(value: str | int | datetime) -> pd.Period:
     try:
         return pd.Period(s, freq="M")
     except Exception:
+        from dateutil import parser as dateparser  # free-form labels only; YYYY-MM never gets here
         dt = dateparser.parse(s, dayfirst=False, yearfirst=False, default=datetime(2000, 1, 1))
         return pd.Period(pd.Timestamp(dt), freq="M")
 
+_YM_RX = re.compile(r"\s*(\d{4})-(\d{1,2})\s*")
+_NAT = np.iinfo(np.int64).min
+MONTH_DTYPE = pd.PeriodDtype("M")
+
+@lru_cache(maxsize=65536)
+def _parse_month_ordinal(value) -> int:
+    """Memoized slow path (pd.Period / dateutil) for values the fast path can't read."""
+    p = parse_month_to_period(value)
+    return _NAT if p is pd.NaT else p.ordinal
+
+def _month_ordinal(value) -> int:
+    if isinstance(value, str):
+        m = _YM_RX.fullmatch(value)
+        if m and 1 <= int(m.group(2)) <= 12:
+            return (int(m.group(1)) - 1970) * 12 + int(m.group(2)) - 1
+    return _parse_month_ordinal(value)
+
+def to_month_periods(values: pd.Series) -> pd.Series:
+    """
+    Vectorized parse_month_to_period over a Series -> period[M] Series.
+    Native datetimes/periods convert in bulk; anything else is factorized so
+    each distinct value is parsed once ('YYYY-MM' directly, the rest through
+    the memoized dateutil fallback). Missing values become NaT.
+    """
+    if isinstance(values.dtype, pd.PeriodDtype):
+        return values if values.dtype == MONTH_DTYPE else values.dt.asfreq("M")
+    if pd.api.types.is_datetime64_any_dtype(values.dtype):
+        return values.dt.tz_localize(None).dt.to_period("M") if values.dt.tz else values.dt.to_period("M")
+
+    codes, uniques = pd.factorize(values)
+    lookup = np.array([_month_ordinal(u) for u in uniques] + [_NAT], dtype=np.int64)
+    ords = lookup[codes]  # code -1 (missing) picks the trailing NaT
+    return pd.Series(pd.PeriodIndex.from_ordinals(ords, freq="M"), index=values.index, name=values.name)
+
 def normalize_month_column(df: pd.DataFrame, col: str = "month") -> pd.DataFrame:
-    df = df.copy()
-    df[col] = df[col].map(parse_month_to_period)
+    if df[col].dtype == MONTH_DTYPE:
+        return df  # already normalized (e.g. fx passed through _project_usd again)
+    df = df.copy(deep=False)
+    df[col] = to_month_periods(df[col])
     return df
 
 # --- Safe math / formatting -------------------------------------------------
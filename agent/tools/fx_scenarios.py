@@ -0,0 +1,205 @@
+# agent/tools/fx_scenarios.py
+from __future__ import annotations
+import weakref
+from dataclasses import dataclass
+from typing import Any, Dict, Mapping, Optional, Sequence, Tuple, Union
+import numpy as np
+import pandas as pd
+
+from .data_loader import FxRates, _fx_rate_matrix
+from .finance_utils import to_month_periods
+from .kpi_cube import account_group, GROUPS, REVENUE, COGS, OPEX, OTHER
+
+# FX what-ifs without reloading the workbook. The P&L frames keep every row's
+# local amount and currency (amount_local, currency), which fold once into a
+# month × currency × account-group cube of local totals. Reprojecting to USD
+# under S rate tables is then one contraction over that small cube,
+#
+#   usd[s, g] = sum over months m, currencies c of rate[s, m, c] * local[m, c, g]
+#
+# so 20 scenarios cost about as much as one pass over the ledger.
+#
+# A rate table is a DataFrame like the fx sheet (month, currency, rate_to_usd),
+# a (currency, rate_to_usd) frame or {currency: rate} dict applied to every
+# month, or anything those produce (shifted_rates, constant_rates). Pairs a
+# table leaves out keep the loaded rates.
+
+RateTable = Union[pd.DataFrame, Mapping[str, float]]
+REPORTED = "reported"
+CC_LINES = ("revenue", "ebitda")
+
+@dataclass(frozen=True)
+class LocalCube:
+    """Local-currency totals of a P&L frame per (month, currency, account group)."""
+    base_ordinal: int
+    currencies: pd.Index
+    values: np.ndarray  # (months, currencies, groups)
+
+    def span(self, start: pd.Period, end: pd.Period) -> Tuple[int, int]:
+        """Cube rows [lo, hi) of start..end (inclusive), clipped to the month axis."""
+        n = len(self.values)
+        lo = min(max(start.ordinal - self.base_ordinal, 0), n)
+        hi = min(max(end.ordinal - self.base_ordinal + 1, lo), n)
+        return lo, hi
+
+def build_local_cube(df: pd.DataFrame) -> LocalCube:
+    """Fold a P&L frame's amount_local into a LocalCube in one bincount."""
+    if not {"amount_local", "currency"}.issubset(df.columns):
+        raise ValueError("P&L frame has no amount_local/currency columns; reload it with load_finance_data")
+    ords = pd.PeriodIndex(df["month"], freq="M").asi8
+    account = df["account_category"].astype("category")
+    line = account.cat.codes.to_numpy()
+    valid = (ords != np.iinfo(np.int64).min) & (line >= 0)
+    base = int(ords[valid].min()) if valid.any() else 0
+    n_months = int(ords[valid].max()) - base + 1 if valid.any() else 0
+
+    currency = df["currency"].astype("category")
+    cur = currency.cat.codes.to_numpy()
+    group = np.array([account_group(c) for c in account.cat.categories] + [OTHER], dtype=np.int64)[line]
+    keep = valid & (cur >= 0)
+    n_cur, n_groups = len(currency.cat.categories), len(GROUPS)
+    flat = ((ords[keep] - base) * n_cur + cur[keep]) * n_groups + group[keep]
+    amount = np.nan_to_num(df["amount_local"].to_numpy(dtype=float, na_value=np.nan))
+    values = np.bincount(flat, weights=amount[keep], minlength=n_months * n_cur * n_groups)
+    return LocalCube(base_ordinal=base, currencies=pd.Index(currency.cat.categories.astype(str)),
+                     values=values.reshape(n_months, n_cur, n_groups))
+
+# Frames are immutable once loaded (the loaders make their arrays read-only):
+# cubes are keyed on frame identity, as in kpi_cube.py.
+_CUBES: Dict[int, Tuple[weakref.ref, LocalCube]] = {}
+
+def local_cube(df: pd.DataFrame) -> LocalCube:
+    """Return the LocalCube for `df`, building it on first use."""
+    key = id(df)
+    hit = _CUBES.get(key)
+    if hit is not None and hit[0]() is df:
+        return hit[1]
+    cube = build_local_cube(df)
+    _CUBES[key] = (weakref.ref(df, lambda _ref, k=key: _CUBES.pop(k, None)), cube)
+    return cube
+
+# ---------- rate tables ----------
+
+def shifted_rates(fx: pd.DataFrame, pct: float, currencies: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """
+    `fx` with rate_to_usd scaled by (1 + pct) for `currencies` (default: all but
+    USD), e.g. pct=0.1 for a 10% stronger local currency against the dollar.
+    """
+    cur = fx["currency"].astype(str).str.upper()
+    hit = cur.isin([c.upper() for c in currencies]) if currencies is not None else cur != "USD"
+    return pd.DataFrame({
+        "month": fx["month"],
+        "currency": cur,
+        "rate_to_usd": fx["rate_to_usd"].astype(float).where(~hit, fx["rate_to_usd"].astype(float) * (1 + pct)),
+    })
+
+def constant_rates(fx: pd.DataFrame, start, end=None) -> pd.DataFrame:
+    """
+    One rate per currency for every month: the average rate over start..end
+    (default: just `start`), e.g. prior-year average rates for constant currency.
+    """
+    months = to_month_periods(fx["month"])
+    start = pd.Period(start, freq="M")
+    end = start if end is None else pd.Period(end, freq="M")
+    sel = ((months >= start) & (months <= end)).to_numpy()
+    if not sel.any():
+        raise ValueError(f"no FX rates between {start} and {end}")
+    avg = (fx.loc[sel, "rate_to_usd"].astype(float)
+             .groupby(fx.loc[sel, "currency"].astype(str).str.upper().to_numpy()).mean())
+    return pd.DataFrame({"currency": avg.index, "rate_to_usd": avg.to_numpy()})
+
+def _parse_table(table: RateTable) -> Union[FxRates, pd.Series]:
+    """FxRates for a monthly table, a rate Series by currency code for a flat one."""
+    if isinstance(table, Mapping):
+        table = pd.DataFrame({"currency": list(table), "rate_to_usd": list(table.values())})
+    if "month" in table.columns:
+        return _fx_rate_matrix(table)
+    cur = table["currency"].astype(str).str.upper()
+    if cur.duplicated().any():
+        raise ValueError(f"Duplicate rate_to_usd for currencies: {sorted(set(cur[cur.duplicated()]))}")
+    return pd.Series(table["rate_to_usd"].to_numpy(dtype=float), index=cur.to_numpy())
+
+def _rate_grid(rates: Union[FxRates, pd.Series], cube: LocalCube) -> np.ndarray:
+    """(months, currencies) rates on the cube's axes; NaN where the table has none."""
+    n_months, n_cur = len(cube.values), len(cube.currencies)
+    if isinstance(rates, pd.Series):
+        return np.broadcast_to(rates.reindex(cube.currencies).to_numpy(), (n_months, n_cur))
+    m = np.arange(n_months) + cube.base_ordinal
+    c = rates.currency_codes(cube.currencies)
+    return rates.gather(np.repeat(m, n_cur), np.tile(c, n_months)).reshape(n_months, n_cur)
+
+def _rate_stack(tables: Sequence[Union[FxRates, pd.Series]], cube: LocalCube) -> np.ndarray:
+    """(scenarios, months, currencies); pairs a table leaves out fall back to tables[0]."""
+    fallback = _rate_grid(tables[0], cube)
+    out = np.empty((len(tables),) + fallback.shape)
+    for i, table in enumerate(tables):
+        grid = _rate_grid(table, cube)
+        out[i] = np.where(np.isnan(grid), fallback, grid)
+    return np.nan_to_num(out)  # pairs without any rate hold no amounts
+
+def _project(cube: LocalCube, stack: np.ndarray, start: pd.Period, end: pd.Period) -> np.ndarray:
+    """(scenarios, groups) USD totals over start..end."""
+    lo, hi = cube.span(start, end)
+    return np.einsum("smc,mcg->sg", stack[:, lo:hi], cube.values[lo:hi], optimize=True)
+
+# ---------- scenario API ----------
+
+def fx_scenarios(
+    data: Dict[str, Any],
+    scenarios: Union[Mapping[str, RateTable], Sequence[RateTable]],
+    start=None,
+    end=None,
+) -> Dict[str, Any]:
+    """
+    Reproject actuals and budget over start..end (default: every actuals month)
+    under each rate table in `scenarios` (a {name: table} mapping or a list,
+    named "scenario 1", ...). The loaded rates come first as "reported".
+
+    Returns start, end and two frames:
+      - scenarios: per scenario revenue_usd, cogs_usd, opex_usd, gm_pct,
+        ebitda_usd and the budget's revenue and EBITDA at the same rates
+        (budget_revenue_usd, budget_ebitda_usd).
+      - constant_currency: per (scenario, line in revenue/ebitda), reported
+        actual vs the budget restated at the scenario's rates, split into
+        operational_usd (both at the scenario's rates) and fx_effect_usd
+        (reported actual minus actual at the scenario's rates).
+    """
+    if not isinstance(scenarios, Mapping):
+        scenarios = {f"scenario {i + 1}": t for i, t in enumerate(scenarios)}
+    names = [REPORTED] + [str(n) for n in scenarios]
+    if len(set(names)) != len(names):
+        raise ValueError(f"scenario names must be unique and not {REPORTED!r}")
+    tables = [_parse_table(t) for t in [data["fx"], *scenarios.values()]]
+
+    act_cube, bud_cube = local_cube(data["actuals_usd"]), local_cube(data["budget_usd"])
+    first, last = act_cube.base_ordinal, act_cube.base_ordinal + max(len(act_cube.values) - 1, 0)
+    start = pd.Period(ordinal=first, freq="M") if start is None else pd.Period(start, freq="M")
+    end = pd.Period(ordinal=last, freq="M") if end is None else pd.Period(end, freq="M")
+
+    act = _project(act_cube, _rate_stack(tables, act_cube), start, end)
+    bud = _project(bud_cube, _rate_stack(tables, bud_cube), start, end)
+
+    rev, cogs, opex = act[:, REVENUE], act[:, COGS], act[:, OPEX]
+    ebitda = rev - cogs - opex
+    bud_ebitda = bud[:, REVENUE] - bud[:, COGS] - bud[:, OPEX]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        gm = np.where(rev != 0, (rev - cogs) / rev, np.nan)
+    index = pd.Index(names, name="scenario")
+    summary = pd.DataFrame({
+        "revenue_usd": rev, "cogs_usd": cogs, "opex_usd": opex, "gm_pct": gm, "ebitda_usd": ebitda,
+        "budget_revenue_usd": bud[:, REVENUE], "budget_ebitda_usd": bud_ebitda,
+    }, index=index)
+
+    # (scenarios, lines): actual at scenario rates, budget at scenario rates
+    actual_cc = np.stack([rev, ebitda], axis=1)
+    budget_cc = np.stack([bud[:, REVENUE], bud_ebitda], axis=1)
+    reported = np.broadcast_to(actual_cc[0], actual_cc.shape)
+    cc = pd.DataFrame({
+        "actual_usd": reported.ravel(),
+        "actual_cc_usd": actual_cc.ravel(),
+        "budget_cc_usd": budget_cc.ravel(),
+        "variance_usd": (reported - budget_cc).ravel(),
+        "operational_usd": (actual_cc - budget_cc).ravel(),
+        "fx_effect_usd": (reported - actual_cc).ravel(),
+    }, index=pd.MultiIndex.from_product([names, list(CC_LINES)], names=["scenario", "line"]))
+    return {"start": start, "end": end, "scenarios": summary, "constant_currency": cc}
@@ -0,0 +1,349 @@
+# agent/tools/kpi_cube.py
+from __future__ import annotations
+import weakref
+from dataclasses import dataclass
+from functools import cached_property
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+import numpy as np
+import pandas as pd
+
+# ---------- account groups ----------
+
+GROUPS = ("revenue", "cogs", "opex", "other")
+REVENUE, COGS, OPEX, OTHER = range(len(GROUPS))
+OPEX_PREFIX = "Opex:"
+
+def account_group(category: Any) -> int:
+    """Map an account_category label to its index in GROUPS."""
+    if category == "Revenue":
+        return REVENUE
+    if category == "COGS":
+        return COGS
+    if isinstance(category, str) and category.startswith(OPEX_PREFIX):
+        return OPEX
+    return OTHER
+
+# ---------- cube ----------
+
+@dataclass(frozen=True)
+class KpiCube:
+    """
+    Dense month × entity × account_category aggregate of a USD P&L frame.
+
+    The month axis is contiguous (one slot per calendar month from the first
+    to the last month in the frame), so a month lookup is an ordinal offset.
+    """
+    base_ordinal: int
+    months: pd.PeriodIndex
+    entities: pd.Index
+    categories: pd.Index
+    line_group: np.ndarray      # (lines,) index into GROUPS
+    values: np.ndarray          # (months, entities, lines) amount_usd
+    line_totals: np.ndarray     # (months, lines) summed over entities
+    line_counts: np.ndarray     # (months, lines) source row counts
+    group_totals: np.ndarray    # (months, groups) summed over entities
+    month_present: np.ndarray   # (months,) month has at least one row
+    n_rows: int
+
+    def month_index(self, month: pd.Period) -> Optional[int]:
+        if not isinstance(month, pd.Period):
+            month = pd.Period(month, freq="M")
+        i = month.asfreq("M").ordinal - self.base_ordinal
+        return i if 0 <= i < len(self.months) else None
+
+    def present_months(self) -> pd.PeriodIndex:
+        return self.months[self.month_present]
+
+    def group_total(self, group: int, month: Optional[pd.Period] = None) -> float:
+        if month is None:
+            return float(self.group_totals[:, group].sum())
+        i = self.month_index(month)
+        return 0.0 if i is None else float(self.group_totals[i, group])
+
+    def _positions(self, months) -> Tuple[np.ndarray, np.ndarray]:
+        """Cube rows of `months` and which of them fall on the month axis."""
+        idx = pd.PeriodIndex(list(months), freq="M").asi8 - self.base_ordinal
+        return idx, (idx >= 0) & (idx < len(self.months))
+
+    def group_matrix(self, months) -> np.ndarray:
+        """(len(months), groups) totals; months off the cube axis read as zero."""
+        idx, ok = self._positions(months)
+        out = np.zeros((len(idx), len(GROUPS)))
+        out[ok] = self.group_totals[idx[ok]]
+        return out
+
+    def opex_breakdown(self, month: pd.Period) -> pd.Series:
+        """Opex by category (label after 'Opex:') for a month, largest first."""
+        i = self.month_index(month)
+        if i is None:
+            return self._opex_series(np.zeros(len(self.categories)), np.zeros(len(self.categories), dtype=np.int64))
+        return self._opex_series(self.line_totals[i], self.line_counts[i])
+
+    def opex_breakdowns(self, months) -> List[pd.Series]:
+        """opex_breakdown for many months with one gather over the cube."""
+        idx, ok = self._positions(months)
+        totals = np.zeros((len(idx), len(self.categories)))
+        counts = np.zeros((len(idx), len(self.categories)), dtype=np.int64)
+        totals[ok], counts[ok] = self.line_totals[idx[ok]], self.line_counts[idx[ok]]
+        return [self._opex_series(t, c) for t, c in zip(totals, counts)]
+
+    def entity_totals(self, months) -> "LineTotals":
+        """Entity × account line amounts summed over `months` (distinct months, read once)."""
+        idx, ok = self._positions(dict.fromkeys(months))
+        idx = np.sort(idx[ok])
+        if len(idx) > 2 and idx[-1] - idx[0] == len(idx) - 1:  # a run of months: two rows of the running totals
+            return self.range_entity_totals(self.months[idx[0]], self.months[idx[-1]])
+        return _line_totals(self.entities.rename("entity"), self.categories, self.values[idx].sum(axis=0),
+                            self.line_counts[idx].sum(axis=0))
+
+    # ---------- month ranges: O(1) differences of running totals ----------
+    # Row i of a *_cumsum array is the sum over cube months [0, i), so the
+    # total over months [lo, hi) is cumsum[hi] - cumsum[lo] whatever the span.
+    # Built on first range query; the entity one is the size of `values`.
+
+    @cached_property
+    def group_cumsum(self) -> np.ndarray:
+        return _running(self.group_totals)
+
+    @cached_property
+    def line_cumsum(self) -> np.ndarray:
+        return _running(self.line_totals)
+
+    @cached_property
+    def count_cumsum(self) -> np.ndarray:
+        return _running(self.line_counts)
+
+    @cached_property
+    def present_cumsum(self) -> np.ndarray:
+        return _running(self.month_present.astype(np.int64))
+
+    @cached_property
+    def entity_cumsum(self) -> np.ndarray:
+        return _running(self.values)
+
+    def span(self, start: pd.Period, end: pd.Period) -> Tuple[int, int]:
+        """Cube rows [lo, hi) of the months start..end (inclusive), clipped to the month axis."""
+        n = len(self.months)
+        lo = min(max(start.asfreq("M").ordinal - self.base_ordinal, 0), n)
+        hi = min(max(end.asfreq("M").ordinal - self.base_ordinal + 1, lo), n)
+        return lo, hi
+
+    def range_groups(self, start: pd.Period, end: pd.Period) -> np.ndarray:
+        """(groups,) totals over start..end."""
+        lo, hi = self.span(start, end)
+        return self.group_cumsum[hi] - self.group_cumsum[lo]
+
+    def range_months(self, start: pd.Period, end: pd.Period) -> int:
+        """How many months in start..end have rows."""
+        lo, hi = self.span(start, end)
+        return int(self.present_cumsum[hi] - self.present_cumsum[lo])
+
+    def range_opex(self, start: pd.Period, end: pd.Period) -> pd.Series:
+        """opex_breakdown summed over start..end."""
+        lo, hi = self.span(start, end)
+        return self._opex_series(self.line_cumsum[hi] - self.line_cumsum[lo],
+                                 self.count_cumsum[hi] - self.count_cumsum[lo])
+
+    def range_entity_totals(self, start: pd.Period, end: pd.Period) -> "LineTotals":
+        """entity_totals over start..end."""
+        lo, hi = self.span(start, end)
+        return _line_totals(self.entities.rename("entity"), self.categories,
+                            self.entity_cumsum[hi] - self.entity_cumsum[lo],
+                            self.count_cumsum[hi] - self.count_cumsum[lo])
+
+    def _opex_series(self, totals: np.ndarray, counts: np.ndarray) -> pd.Series:
+        mask = (self.line_group == OPEX) & (counts > 0)
+        labels = [str(c)[len(OPEX_PREFIX):] for c in self.categories[mask]]
+        s = pd.Series(totals[mask], index=pd.Index(labels, dtype=object, name="category"),
+                      name="amount_usd", dtype=float)
+        return s.sort_index().sort_values(ascending=False)
+
+    def replace_months(self, delta: "KpiCube", month_ordinals, n_rows: int) -> "KpiCube":
+        """
+        Cube with the slices for `month_ordinals` replaced by `delta` (a cube
+        built from just those months' rows). Costs O(cube size), independent
+        of how many ledger rows the untouched months hold.
+        """
+        drop = np.asarray(list(month_ordinals), dtype=np.int64)
+        spans = [(self.base_ordinal, len(self.months)), (delta.base_ordinal, len(delta.months))]
+        spans = [(b, n) for b, n in spans if n]
+        lo = min((b for b, _ in spans), default=0)
+        hi = max((b + n for b, n in spans), default=0)
+        entities = self.entities.union(delta.entities)
+        categories = self.categories.union(delta.categories)
+        shape = (hi - lo, len(entities), len(categories))
+
+        def axes(cube: KpiCube):
+            return (np.arange(len(cube.months)) + cube.base_ordinal - lo,
+                    entities.get_indexer(cube.entities), categories.get_indexer(cube.categories))
+
+        values = np.zeros(shape)
+        line_counts = np.zeros((shape[0], shape[2]), dtype=np.int64)
+        month_present = np.zeros(shape[0], dtype=bool)
+        if len(self.months):
+            m, e, c = axes(self)
+            values[np.ix_(m, e, c)] = self.values
+            line_counts[np.ix_(m, c)] = self.line_counts
+            month_present[m] = self.month_present
+        cleared = drop[(drop >= lo) & (drop < hi)] - lo
+        values[cleared], line_counts[cleared], month_present[cleared] = 0.0, 0, False
+        if len(delta.months):
+            m, e, c = axes(delta)
+            values[np.ix_(m, e, c)] += delta.values
+            line_counts[np.ix_(m, c)] += delta.line_counts
+            month_present[m] |= delta.month_present
+        return _assemble(lo, entities, categories, values, line_counts, month_present, n_rows)
+
+def _running(a: np.ndarray) -> np.ndarray:
+    """Running totals along the month axis with a leading zero row."""
+    out = np.zeros((len(a) + 1,) + a.shape[1:], dtype=a.dtype)
+    np.cumsum(a, axis=0, out=out[1:])
+    return out
+
+# ---------- drill-down totals ----------
+
+@dataclass(frozen=True)
+class LineTotals:
+    """
+    Amounts per group key × account line over a set of months, e.g. one row per
+    entity. Keys with no amounts in those months are left out.
+    """
+    keys: pd.Index              # MultiIndex when grouped by several columns
+    categories: pd.Index
+    line_group: np.ndarray      # (lines,) index into GROUPS
+    values: np.ndarray          # (keys, lines) amount_usd
+    counts: np.ndarray          # (lines,) source row counts over all keys
+
+    def groups(self) -> pd.DataFrame:
+        """keys × GROUPS ("revenue", "cogs", "opex", "other") totals."""
+        onehot = np.zeros((len(self.categories), len(GROUPS)))
+        onehot[np.arange(len(self.categories)), self.line_group] = 1.0
+        return pd.DataFrame(self.values @ onehot, index=self.keys, columns=list(GROUPS))
+
+    def opex(self) -> pd.DataFrame:
+        """keys × opex category (label after 'Opex:'), columns largest total first."""
+        mask = (self.line_group == OPEX) & (self.counts > 0)
+        labels = pd.Index([str(c)[len(OPEX_PREFIX):] for c in self.categories[mask]], dtype=object, name="category")
+        out = pd.DataFrame(self.values[:, mask], index=self.keys, columns=labels)
+        return out[out.sum().sort_index().sort_values(ascending=False, kind="stable").index]
+
+def _line_totals(keys: pd.Index, categories: pd.Index, values: np.ndarray, counts: np.ndarray) -> LineTotals:
+    present = (values != 0).any(axis=1)
+    return LineTotals(keys=keys[present], categories=categories,
+                      line_group=np.array([account_group(c) for c in categories], dtype=np.int8),
+                      values=values[present], counts=counts)
+
+def totals_by(df: pd.DataFrame, months, by: Union[str, Sequence[str]] = "entity") -> LineTotals:
+    """
+    Account line totals of `df` per value of the `by` column(s) over `months`.
+    By entity this is a slice of the frame's KpiCube; any other columns are
+    aggregated in one groupby over the months' rows.
+    """
+    by = [by] if isinstance(by, str) else list(by)
+    if by == ["entity"]:
+        return kpi_cube(df).entity_totals(months)
+    want = pd.PeriodIndex(list(months), freq="M").asi8
+    rows = df[np.isin(pd.PeriodIndex(df["month"], freq="M").asi8, want) & df["account_category"].notna().to_numpy()]
+    keys = [rows[c] for c in by] + [rows["account_category"].rename("_line")]  # by may name account_category too
+    sums = (rows["amount_usd"].groupby(keys, observed=True, dropna=False, sort=True).sum()
+                .unstack("_line", fill_value=0.0))
+    counts = rows["account_category"].value_counts()
+    categories = pd.Index(np.asarray(sums.columns))
+    return _line_totals(sums.index, categories, sums.to_numpy(dtype=float),
+                        counts.reindex(sums.columns, fill_value=0).to_numpy())
+
+def build_kpi_cube(df: pd.DataFrame) -> KpiCube:
+    """
+    Aggregate a USD P&L frame (month, entity, account_category, amount_usd)
+    into a KpiCube in one pass. Rows without a month or account_category are
+    counted for month presence only, matching the mask-based sums.
+    """
+    n = len(df)
+    ords = pd.PeriodIndex(df["month"], freq="M").asi8 if n else np.zeros(0, dtype=np.int64)
+    valid = ords != np.iinfo(np.int64).min
+    base = int(ords[valid].min()) if valid.any() else 0
+    n_months = int(ords[valid].max()) - base + 1 if valid.any() else 0
+    m_idx = ords - base
+
+    cat_codes, categories = pd.factorize(df["account_category"], sort=True)
+    ent_codes, entities = pd.factorize(df["entity"], sort=True, use_na_sentinel=False)
+    amount = np.nan_to_num(df["amount_usd"].to_numpy(dtype=float, na_value=np.nan))
+
+    n_ent, n_lines = len(entities), len(categories)
+    keep = valid & (cat_codes >= 0)
+    flat = (m_idx[keep] * n_ent + ent_codes[keep]) * n_lines + cat_codes[keep]
+    values = np.bincount(flat, weights=amount[keep],
+                         minlength=n_months * n_ent * n_lines).reshape(n_months, n_ent, n_lines)
+    line_counts = np.bincount(m_idx[keep] * n_lines + cat_codes[keep],
+                              minlength=n_months * n_lines).reshape(n_months, n_lines)
+    month_present = np.bincount(m_idx[valid], minlength=n_months) > 0
+    return _assemble(base, pd.Index(np.asarray(entities)), pd.Index(np.asarray(categories)),
+                     values, line_counts, month_present, n)
+
+def _assemble(base: int, entities: pd.Index, categories: pd.Index, values: np.ndarray,
+              line_counts: np.ndarray, month_present: np.ndarray, n_rows: int) -> KpiCube:
+    n_lines = len(categories)
+    line_group = np.array([account_group(c) for c in categories], dtype=np.int8)
+    onehot = np.zeros((n_lines, len(GROUPS)))
+    onehot[np.arange(n_lines), line_group] = 1.0
+    line_totals = values.sum(axis=1)
+    group_totals = line_totals @ onehot
+
+    return KpiCube(
+        base_ordinal=base,
+        months=pd.period_range(pd.Period(ordinal=base, freq="M"), periods=len(values), freq="M"),
+        entities=entities,
+        categories=categories,
+        line_group=line_group,
+        values=values,
+        line_totals=line_totals,
+        line_counts=line_counts,
+        group_totals=group_totals,
+        month_present=month_present,
+        n_rows=n_rows,
+    )
+
+# ---------- per-frame registry ----------
+
+# Frames are immutable once loaded: cubes are keyed on frame identity (checked
+# only against the row count) and dropped when the frame is garbage collected,
+# so an in-place edit would leave every metric reading a stale cube. The
+# loaders (load_finance_data, refresh_finance_data, shared_data.attach) hand
+# out frames over read-only arrays, so such edits raise; to change a frame,
+# build a new one (df.assign(...), df.copy()) and it gets its own cube.
+_CUBES: Dict[int, Tuple[weakref.ref, KpiCube]] = {}
+
+def _read_only(arr: np.ndarray) -> np.ndarray:
+    view = arr.view()
+    view.flags.writeable = False
+    return view
+
+def read_only_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """`df` over read-only views of its column arrays: in-place writes raise instead of going stale."""
+    cols: Dict[Any, Any] = {}
+    for name in df.columns:
+        s = df[name]
+        if isinstance(s.dtype, pd.PeriodDtype):
+            cols[name] = pd.arrays.PeriodArray(_read_only(s.array.asi8), dtype=s.dtype)
+        elif isinstance(s.dtype, pd.CategoricalDtype):
+            cols[name] = pd.Categorical.from_codes(_read_only(s.cat.codes.to_numpy()), dtype=s.dtype,
+                                                   validate=False)
+        elif s.dtype.kind in "biuf":
+            cols[name] = _read_only(s.to_numpy())
+        else:
+            cols[name] = s
+    return pd.DataFrame(cols, index=df.index, copy=False)
+
+def kpi_cube(df: pd.DataFrame) -> KpiCube:
+    """Return the cube for `df`, building and registering it on first use."""
+    key = id(df)
+    hit = _CUBES.get(key)
+    if hit is not None and hit[0]() is df and hit[1].n_rows == len(df):
+        return hit[1]
+    return register_cube(df, build_kpi_cube(df))
+
+def register_cube(df: pd.DataFrame, cube: KpiCube) -> KpiCube:
+    """Attach an already-built cube to `df` (e.g. one updated incrementally)."""
+    key = id(df)
+    _CUBES[key] = (weakref.ref(df, lambda _ref, k=key: _CUBES.pop(k, None)), cube)
+    return cube
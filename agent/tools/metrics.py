@@ -1,51 +1,32 @@
 # agent/tools/metrics.py
 from __future__ import annotations
+import numpy as np
 import pandas as pd
-from typing import Literal, Tuple, Dict, Any, Optional
+from typing import Literal, Tuple, Dict, Any, Optional, Sequence, Union
 from .finance_utils import safe_pct
+from .kpi_cube import kpi_cube, totals_by, GROUPS, REVENUE, COGS, OPEX
+
+Dims = Union[str, Sequence[str]]  # column(s) to drill down by, e.g. "entity"
 
 # ---------- helpers to aggregate P&L by account groups ----------
+# All reads go through the frame's KpiCube (built once per frame, see kpi_cube.py).
 
 def _sum_revenue(df: pd.DataFrame, month: Optional[pd.Period] = None) -> float:
-    q = df[df["account_category"] == "Revenue"]
-    if month is not None:
-        q = q[q["month"] == month]
-    return float(q["amount_usd"].sum())
+    return kpi_cube(df).group_total(REVENUE, month)
 
 def _sum_cogs(df: pd.DataFrame, month: Optional[pd.Period] = None) -> float:
-    q = df[df["account_category"] == "COGS"]
-    if month is not None:
-        q = q[q["month"] == month]
-    return float(q["amount_usd"].sum())
+    return kpi_cube(df).group_total(COGS, month)
 
 def _sum_opex(df: pd.DataFrame, month: Optional[pd.Period] = None) -> float:
-    q = df[df["account_category"].str.startswith("Opex:", na=False)]
-    if month is not None:
-        q = q[q["month"] == month]
-    return float(q["amount_usd"].sum())
+    return kpi_cube(df).group_total(OPEX, month)
 
 def _opex_breakdown(df: pd.DataFrame, month: pd.Period) -> pd.Series:
-    q = df[
-        (df["month"] == month) &
-        (df["account_category"].str.startswith("Opex:", na=False))
-    ].copy()
     # category = substring after "Opex:"
-    q["category"] = q["account_category"].str.split(":", n=1).str[1].fillna("Other")
-    s = q.groupby("category")["amount_usd"].sum().sort_values(ascending=False)
-    return s
+    return kpi_cube(df).opex_breakdown(month)
 
 # ---------- metric APIs (called by planner/agent) ----------
 
-def revenue_vs_budget(
-    actuals_usd: pd.DataFrame,
-    budget_usd: pd.DataFrame,
-    month: pd.Period,
-) -> Dict[str, Any]:
-    """
-    Returns revenue actual vs budget for a month in USD, plus variance.
-    """
-    actual = _sum_revenue(actuals_usd, month)
-    budget = _sum_revenue(budget_usd, month)
+def _revenue_variance(month: pd.Period, actual: float, budget: float) -> Dict[str, Any]:
     variance = actual - budget
     variance_pct = safe_pct(variance, budget)  # None if budget==0
     return {
@@ -56,6 +37,37 @@ def revenue_vs_budget(
         "variance_pct": variance_pct,
     }
 
+def revenue_vs_budget(
+    actuals_usd: pd.DataFrame,
+    budget_usd: pd.DataFrame,
+    month: pd.Period,
+) -> Dict[str, Any]:
+    """
+    Returns revenue actual vs budget for a month in USD, plus variance.
+    """
+    return _revenue_variance(month, _sum_revenue(actuals_usd, month), _sum_revenue(budget_usd, month))
+
+def revenue_vs_budget_many(
+    actuals_usd: pd.DataFrame,
+    budget_usd: pd.DataFrame,
+    months: list[pd.Period],
+) -> list[Dict[str, Any]]:
+    """revenue_vs_budget for several months from one read of each cube."""
+    months = list(months)
+    actual = kpi_cube(actuals_usd).group_matrix(months)[:, REVENUE]
+    budget = kpi_cube(budget_usd).group_matrix(months)[:, REVENUE]
+    return [_revenue_variance(m, float(a), float(b)) for m, a, b in zip(months, actual, budget)]
+
+def _gm_pct(actuals_usd: pd.DataFrame, months: list[pd.Period]) -> list[Optional[float]]:
+    g = kpi_cube(actuals_usd).group_matrix(months)
+    rev, cogs = g[:, REVENUE], g[:, COGS]
+    has_rev = rev != 0
+    gm = np.divide(rev - cogs, rev, out=np.zeros_like(rev), where=has_rev)
+    return [float(v) if ok else None for v, ok in zip(gm, has_rev)]
+
+def _gm_frame(months: list[pd.Period], gm_pct: list[Optional[float]]) -> pd.DataFrame:
+    return pd.DataFrame({"month": months, "gm_pct": gm_pct}, columns=["month", "gm_pct"])
+
 def gross_margin_pct_trend(
     actuals_usd: pd.DataFrame,
     months: list[pd.Period],
@@ -64,13 +76,18 @@ def gross_margin_pct_trend(
     For each month, GM% = (Revenue - COGS) / Revenue (None if revenue==0).
     Returns a DataFrame with columns: month, gm_pct
     """
-    rows = []
-    for m in months:
-        rev = _sum_revenue(actuals_usd, m)
-        cogs = _sum_cogs(actuals_usd, m)
-        gm_pct = safe_pct(rev - cogs, rev)
-        rows.append({"month": m, "gm_pct": gm_pct})
-    return pd.DataFrame(rows)
+    months = list(months)
+    return _gm_frame(months, _gm_pct(actuals_usd, months))
+
+def gross_margin_pct_trends(
+    actuals_usd: pd.DataFrame,
+    windows: list[list[pd.Period]],
+) -> list[pd.DataFrame]:
+    """gross_margin_pct_trend for several month lists from one read of the cube."""
+    windows = [list(w) for w in windows]
+    union = list(dict.fromkeys(m for w in windows for m in w))
+    gm = dict(zip(union, _gm_pct(actuals_usd, union)))
+    return [_gm_frame(w, [gm[m] for m in w]) for w in windows]
 
 def opex_breakdown_by_category(
     actuals_usd: pd.DataFrame,
@@ -81,6 +98,13 @@ def opex_breakdown_by_category(
     """
     return _opex_breakdown(actuals_usd, month)
 
+def opex_breakdowns_by_category(
+    actuals_usd: pd.DataFrame,
+    months: list[pd.Period],
+) -> list[pd.Series]:
+    """opex_breakdown_by_category for several months."""
+    return kpi_cube(actuals_usd).opex_breakdowns(months)
+
 def ebitda_value(
     actuals_usd: pd.DataFrame,
     month: pd.Period,
@@ -93,6 +117,157 @@ def ebitda_value(
     opex = _sum_opex(actuals_usd, month)
     return rev - cogs - opex
 
+# ---------- drill-downs (one row per entity, or per combination of `by` columns) ----------
+# Every group comes out of one pass: a slice of the KpiCube when drilling down
+# by entity, one groupby otherwise (see kpi_cube.totals_by). Groups with no
+# amounts in the month(s) are omitted; ratios are NaN where undefined.
+# `month` may also be a list of months (e.g. a quarter), summed together.
+
+Months = Union[pd.Period, Sequence[pd.Period]]
+
+def _ratio(num: pd.Series, den: pd.Series) -> pd.Series:
+    return num.div(den.where(den != 0))
+
+def _months(month: Months) -> list:
+    return [month] if isinstance(month, pd.Period) else list(month)
+
+def revenue_vs_budget_by(
+    actuals_usd: pd.DataFrame,
+    budget_usd: pd.DataFrame,
+    month: Months,
+    by: Dims = "entity",
+) -> pd.DataFrame:
+    """
+    revenue_vs_budget per group. Returns a DataFrame indexed by the `by` key(s)
+    with columns revenue_actual_usd, revenue_budget_usd, variance_usd, variance_pct.
+    """
+    actual = totals_by(actuals_usd, _months(month), by).groups()["revenue"]
+    budget = totals_by(budget_usd, _months(month), by).groups()["revenue"]
+    keys = actual.index.union(budget.index)
+    actual, budget = actual.reindex(keys, fill_value=0.0), budget.reindex(keys, fill_value=0.0)
+    variance = actual - budget
+    return pd.DataFrame({
+        "revenue_actual_usd": actual,
+        "revenue_budget_usd": budget,
+        "variance_usd": variance,
+        "variance_pct": _ratio(variance, budget),
+    })
+
+def gross_margin_pct_by(
+    actuals_usd: pd.DataFrame,
+    months: list[pd.Period],
+    by: Dims = "entity",
+) -> pd.DataFrame:
+    """
+    GM% per group over `months` combined. Returns a DataFrame indexed by the
+    `by` key(s) with columns revenue_usd, cogs_usd, gm_pct.
+    """
+    g = totals_by(actuals_usd, months, by).groups()
+    return pd.DataFrame({
+        "revenue_usd": g["revenue"],
+        "cogs_usd": g["cogs"],
+        "gm_pct": _ratio(g["revenue"] - g["cogs"], g["revenue"]),
+    })
+
+def opex_breakdown_by(
+    actuals_usd: pd.DataFrame,
+    month: Months,
+    by: Dims = "entity",
+) -> pd.DataFrame:
+    """
+    Opex per group and category for a month: rows are the `by` key(s),
+    columns the opex categories (largest total first), values amount_usd.
+    """
+    return totals_by(actuals_usd, _months(month), by).opex()
+
+def ebitda_by(
+    actuals_usd: pd.DataFrame,
+    month: Months,
+    by: Dims = "entity",
+) -> pd.Series:
+    """
+    ebitda_value per group: Series indexed by the `by` key(s), named ebitda_usd.
+    """
+    g = totals_by(actuals_usd, _months(month), by).groups()
+    return (g["revenue"] - g["cogs"] - g["opex"]).rename("ebitda_usd")
+
+# ---------- month ranges (quarters, YTD, arbitrary start..end) ----------
+# Totals over start..end (inclusive) are a difference of two rows of the
+# cube's running totals, so a range costs the same as a single month.
+# Averages are per month with data in the range.
+
+def range_summary(
+    actuals_usd: pd.DataFrame,
+    budget_usd: pd.DataFrame,
+    start: pd.Period,
+    end: pd.Period,
+) -> pd.DataFrame:
+    """
+    P&L over start..end vs budget. Rows revenue, cogs, opex, other, ebitda;
+    columns actual_usd, budget_usd, variance_usd, variance_pct, actual_avg_usd.
+    """
+    a_cube, b_cube = kpi_cube(actuals_usd), kpi_cube(budget_usd)
+    a, b = a_cube.range_groups(start, end), b_cube.range_groups(start, end)
+    index = list(GROUPS) + ["ebitda"]
+    actual = pd.Series(np.append(a, a[REVENUE] - a[COGS] - a[OPEX]), index=index)
+    budget = pd.Series(np.append(b, b[REVENUE] - b[COGS] - b[OPEX]), index=index)
+    n = a_cube.range_months(start, end)
+    return pd.DataFrame({
+        "actual_usd": actual,
+        "budget_usd": budget,
+        "variance_usd": actual - budget,
+        "variance_pct": _ratio(actual - budget, budget),
+        "actual_avg_usd": actual / n if n else np.nan,
+    })
+
+def revenue_vs_budget_range(
+    actuals_usd: pd.DataFrame,
+    budget_usd: pd.DataFrame,
+    start: pd.Period,
+    end: pd.Period,
+) -> Dict[str, Any]:
+    """
+    revenue_vs_budget over start..end: the same keys (month is None) plus
+    start, end, months (with actuals) and revenue_avg_usd per such month.
+    """
+    a_cube = kpi_cube(actuals_usd)
+    actual = float(a_cube.range_groups(start, end)[REVENUE])
+    budget = float(kpi_cube(budget_usd).range_groups(start, end)[REVENUE])
+    n = a_cube.range_months(start, end)
+    out = _revenue_variance(None, actual, budget)
+    out.update(start=start, end=end, months=n, revenue_avg_usd=actual / n if n else None)
+    return out
+
+def gross_margin_pct_range(
+    actuals_usd: pd.DataFrame,
+    start: pd.Period,
+    end: pd.Period,
+) -> Dict[str, Any]:
+    """GM% over start..end combined: start, end, revenue_usd, cogs_usd, gm_pct (None if no revenue)."""
+    g = kpi_cube(actuals_usd).range_groups(start, end)
+    rev, cogs = float(g[REVENUE]), float(g[COGS])
+    return {"start": start, "end": end, "revenue_usd": rev, "cogs_usd": cogs, "gm_pct": safe_pct(rev - cogs, rev)}
+
+def opex_breakdown_range(
+    actuals_usd: pd.DataFrame,
+    start: pd.Period,
+    end: pd.Period,
+) -> pd.Series:
+    """opex_breakdown_by_category summed over start..end."""
+    return kpi_cube(actuals_usd).range_opex(start, end)
+
+def ebitda_range(
+    actuals_usd: pd.DataFrame,
+    start: pd.Period,
+    end: pd.Period,
+) -> Dict[str, Any]:
+    """EBITDA over start..end: start, end, months (with data), ebitda_usd, ebitda_avg_usd."""
+    cube = kpi_cube(actuals_usd)
+    g = cube.range_groups(start, end)
+    value = float(g[REVENUE] - g[COGS] - g[OPEX])
+    n = cube.range_months(start, end)
+    return {"start": start, "end": end, "months": n, "ebitda_usd": value, "ebitda_avg_usd": value / n if n else None}
+
 def cash_runway_months(
     actuals_usd: pd.DataFrame,
     cash_usd: pd.DataFrame,
@@ -106,7 +281,6 @@ def cash_runway_months(
              (i.e., if P&L is positive, burn is 0; else use absolute loss)
     """
     # determine "now"
-    cash_usd = cash_usd.copy()
     if asof is None:
         asof = cash_usd["month"].max()
 
@@ -121,17 +295,16 @@ def cash_runway_months(
     cash_current = float(cur_row.iloc[0]["cash_usd"])
 
     # last N complete months BEFORE asof
-    months_all = sorted(actuals_usd["month"].unique())
-    months_before = [m for m in months_all if m < asof]
+    cube = kpi_cube(actuals_usd)
+    months_all = cube.present_months()
+    months_before = list(months_all[months_all < asof])
     look = months_before[-burn_lookback:] if len(months_before) >= burn_lookback else months_before
 
-    burns = []
-    for m in look:
-        pnl = _sum_revenue(actuals_usd, m) - _sum_cogs(actuals_usd, m) - _sum_opex(actuals_usd, m)
-        burn = 0.0 if pnl >= 0 else (-pnl)
-        burns.append(burn)
+    # burn_i = max(0, -pnl_i), averaged over the lookback window
+    g = cube.group_matrix(look)
+    burns = np.maximum(-(g[:, REVENUE] - g[:, COGS] - g[:, OPEX]), 0.0)
 
-    avg_burn = None if len(burns) == 0 else (sum(burns) / len(burns))
+    avg_burn = None if len(burns) == 0 else float(burns.mean())
     runway = None if (avg_burn is None or avg_burn == 0) else (cash_current / avg_burn)
 
     return {
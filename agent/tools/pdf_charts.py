@@ -0,0 +1,134 @@
+# agent/tools/pdf_charts.py
+from __future__ import annotations
+import math
+import pandas as pd
+from reportlab.graphics.charts.barcharts import VerticalBarChart
+from reportlab.graphics.charts.legends import Legend
+from reportlab.graphics.charts.linecharts import HorizontalLineChart
+from reportlab.graphics.charts.piecharts import Pie
+from reportlab.graphics.shapes import Drawing, String
+from reportlab.graphics.widgets.markers import makeMarker
+from reportlab.lib import colors
+
+from agent.tools.charts import MARKER_POINTS
+from agent.tools.finance_utils import fmt_money
+
+# Board-pack charts as reportlab vector drawings, drawn straight from the
+# metric outputs onto the PDF canvas (pdf_export renderer="vector"). Same
+# charts, titles and colors as the Plotly builders in charts.py, but no
+# figure JSON, no headless browser and no bitmap in the file.
+
+PALETTE = [colors.HexColor(c) for c in (
+    "#636EFA", "#EF553B", "#00CC96", "#AB63FA", "#FFA15A", "#19D3F3", "#FF6692", "#B6E880", "#FF97FF", "#FECB52",
+)]  # plotly's default colorway
+GRID = colors.HexColor("#E5ECF6")
+TITLE_FONT, FONT = "Helvetica-Bold", "Helvetica"
+PAD, TITLE_H, AXIS_W, LEGEND_W = 8, 28, 56, 110
+
+def _frame(width: float, height: float, title: str) -> Drawing:
+    d = Drawing(width, height)
+    d.add(String(PAD, height - 18, title, fontName=TITLE_FONT, fontSize=12))
+    return d
+
+def _legend(d: Drawing, pairs: list, top: float) -> None:
+    lg = Legend()
+    lg.x, lg.y = d.width - LEGEND_W, top
+    lg.alignment = "right"
+    lg.fontName, lg.fontSize = FONT, 9
+    lg.dx = lg.dy = 8
+    lg.deltay = 12
+    lg.columnMaximum = max(1, int((top - PAD) // 12))
+    lg.strokeColor = None
+    lg.colorNamePairs = pairs
+    d.add(lg)
+
+def _short(label, n: int = 12) -> str:
+    label = str(label)
+    return label if len(label) <= n else label[:n - 1] + "…"
+
+def _no_data(d: Drawing, text: str = "No data") -> Drawing:
+    d.add(String(d.width / 2, d.height / 2, text, fontName=FONT, fontSize=10, textAnchor="middle",
+                 fillColor=colors.grey))
+    return d
+
+def _money_axis(axis) -> None:
+    axis.labelTextFormat = fmt_money
+    axis.labels.fontName, axis.labels.fontSize = FONT, 8
+    axis.visibleGrid = True
+    axis.gridStrokeColor = GRID
+    axis.strokeColor = GRID
+
+def _plot_area(chart, d: Drawing) -> None:
+    chart.x, chart.y = AXIS_W, PAD + 24
+    chart.width = d.width - AXIS_W - LEGEND_W
+    chart.height = d.height - TITLE_H - chart.y - PAD
+
+def bar_actual_vs_budget(month_label: str, actual: float, budget: float,
+                         width: float = 540, height: float = 300) -> Drawing:
+    d = _frame(width, height, f"Revenue vs Budget — {month_label}")
+    bc = VerticalBarChart()
+    _plot_area(bc, d)
+    bc.data = [(float(actual),), (float(budget),)]
+    bc.categoryAxis.categoryNames = [month_label]
+    bc.categoryAxis.labels.fontName, bc.categoryAxis.labels.fontSize = FONT, 9
+    bc.categoryAxis.strokeColor = GRID
+    bc.valueAxis.valueMin = min(0.0, float(actual), float(budget))
+    _money_axis(bc.valueAxis)
+    bc.groupSpacing, bc.barSpacing = 40, 4
+    bc.bars.strokeColor = None
+    bc.bars[0].fillColor, bc.bars[1].fillColor = PALETTE[0], PALETTE[1]
+    d.add(bc)
+    _legend(d, [(PALETTE[0], "Actual"), (PALETTE[1], "Budget")], height - TITLE_H - 4)
+    return d
+
+def pie_opex_breakdown(series: pd.Series, month_label: str,
+                       width: float = 540, height: float = 300) -> Drawing:
+    d = _frame(width, height, f"Opex Breakdown — {month_label}")
+    s = series[series > 0]  # like plotly, slices only for positive amounts
+    if not len(s):
+        return _no_data(d, "No opex for this month")
+    total = float(s.sum())
+    size = min(d.width - 2 * LEGEND_W, d.height - TITLE_H - 2 * PAD)
+    pie = Pie()
+    pie.x, pie.y = (d.width - LEGEND_W - size) / 2, PAD + (d.height - TITLE_H - 2 * PAD - size) / 2
+    pie.width = pie.height = size
+    pie.data = [float(v) for v in s.values]
+    pie.labels = None
+    pie.innerRadiusFraction = 0.3  # same hole as the plotly donut
+    pie.startAngle, pie.direction = 90, "clockwise"
+    pie.slices.strokeColor, pie.slices.strokeWidth = colors.white, 1
+    for i in range(len(s)):
+        pie.slices[i].fillColor = PALETTE[i % len(PALETTE)]
+    d.add(pie)
+    _legend(d, [(PALETTE[i % len(PALETTE)], f"{_short(label)}  {v / total:.1%}")
+                for i, (label, v) in enumerate(s.items())], height - TITLE_H - 4)
+    return d
+
+def line_cash_trend(df: pd.DataFrame, title: str = "Cash Trend",
+                    width: float = 540, height: float = 300) -> Drawing:
+    d = _frame(width, height, title)
+    values = [None if v is None or math.isnan(v) else float(v)
+              for v in pd.to_numeric(df["cash_usd"], errors="coerce").tolist()]
+    if not any(v is not None for v in values):
+        return _no_data(d)
+    lc = HorizontalLineChart()
+    _plot_area(lc, d)
+    lc.width += LEGEND_W - PAD  # single series: no legend
+    lc.data = [values]
+    labels = df["month"].astype(str).tolist()
+    step = max(1, math.ceil(len(labels) / 12))  # at most ~12 month labels
+    lc.categoryAxis.categoryNames = [l if i % step == 0 else "" for i, l in enumerate(labels)]
+    lc.categoryAxis.labels.fontName, lc.categoryAxis.labels.fontSize = FONT, 8
+    lc.categoryAxis.labels.angle = 30 if len(labels) > 6 else 0
+    lc.categoryAxis.labels.boxAnchor = "ne" if len(labels) > 6 else "n"
+    lc.categoryAxis.strokeColor = GRID
+    finite = [v for v in values if v is not None]
+    lo, hi = min(finite), max(finite)
+    pad = (hi - lo) * 0.1 or abs(hi) * 0.1 or 1.0
+    lc.valueAxis.valueMin, lc.valueAxis.valueMax = lo - pad, hi + pad
+    _money_axis(lc.valueAxis)
+    lc.lines[0].strokeColor, lc.lines[0].strokeWidth = PALETTE[0], 2
+    if len(values) <= MARKER_POINTS:
+        lc.lines[0].symbol = makeMarker("FilledCircle", size=4, fillColor=PALETTE[0], strokeColor=PALETTE[0])
+    d.add(lc)
+    return d
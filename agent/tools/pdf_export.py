@@ -1,54 +1,185 @@
 # agent/tools/pdf_export.py
 from __future__ import annotations
+import os
+import threading
+import warnings
+from concurrent.futures import Future, ThreadPoolExecutor
 from io import BytesIO
-from typing import Dict
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional
 import pandas as pd
 
-from reportlab.lib.pagesizes import LETTER
-from reportlab.pdfgen import canvas
-from reportlab.lib.utils import ImageReader
-from reportlab.lib.units import inch
-
-from agent.tools.charts import (
-    bar_actual_vs_budget, pie_opex_breakdown, line_cash_trend
-)
+from agent.tools import charts
 from agent.tools.metrics import (
     revenue_vs_budget, opex_breakdown_by_category
 )
 from agent.answer_formatter import fmt_month
-import plotly.io as pio
+from agent.tools.render_cache import PngCache
+from agent.tools.timing import Trace, current_trace, span, trace
 
-def _plotly_fig_to_png_bytes(fig, scale=2.0, width=900, height=500) -> bytes:
+# reportlab and plotly.io load on the first export, not with the app: most
+# sessions never build a PDF.
+if TYPE_CHECKING:
+    from reportlab.lib.utils import ImageReader
+
+RENDER_WORKERS = 3  # one per chart in the board pack
+
+# "plotly": the app's Plotly figures, rasterized to PNG by kaleido (headless
+# Chromium) on the render pool and embedded as images.
+# "vector": the same charts drawn straight onto the page as reportlab vector
+# graphics (pdf_charts.py) - no browser, no bitmaps, much smaller files.
+RENDERERS = ("plotly", "vector")
+
+def _default_renderer() -> str:
+    """$FPNA_PDF_RENDERER if it names a renderer; otherwise "plotly", with a warning for a bad value."""
+    name = (os.environ.get("FPNA_PDF_RENDERER") or "plotly").strip().lower()
+    if name not in RENDERERS:
+        warnings.warn(f"FPNA_PDF_RENDERER={name!r} is not one of {RENDERERS}; using 'plotly'", stacklevel=2)
+        return "plotly"
+    return name
+
+DEFAULT_RENDERER = _default_renderer()
+
+Painter = Callable[[Any, float, float, float, float], None]  # (canvas, x, y, width, height)
+
+_render_pool: Optional[ThreadPoolExecutor] = None
+_render_pid: Optional[int] = None  # a forked child must not reuse the parent's (threadless) pool
+_render_lock = threading.Lock()
+
+# shared by every export in the process; FPNA_PNG_CACHE_DIR enables the on-disk tier
+png_cache = PngCache(disk_dir=os.environ.get("FPNA_PNG_CACHE_DIR") or None)
+
+def _rasterize_png(fig, scale=2.0, width=900, height=500) -> bytes:
+    import plotly.io as pio
     return pio.to_image(fig, format="png", width=width, height=height, scale=scale)
 
-def build_board_pdf(data: Dict[str, pd.DataFrame], month: pd.Period) -> bytes:
+def _plotly_fig_to_png_bytes(fig, scale=2.0, width=900, height=500) -> bytes:
+    key = png_cache.key(fig, width, height, scale)
+    png = png_cache.get(key)
+    if png is None:
+        png = _rasterize_png(fig, scale=scale, width=width, height=height)
+        png_cache.put(key, png)
+    return png
+
+def warm_renderer(workers: int = RENDER_WORKERS, start_browser: bool = True) -> ThreadPoolExecutor:
+    """
+    Start (once per process) the chart render pool. With kaleido >= 1 and
+    `start_browser`, this also launches its persistent headless browser with
+    one tab per worker, so exports don't pay browser start-up and charts
+    rasterize concurrently.
+    """
+    global _render_pool, _render_pid
+    with _render_lock:
+        if _render_pool is None or _render_pid != os.getpid():
+            if start_browser:
+                _start_kaleido_server(workers)
+            _render_pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pdf-render")
+            _render_pid = os.getpid()
+    return _render_pool
+
+def _start_kaleido_server(tabs: int) -> None:
+    try:
+        import kaleido
+        # without a browser the server thread dies on start and later renders
+        # block forever; leave pio.to_image to raise its "requires Chrome" error
+        if hasattr(kaleido, "start_sync_server") and _browser_available():
+            kaleido.start_sync_server(n=tabs, silence_warnings=True)
+    except Exception:
+        pass  # old kaleido: pio.to_image renders per call
+
+def _browser_available() -> bool:
+    try:
+        from choreographer.browsers.chromium import Chromium
+    except ImportError:
+        return True  # can't tell; let kaleido decide
+    return bool(os.environ.get("BROWSER_PATH") or Chromium.find_browser(skip_local=False))
+
+def _render_traced(fig, t: Optional[Trace]) -> bytes:
+    # runs on a pool thread, so the caller's trace is passed in explicitly
+    with span("pdf.rasterize", t):
+        return _plotly_fig_to_png_bytes(fig)
+
+def _render_async(fig) -> Future:
+    return warm_renderer().submit(_render_traced, fig, current_trace())
+
+def _wait_png(fut: Future) -> ImageReader:
+    from reportlab.lib.utils import ImageReader
+    with span("pdf.render_wait"):
+        png = fut.result()
+    return ImageReader(BytesIO(png))
+
+def _png_painter(fut: Future) -> Painter:
+    def paint(c, x, y, w, h):
+        c.drawImage(_wait_png(fut), x, y, width=w, height=h, preserveAspectRatio=True, mask='auto')
+    return paint
+
+def _chart(renderer: str, builder: str, *args, **kwargs) -> Painter:
+    """
+    Painter for one board chart. `builder` names the function in charts.py
+    (plotly: built now, rasterizing on the render pool) and in pdf_charts.py
+    (vector: drawn at the slot's size during assembly).
+    """
+    if renderer == "vector":
+        from agent.tools import pdf_charts
+        def paint(c, x, y, w, h):
+            from reportlab.graphics import renderPDF
+            with span("pdf.figures"):
+                drawing = getattr(pdf_charts, builder)(*args, width=w, height=h, **kwargs)
+            with span("pdf.draw"):
+                renderPDF.draw(drawing, c, x, y)
+        return paint
+    with span("pdf.figures"):
+        fig = getattr(charts, builder)(*args, **kwargs)
+    return _png_painter(_render_async(fig))
+
+def build_board_pdf(data: Dict[str, pd.DataFrame], month: pd.Period, subtitle: Optional[str] = None,
+                    renderer: Optional[str] = None) -> bytes:
     """
     Builds a compact board PDF (1–2 pages) and returns its bytes.
+    `subtitle` (e.g. an entity name) is appended to the page title.
+    `renderer` is "plotly" or "vector" (see RENDERERS; default
+    $FPNA_PDF_RENDERER or "plotly").
     Sections:
       1) Revenue vs Budget (selected month)
       2) Opex breakdown (selected month)
       3) Cash trend (last 12 months)
+    With timing enabled, stages are recorded under "pdf.*" (see tools/timing.py);
+    "pdf.assembly" includes "pdf.render_wait", the time spent blocked on charts
+    (plotly), or "pdf.draw", the vector drawing (vector).
     """
+    renderer = renderer or DEFAULT_RENDERER
+    if renderer not in RENDERERS:
+        raise ValueError(f"unknown PDF renderer {renderer!r}; expected one of {', '.join(RENDERERS)}")
+    with trace("pdf"):
+        return _board_pdf(data, month, subtitle, renderer)
+
+def _board_pdf(data: Dict[str, pd.DataFrame], month: pd.Period, subtitle: Optional[str], renderer: str) -> bytes:
     actuals = data["actuals_usd"]
     budget  = data["budget_usd"]
     cash    = data["cash_usd"]
 
-    # ----- Figures -----
+    # ----- Charts (plotly ones rasterize concurrently; assembly waits on each in page order) -----
     # 1) Revenue vs Budget
-    r = revenue_vs_budget(actuals, budget, month)
-    fig_rev = bar_actual_vs_budget(str(month), r["revenue_actual_usd"], r["revenue_budget_usd"])
-    png_rev = _plotly_fig_to_png_bytes(fig_rev)
+    with span("pdf.metrics"):
+        r = revenue_vs_budget(actuals, budget, month)
+    rev = _chart(renderer, "bar_actual_vs_budget", str(month), r["revenue_actual_usd"], r["revenue_budget_usd"])
 
     # 2) Opex breakdown
-    opex_series = opex_breakdown_by_category(actuals, month)
-    fig_opex = pie_opex_breakdown(opex_series, month_label=str(month))
-    png_opex = _plotly_fig_to_png_bytes(fig_opex)
+    with span("pdf.metrics"):
+        opex_series = opex_breakdown_by_category(actuals, month)
+    opex = _chart(renderer, "pie_opex_breakdown", opex_series, month_label=str(month))
 
     # 3) Cash trend (last 12 months)
-    cash_tail = cash.sort_values("month").tail(12)
-    fig_cash = line_cash_trend(cash_tail, title="Cash (last 12 months)")
-    png_cash = _plotly_fig_to_png_bytes(fig_cash)
+    with span("pdf.metrics"):
+        cash_tail = cash.sort_values("month").tail(12)
+    cash_chart = _chart(renderer, "line_cash_trend", cash_tail, title="Cash (last 12 months)")
+
+    with span("pdf.assembly"):
+        return _assemble(month, subtitle, rev, opex, cash_chart)
 
+def _assemble(month: pd.Period, subtitle: Optional[str], rev: Painter, opex: Painter, cash: Painter) -> bytes:
+    from reportlab.lib.pagesizes import LETTER
+    from reportlab.lib.units import inch
+    from reportlab.pdfgen import canvas
     # ----- PDF assembly -----
     buf = BytesIO()
     c = canvas.Canvas(buf, pagesize=LETTER)
@@ -58,15 +189,15 @@ def build_board_pdf(data: Dict[str, pd.DataFrame], month: pd.Period) -> bytes:
 
     # Page 1
     c.setFont("Helvetica-Bold", 14)
-    c.drawString(margin, title_y, f"FP&A Snapshot — {fmt_month(month)}")
+    title = f"FP&A Snapshot — {fmt_month(month)}"
+    c.drawString(margin, title_y, title if subtitle is None else f"{title} — {subtitle}")
 
     # Revenue vs Budget
     y = title_y - 0.4*inch
-    img_rev = ImageReader(BytesIO(png_rev))
-    # fit image to width
+    # fit chart to width
     img_w = W - 2*margin
     img_h = img_w * (9/16)  # approximate aspect
-    c.drawImage(img_rev, margin, y - img_h, width=img_w, height=img_h, preserveAspectRatio=True, mask='auto')
+    rev(c, margin, y - img_h, img_w, img_h)
     y = y - img_h - 0.2*inch
     c.setFont("Helvetica", 10)
     c.drawString(margin, y, f"Revenue vs Budget for {fmt_month(month)}")
@@ -77,8 +208,7 @@ def build_board_pdf(data: Dict[str, pd.DataFrame], month: pd.Period) -> bytes:
     if y - opex_h < margin:
         c.showPage()
         y = H - margin
-    img_opex = ImageReader(BytesIO(png_opex))
-    c.drawImage(img_opex, margin, y - opex_h, width=img_w, height=opex_h, preserveAspectRatio=True, mask='auto')
+    opex(c, margin, y - opex_h, img_w, opex_h)
     y = y - opex_h - 0.2*inch
     c.setFont("Helvetica", 10)
     c.drawString(margin, y, f"Opex breakdown — {fmt_month(month)}")
@@ -87,8 +217,7 @@ def build_board_pdf(data: Dict[str, pd.DataFrame], month: pd.Period) -> bytes:
     c.showPage()
     c.setFont("Helvetica-Bold", 14)
     c.drawString(margin, H - margin, "Cash Trend")
-    img_cash = ImageReader(BytesIO(png_cash))
-    c.drawImage(img_cash, margin, H - margin - 0.4*inch - img_h, width=img_w, height=img_h, preserveAspectRatio=True, mask='auto')
+    cash(c, margin, H - margin - 0.4*inch - img_h, img_w, img_h)
 
     c.save()
     buf.seek(0)
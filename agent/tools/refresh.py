@@ -0,0 +1,95 @@
+# agent/tools/refresh.py
+from __future__ import annotations
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+import numpy as np
+import pandas as pd
+
+from . import data_cache
+from .data_loader import (
+    DataLoadError, compact_pl_frame, concat_pl_frames, dataset_version, load_finance_data,
+    _compact_fx, _month_digests, _project_usd, _read_sheets,
+)
+from .kpi_cube import build_kpi_cube, kpi_cube, read_only_frame, register_cube
+
+# Incremental reload: the workbook is re-read, but only months whose content
+# digest (see data_loader.DIGEST_COLUMNS) differs from the previous load are
+# FX-projected, compacted and folded into the existing frames and KPI cubes.
+# A changed fx month re-projects that month in both actuals and budget.
+#
+# Only the projection and the KPI-cube update scale with the changed months.
+# Reading the workbook, concatenating the frames (which copies the untouched
+# rows) and rewriting the Parquet cache are still O(dataset).
+
+PL_SHEETS = (("actuals", "actuals_usd"), ("budget", "budget_usd"))
+
+def _digest_map(digests: pd.DataFrame, sheet: str) -> Dict[int, tuple]:
+    d = digests[digests["sheet"] == sheet]
+    return dict(zip(d["month"].array.asi8.tolist(), zip(d["rows"].tolist(), d["digest"].tolist())))
+
+def changed_months(old: pd.DataFrame, new: pd.DataFrame) -> Dict[str, set]:
+    """Month ordinals per P&L sheet that were added, removed or edited (incl. via fx)."""
+    def diff(sheet: str) -> set:
+        a, b = _digest_map(old, sheet), _digest_map(new, sheet)
+        return {m for m in a.keys() | b.keys() if a.get(m) != b.get(m)}
+    fx = diff("fx")
+    return {sheet: diff(sheet) | fx for sheet, _ in PL_SHEETS}
+
+def refresh_finance_data(
+    xlsx_path: str | Path,
+    previous: Dict[str, Any],
+    cache: bool = True,
+    stats: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    Bring `previous` (a load_finance_data result) up to date with the workbook.
+    Returns `previous` itself if nothing changed, otherwise a new dict whose
+    P&L frames are rebuilt from the untouched rows plus the re-projected
+    months, with incrementally updated KPI cubes.
+    `stats` receives the mode ('unchanged' | 'incremental' | 'full'), the
+    changed months per sheet and the number of rows re-projected.
+    """
+    xlsx = Path(xlsx_path)
+    stats = {} if stats is None else stats
+    t0 = time.perf_counter()
+    if "month_digests" not in previous:
+        stats.update(mode="full", seconds=time.perf_counter() - t0)
+        return load_finance_data(xlsx, cache=cache)
+    if not xlsx.exists():
+        raise DataLoadError(f"File not found: {xlsx}")
+
+    use_cache = cache and data_cache.cache_available()
+    fingerprint = data_cache.workbook_fingerprint(xlsx) if use_cache else None
+    actuals, budget, fx, cash = _read_sheets(xlsx)
+    raw = {"actuals": actuals, "budget": budget}
+    digests = _month_digests(actuals=actuals, budget=budget, fx=fx)
+    changed = changed_months(previous["month_digests"], digests)
+    cash_usd = cash[["month", "cash_usd"]].copy()
+
+    stats.update(changed_months={s: sorted(str(pd.Period(ordinal=m, freq="M")) for m in ms)
+                                 for s, ms in changed.items()},
+                 rows_projected=0)
+    if not any(changed.values()) and cash_usd.equals(previous["cash_usd"]):
+        stats.update(mode="unchanged", seconds=time.perf_counter() - t0)
+        return previous
+
+    out: Dict[str, Any] = dict(previous)
+    for sheet, key in PL_SHEETS:
+        months = np.array(sorted(changed[sheet]), dtype=np.int64)
+        if not len(months):
+            continue
+        prev = previous[key]
+        src = raw[sheet]
+        delta = compact_pl_frame(_project_usd(src[np.isin(src["month"].array.asi8, months)], fx))
+        merged = read_only_frame(concat_pl_frames([prev[~np.isin(prev["month"].array.asi8, months)], delta]))
+        register_cube(merged, kpi_cube(prev).replace_months(build_kpi_cube(delta), months, len(merged)))
+        out[key] = merged
+        stats["rows_projected"] += len(delta)
+
+    out.update(cash_usd=cash_usd, fx=_compact_fx(fx), month_digests=digests)
+    out["version"] = dataset_version(out)
+    if use_cache:
+        data_cache.write_cached(xlsx, out, fingerprint)
+    stats.update(mode="incremental", seconds=time.perf_counter() - t0)
+    return out
@@ -0,0 +1,90 @@
+# agent/tools/render_cache.py
+from __future__ import annotations
+import hashlib
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional
+
+# Content-addressed cache for rasterized charts: key = sha256 of the figure
+# JSON plus the output size/scale, so identical figures (e.g. the cash trend
+# repeated in every pack) are rendered once. Tier 1 is an in-process LRU with
+# a byte budget; the optional tier 2 is a directory shared by processes.
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+class PngCache:
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES, disk_dir: str | Path | None = None) -> None:
+        self.max_bytes = max_bytes
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self._mem: "OrderedDict[str, bytes]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = self.disk_hits = self.misses = 0
+
+    @staticmethod
+    def key(fig, width: int, height: int, scale: float) -> str:
+        h = hashlib.sha256(fig.to_json().encode("utf-8"))
+        h.update(f"|{width}x{height}@{scale}".encode())
+        return h.hexdigest()
+
+    def _disk_path(self, key: str) -> Path:
+        return self.disk_dir / key[:2] / f"{key}.png"
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            png = self._mem.get(key)
+            if png is not None:
+                self._mem.move_to_end(key)
+                self.hits += 1
+                return png
+        if self.disk_dir is not None:
+            try:
+                png = self._disk_path(key).read_bytes()
+            except OSError:
+                png = None
+            if png is not None:
+                self._remember(key, png)
+                with self._lock:
+                    self.disk_hits += 1
+                return png
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: str, png: bytes) -> None:
+        self._remember(key, png)
+        if self.disk_dir is not None:
+            path = self._disk_path(key)
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                tmp = path.with_suffix(f".{uuid.uuid4().hex}.tmp")
+                tmp.write_bytes(png)
+                os.replace(tmp, path)
+            except OSError:
+                pass  # disk tier is best-effort
+
+    def _remember(self, key: str, png: bytes) -> None:
+        if len(png) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._mem.pop(key, None)
+            self._bytes += len(png) - (len(old) if old is not None else 0)
+            self._mem[key] = png
+            while self._bytes > self.max_bytes:
+                _, evicted = self._mem.popitem(last=False)
+                self._bytes -= len(evicted)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "disk_hits": self.disk_hits, "misses": self.misses,
+                    "entries": len(self._mem), "bytes": self._bytes}
+
+    def clear(self) -> None:
+        """Drop the in-memory tier and reset counters (the disk tier is kept)."""
+        with self._lock:
+            self._mem.clear()
+            self._bytes = 0
+            self.hits = self.disk_hits = self.misses = 0
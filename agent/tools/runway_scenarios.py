@@ -0,0 +1,147 @@
+# agent/tools/runway_scenarios.py
+from __future__ import annotations
+import math
+from dataclasses import dataclass
+from typing import Any, Dict, Literal, Optional, Sequence
+import numpy as np
+import pandas as pd
+
+from .kpi_cube import kpi_cube, REVENUE, COGS, OPEX
+from .metrics import cash_runway_months
+
+# Monte Carlo runway: revenue and opex follow the recent run-rate with
+# multiplicative monthly shocks, COGS keeps its recent share of revenue, and
+# each path's cash is the current balance plus the cumulative net P&L. All
+# paths of a batch are one (months, paths) array, month-major so that the
+# optional AR(1) persistence of the shocks (the only step that walks the
+# months) and the per-month percentiles read contiguous rows.
+#
+#   net[p, t]  = rev[p, t] * (1 - cogs_ratio) - opex[p, t]
+#   rev[p, t]  = revenue_usd * (1 + revenue_growth) ** t * exp(sigma * s[p, t] - sigma² / 2)
+#   cash[p, t] = cash_current_usd + sum(net[p, :t + 1])
+#
+# Runway is the (interpolated) number of months until a path's cash first
+# goes negative; paths that stay solvent over the horizon count as beyond it.
+
+PERCENTILES = (5, 10, 25, 50, 75, 90, 95)
+
+@dataclass(frozen=True)
+class RunwayScenario:
+    paths: int = 20_000
+    horizon: int = 36                    # months simulated after `asof`
+    revenue_growth: float = 0.0          # monthly drift
+    opex_growth: float = 0.0
+    revenue_sigma: Optional[float] = None  # monthly shock std dev; None: estimated from history
+    opex_sigma: Optional[float] = None
+    distribution: Literal["normal", "t"] = "normal"  # "t": fat tails, scaled to unit variance
+    t_df: float = 4.0
+    correlation: float = 0.0             # between revenue and opex shocks
+    persistence: float = 0.0             # AR(1) coefficient of the shocks, 0 = independent months
+    burn_lookback: int = 3               # months averaged for the starting run-rate
+    vol_lookback: int = 12               # months used to estimate the sigmas
+    seed: Optional[int] = 0
+    batch: int = 16_384                  # paths generated per block (bounds temporaries)
+
+MIN_SIGMA = 0.01
+
+def _estimate_sigma(series: np.ndarray, fallback: float = 0.05) -> float:
+    """Std dev of month-over-month log changes; `fallback` without enough positive history."""
+    s = series[series > 0]
+    if len(s) < 3:
+        return fallback
+    return max(float(np.std(np.diff(np.log(s)), ddof=1)), MIN_SIGMA)
+
+def _shocks(rng: np.random.Generator, sc: RunwayScenario, n: int) -> np.ndarray:
+    """(2, horizon, n) unit-variance shocks for revenue and opex."""
+    z = rng.standard_normal((2, sc.horizon, n))
+    if sc.correlation:
+        z[1] *= math.sqrt(1 - sc.correlation ** 2)
+        z[1] += sc.correlation * z[0]
+    if sc.distribution == "t":
+        # multivariate t: one chi-square draw per path-month scales both shocks
+        w = rng.chisquare(sc.t_df, (sc.horizon, n)) * ((sc.t_df - 2) / sc.t_df ** 2)
+        z /= np.sqrt(w)
+    if sc.persistence:
+        rho, innov = sc.persistence, math.sqrt(1 - sc.persistence ** 2)
+        for t in range(1, sc.horizon):
+            z[:, t] *= innov
+            z[:, t] += rho * z[:, t - 1]
+    return z
+
+def simulate_runway(
+    actuals_usd: pd.DataFrame,
+    cash_usd: pd.DataFrame,
+    scenario: RunwayScenario = RunwayScenario(),
+    asof: Optional[pd.Period] = None,
+    percentiles: Sequence[float] = PERCENTILES,
+) -> Dict[str, Any]:
+    """
+    Simulate `scenario.paths` monthly cash paths from `asof` (default: latest cash month).
+
+    Returns asof, cash_current_usd, paths, horizon, base (starting run-rate and
+    sigmas), prob_cash_out (share of paths that run out within the horizon),
+    runway_months and cash_out_month ({percentile: value}, None where that
+    percentile is beyond the horizon) and cash_pct (months × percentile
+    cash balances, for a fan chart).
+    """
+    sc = scenario
+    point = cash_runway_months(actuals_usd, cash_usd, asof=asof, burn_lookback=sc.burn_lookback)
+    asof, cash0 = point["asof"], point["cash_current_usd"]
+
+    cube = kpi_cube(actuals_usd)
+    g = cube.group_matrix(point["months_used"])
+    revenue, cogs, opex = (float(g[:, i].mean()) if len(g) else 0.0 for i in (REVENUE, COGS, OPEX))
+    cogs_ratio = cogs / revenue if revenue else 0.0
+    before = cube.present_months()
+    hist = cube.group_matrix(list(before[before < asof])[-sc.vol_lookback:])
+    rev_sigma = sc.revenue_sigma if sc.revenue_sigma is not None else _estimate_sigma(hist[:, REVENUE])
+    opex_sigma = sc.opex_sigma if sc.opex_sigma is not None else _estimate_sigma(hist[:, OPEX])
+
+    t = np.arange(sc.horizon)[:, None]
+    gross_path = revenue * (1 + sc.revenue_growth) ** t * (1 - cogs_ratio)  # gross profit before shocks
+    opex_path = opex * (1 + sc.opex_growth) ** t
+
+    rng = np.random.default_rng(sc.seed)
+    cash = np.empty((sc.horizon, sc.paths))
+    for lo in range(0, sc.paths, sc.batch):
+        n = min(sc.batch, sc.paths - lo)
+        z = _shocks(rng, sc, n)
+        # exp(sigma*z - sigma²/2) has mean 1: shocks move the spread, not the expected P&L
+        net = gross_path * np.exp(rev_sigma * z[0] - rev_sigma ** 2 / 2)
+        net -= opex_path * np.exp(opex_sigma * z[1] - opex_sigma ** 2 / 2)
+        np.cumsum(net, axis=0, out=cash[:, lo:lo + n])
+    cash += cash0
+
+    runway = _runway(cash, cash0)
+    q = np.asarray(percentiles, dtype=float)
+    # solvent paths sort above any finite runway; percentiles landing among them are "beyond the horizon"
+    rw = np.percentile(np.minimum(runway, sc.horizon + 1), q)
+    rw[rw > sc.horizon] = np.inf
+    months = pd.period_range(asof + 1, periods=sc.horizon, freq="M")
+    return {
+        "asof": asof,
+        "cash_current_usd": cash0,
+        "paths": sc.paths,
+        "horizon": sc.horizon,
+        "base": {"revenue_usd": revenue, "cogs_ratio": cogs_ratio, "opex_usd": opex,
+                 "revenue_sigma": rev_sigma, "opex_sigma": opex_sigma},
+        "prob_cash_out": float(np.isfinite(runway).mean()),
+        "runway_months": {p: (float(v) if np.isfinite(v) else None) for p, v in zip(percentiles, rw)},
+        "cash_out_month": {p: (asof + max(math.ceil(v), 1) if np.isfinite(v) else None)
+                           for p, v in zip(percentiles, rw)},
+        "cash_pct": pd.DataFrame(np.percentile(cash, q, axis=1).T, index=months,
+                                 columns=[f"p{p:g}" for p in percentiles]),
+    }
+
+def _runway(cash: np.ndarray, cash0: float) -> np.ndarray:
+    """Months until each path's cash first goes negative (linear within the month); inf if never."""
+    if cash0 < 0:
+        return np.zeros(cash.shape[1])
+    neg = cash < 0
+    hit = neg.any(axis=0)
+    first = neg.argmax(axis=0)
+    cols = np.arange(cash.shape[1])
+    prev = np.where(first > 0, cash[first - 1, cols], cash0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        frac = prev / (prev - cash[first, cols])
+    return np.where(hit, first + frac, np.inf)
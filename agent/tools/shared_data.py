@@ -0,0 +1,248 @@
+# agent/tools/shared_data.py
+from __future__ import annotations
+import argparse
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import numpy as np
+import pandas as pd
+
+from .kpi_cube import KpiCube, kpi_cube, register_cube
+
+# One process publishes the loaded dataset as memory-mapped column files; any
+# number of app/server/worker processes attach to it read-only. The OS page
+# cache holds one copy of the columns however many processes attach:
+#
+#   <root>/CURRENT                       {"version": ..., "dir": ...}, swapped atomically
+#   <root>/<version>/meta.json           frames, columns, dtypes, category labels
+#   <root>/<version>/<frame>.<i>.npy     one array per column
+#   <root>/<version>/<frame>.cube.<field>.npy   KpiCube arrays of actuals/budget
+#
+# Numeric and bool columns are stored as-is, period[M] as int64 ordinals and
+# categoricals as their codes (labels in meta.json), so attaching wraps the
+# mapped arrays in pandas without copying them. Text columns (only the small
+# month_digests frame has one) are stored as codes and materialized on attach.
+# The P&L frames' KPI cubes are published too, so attaching processes neither
+# rebuild nor duplicate them.
+# Use a tmpfs such as /dev/shm for a RAM-backed store.
+#
+# A version directory is complete before CURRENT points at it, so readers see
+# the old or the new dataset, never a mix. Superseded versions are removed
+# after `keep` newer ones; processes still attached keep their (unlinked)
+# mappings until they move on (POSIX; on Windows removal waits until then).
+
+SHARED_FORMAT = 2
+SHARED_FRAMES = ("actuals_usd", "budget_usd", "cash_usd", "fx", "month_digests")
+CUBE_FRAMES = ("actuals_usd", "budget_usd")
+CUBE_ARRAYS = ("line_group", "values", "line_totals", "line_counts", "group_totals", "month_present")
+
+class SharedDataError(RuntimeError):
+    pass
+
+# ---------- publish ----------
+
+def _encode(s: pd.Series, path: Path) -> Dict[str, Any]:
+    spec: Dict[str, Any] = {"name": s.name, "file": path.name}
+    if isinstance(s.dtype, pd.PeriodDtype):
+        arr = s.array.asi8
+        spec.update(kind="period", dtype=str(s.dtype))
+    elif isinstance(s.dtype, pd.CategoricalDtype):
+        arr = s.cat.codes.to_numpy()
+        spec.update(kind="category", categories=s.cat.categories.tolist(), ordered=bool(s.cat.ordered))
+    elif s.dtype.kind in "biuf":
+        arr = s.to_numpy()
+        spec.update(kind="array")
+    else:
+        codes, labels = pd.factorize(s)
+        arr = codes.astype(np.int32)
+        spec.update(kind="text", labels=labels.tolist(), dtype=str(s.dtype))
+    np.save(path, np.ascontiguousarray(arr), allow_pickle=False)
+    return spec
+
+def _encode_cube(cube: KpiCube, d: Path, name: str) -> Dict[str, Any]:
+    for field in CUBE_ARRAYS:
+        np.save(d / f"{name}.cube.{field}.npy", np.ascontiguousarray(getattr(cube, field)), allow_pickle=False)
+    return {"base_ordinal": cube.base_ordinal, "n_rows": cube.n_rows,
+            "entities": cube.entities.tolist(), "categories": cube.categories.tolist()}
+
+def publish(data: Dict[str, Any], root: str | Path, keep: int = 2) -> str:
+    """
+    Write `data` (as returned by load_finance_data) under `root` and point
+    CURRENT at it. Publishing a version that is already there only moves
+    the pointer. Returns the version.
+    """
+    root = Path(root)
+    version = data.get("version")
+    if not version:
+        from .data_loader import dataset_version
+        version = dataset_version(data)
+    root.mkdir(parents=True, exist_ok=True)
+    target = root / version
+    if not (target / "meta.json").exists():
+        tmp = root / f"{version}.{uuid.uuid4().hex}.tmp"
+        tmp.mkdir()
+        try:
+            meta = {"format": SHARED_FORMAT, "version": version, "frames": {}, "cubes": {}}
+            for name in SHARED_FRAMES:
+                df = data[name]
+                cols = [_encode(df[c], tmp / f"{name}.{i}.npy") for i, c in enumerate(df.columns)]
+                meta["frames"][name] = {"rows": len(df), "columns": cols}
+            for name in CUBE_FRAMES:
+                meta["cubes"][name] = _encode_cube(kpi_cube(data[name]), tmp, name)
+            (tmp / "meta.json").write_text(json.dumps(meta))
+            try:
+                os.replace(tmp, target)
+            except OSError:
+                if not (target / "meta.json").exists():  # not a concurrent publish of the same version
+                    raise
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+    _write_pointer(root, {"version": version, "dir": version, "published": time.time()})
+    prune(root, keep)
+    return version
+
+def _write_pointer(root: Path, pointer: Dict[str, Any]) -> None:
+    tmp = root / f"CURRENT.{uuid.uuid4().hex}.tmp"
+    tmp.write_text(json.dumps(pointer))
+    os.replace(tmp, root / "CURRENT")
+
+def prune(root: str | Path, keep: int = 2) -> None:
+    """Remove all but the current version and the `keep - 1` most recent others."""
+    root = Path(root)
+    current = current_version(root)
+    dirs = sorted((d for d in root.iterdir() if d.is_dir() and not d.name.endswith(".tmp")),
+                  key=lambda d: d.stat().st_mtime, reverse=True)
+    others = [d for d in dirs if d.name != current]
+    for d in others[max(keep - 1, 0):]:
+        shutil.rmtree(d, ignore_errors=True)
+
+# ---------- attach ----------
+
+def current_version(root: str | Path) -> Optional[str]:
+    try:
+        return json.loads((Path(root) / "CURRENT").read_text())["dir"]
+    except (OSError, ValueError, KeyError):
+        return None
+
+def _map(path: Path) -> np.ndarray:
+    # a plain ndarray view of the read-only mapping (keeps the map alive, drops np.memmap semantics)
+    return np.load(path, mmap_mode="r", allow_pickle=False).view(np.ndarray)
+
+def _decode(spec: Dict[str, Any], d: Path) -> Any:
+    arr = _map(d / spec["file"])
+    kind = spec["kind"]
+    if kind == "period":
+        return pd.arrays.PeriodArray(arr, dtype=pd.api.types.pandas_dtype(spec["dtype"]))
+    if kind == "category":
+        return pd.Categorical.from_codes(arr, categories=pd.Index(spec["categories"]),
+                                         ordered=spec["ordered"], validate=False)
+    if kind == "text":
+        labels = np.asarray(spec["labels"] + [None], dtype=object)
+        return pd.array(labels[arr], dtype=spec["dtype"])
+    return arr
+
+def _decode_cube(spec: Dict[str, Any], d: Path, name: str) -> KpiCube:
+    arrays = {field: _map(d / f"{name}.cube.{field}.npy") for field in CUBE_ARRAYS}
+    base = spec["base_ordinal"]
+    return KpiCube(
+        base_ordinal=base,
+        months=pd.period_range(pd.Period(ordinal=base, freq="M"), periods=len(arrays["values"]), freq="M"),
+        entities=pd.Index(spec["entities"]),
+        categories=pd.Index(spec["categories"]),
+        n_rows=spec["n_rows"],
+        **arrays,
+    )
+
+def attach(root: str | Path, version: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Open the published dataset (CURRENT, or `version`) read-only. Frames and
+    their KPI cubes wrap the mapped files without copying; in-place writes
+    raise.
+    """
+    root = Path(root)
+    version = version or current_version(root)
+    if version is None:
+        raise SharedDataError(f"nothing published under {root}")
+    d = root / version
+    try:
+        meta = json.loads((d / "meta.json").read_text())
+    except (OSError, ValueError) as e:
+        raise SharedDataError(f"version {version} is not available under {root}: {e}") from None
+    if meta.get("format") != SHARED_FORMAT:
+        raise SharedDataError(f"{d} has format {meta.get('format')}, expected {SHARED_FORMAT}")
+    data: Dict[str, Any] = {}
+    for name, frame in meta["frames"].items():
+        cols = {c["name"]: _decode(c, d) for c in frame["columns"]}
+        data[name] = pd.DataFrame(cols, copy=False)
+    data["version"] = meta["version"]
+    for name, spec in meta["cubes"].items():
+        register_cube(data[name], _decode_cube(spec, d, name))
+    return data
+
+class SharedDataset:
+    """
+    Attached dataset that follows CURRENT: get() re-attaches when a new
+    version has been published, checking at most every `check_interval`
+    seconds. Callers holding an older dict keep a consistent snapshot.
+    """
+    def __init__(self, root: str | Path, check_interval: float = 1.0) -> None:
+        self.root = Path(root)
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._data: Optional[Dict[str, Any]] = None
+        self._checked = 0.0
+
+    def get(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        if self._data is not None and now - self._checked < self.check_interval:
+            return self._data
+        with self._lock:
+            if self._data is None or now - self._checked >= self.check_interval:
+                version = current_version(self.root)
+                if self._data is None or (version is not None and version != self._data["version"]):
+                    self._data = attach(self.root, version)
+                self._checked = now
+            return self._data
+
+# ---------- CLI: the publishing process ----------
+
+def main(argv: Optional[List[str]] = None) -> None:
+    from .data_loader import load_finance_data
+    from .refresh import refresh_finance_data
+
+    ap = argparse.ArgumentParser(description="Publish the loaded workbook for read-only attach by other processes.")
+    ap.add_argument("xlsx", nargs="?", default="data/finance.xlsx")
+    ap.add_argument("--root", default=os.environ.get("FPNA_SHARED_DIR") or "/dev/shm/fpna",
+                    help="store directory (default: $FPNA_SHARED_DIR or /dev/shm/fpna)")
+    ap.add_argument("--watch", type=float, default=0, help="poll the workbook every N seconds and republish changes")
+    ap.add_argument("--keep", type=int, default=2, help="versions kept for processes still attached")
+    args = ap.parse_args(argv)
+
+    xlsx = Path(args.xlsx)
+    t0 = time.perf_counter()
+    data = load_finance_data(xlsx)
+    version = publish(data, args.root, args.keep)
+    print(f"published {version} to {args.root} in {time.perf_counter() - t0:.2f}s", flush=True)
+    stamp = xlsx.stat().st_mtime_ns
+    while args.watch > 0:
+        time.sleep(args.watch)
+        try:
+            mtime = xlsx.stat().st_mtime_ns
+            if mtime == stamp:
+                continue
+            t0 = time.perf_counter()
+            data = refresh_finance_data(xlsx, data)
+            stamp = mtime
+            if data["version"] != version:
+                version = publish(data, args.root, args.keep)
+                print(f"published {version} in {time.perf_counter() - t0:.2f}s", flush=True)
+        except Exception as e:  # half-saved workbook etc.: keep serving the last good version
+            print(f"refresh failed, still serving {version}: {type(e).__name__}: {e}", flush=True)
+
+if __name__ == "__main__":
+    main()
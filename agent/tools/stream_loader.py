@@ -0,0 +1,197 @@
+# agent/tools/stream_loader.py
+from __future__ import annotations
+import time
+from itertools import islice
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+from .data_loader import (
+    DIGEST_COLUMNS, REQUIRED_SHEETS, DataLoadError, FxRates, compact_pl_frame,
+    _accumulate_digests, _compact_fx, _digest_frame, _fx_rate_matrix, _missing_rate_error,
+)
+from .finance_utils import normalize_month_column, to_month_periods
+
+# Bounded-memory ingestion: sheets are read with openpyxl in read-only mode,
+# `chunk_size` rows at a time. Each chunk is month-normalized and FX-projected
+# on its own and appended into growable columnar buffers (month ordinal,
+# dictionary codes, amount_usd, amount_local, currency code), so peak memory is ~ final columns + one chunk
+# instead of several copies of the full sheet as object frames.
+
+DEFAULT_CHUNK_SIZE = 50_000
+PL_COLUMNS = ("month", "entity", "account_category", "amount", "currency")
+
+def peak_rss_mb() -> Optional[float]:
+    """Process peak resident set size in MB (None where `resource` is unavailable)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    import sys
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+class _Dictionary:
+    """Incremental label -> code encoder shared across chunks."""
+    def __init__(self) -> None:
+        self.codes: Dict[Any, int] = {}
+        self.labels: List[Any] = []
+
+    def encode(self, values: pd.Series) -> np.ndarray:
+        local, uniques = pd.factorize(values, use_na_sentinel=False)
+        lookup = np.empty(len(uniques), dtype=np.int32)
+        for i, u in enumerate(uniques):
+            key = None if pd.isna(u) else u
+            code = self.codes.get(key)
+            if code is None:
+                code = self.codes[key] = len(self.labels)
+                self.labels.append(key)
+            lookup[i] = code
+        return lookup[local]
+
+    def categorical(self, codes: np.ndarray) -> pd.Categorical:
+        """Codes -> Categorical with sorted categories (missing label -> NaN)."""
+        present = [(label, code) for code, label in enumerate(self.labels) if label is not None]
+        present.sort(key=lambda lc: lc[0])
+        remap = np.full(len(self.labels), -1, dtype=np.int32)
+        remap[[code for _, code in present]] = np.arange(len(present))
+        return pd.Categorical.from_codes(remap[codes], categories=[label for label, _ in present])
+
+class _Columns:
+    """Preallocated column buffers that double when full."""
+    def __init__(self, capacity: int) -> None:
+        self.n = 0
+        self.month = np.empty(capacity, dtype=np.int64)
+        self.entity = np.empty(capacity, dtype=np.int32)
+        self.category = np.empty(capacity, dtype=np.int32)
+        self.amount_usd = np.empty(capacity, dtype=np.float64)
+        self.amount_local = np.empty(capacity, dtype=np.float64)
+        self.currency = np.empty(capacity, dtype=np.int32)
+
+    FIELDS = ("month", "entity", "category", "amount_usd", "amount_local", "currency")
+
+    @property
+    def nbytes(self) -> int:
+        return sum(getattr(self, name).nbytes for name in self.FIELDS)
+
+    def append(self, **columns: np.ndarray) -> None:
+        k = len(columns["month"])
+        if self.n + k > len(self.month):
+            cap = max(self.n + k, 2 * len(self.month))
+            for name in self.FIELDS:
+                grown = np.empty(cap, dtype=getattr(self, name).dtype)
+                grown[:self.n] = getattr(self, name)[:self.n]
+                setattr(self, name, grown)
+        for name in self.FIELDS:
+            getattr(self, name)[self.n:self.n + k] = columns[name]
+        self.n += k
+
+def _iter_chunks(ws, chunk_size: int) -> Tuple[List[str], Iterator[List[tuple]]]:
+    rows = ws.iter_rows(values_only=True)
+    header = next(rows, None)
+    if header is None:
+        return [], iter(())
+    columns = [str(c).strip().lower() if c is not None else "" for c in header]
+
+    nonblank = (r for r in rows if any(v is not None for v in r))
+
+    def chunks():
+        while True:
+            block = list(islice(nonblank, chunk_size))
+            if not block:
+                return
+            yield block
+    return columns, chunks()
+
+def _read_small_sheet(ws) -> pd.DataFrame:
+    columns, chunks = _iter_chunks(ws, 10_000)
+    rows = [r for block in chunks for r in block]
+    return pd.DataFrame(rows, columns=columns)
+
+def _stream_pl(ws, fx: FxRates, chunk_size: int, stats: Dict[str, Any], digests: dict) -> pd.DataFrame:
+    columns, chunks = _iter_chunks(ws, chunk_size)
+    missing = set(PL_COLUMNS) - set(columns)
+    if missing:
+        raise DataLoadError(f"P&L missing columns: {missing}")
+    pos = {c: columns.index(c) for c in PL_COLUMNS}
+
+    cols = _Columns(chunk_size)
+    entities, categories = _Dictionary(), _Dictionary()
+    n_chunks = 0
+    for block in chunks:
+        n_chunks += 1
+        raw = {c: pd.Series([r[i] for r in block], dtype=object) for c, i in pos.items()}
+        months = to_month_periods(raw["month"]).array.asi8
+        cur_codes, cur_uniques = pd.factorize(raw["currency"])
+        cur = np.append(fx.currency_codes(cur_uniques), -1)[cur_codes]
+        rate = fx.gather(months, cur)
+        bad = np.isnan(rate)
+        if bad.any():
+            raise _missing_rate_error(pd.Series(pd.PeriodIndex.from_ordinals(months[bad], freq="M")),
+                                      raw["currency"][bad].astype(str).str.upper().to_numpy())
+        amount = raw["amount"].to_numpy(dtype=float, na_value=np.nan)
+        cols.append(month=months, entity=entities.encode(raw["entity"]),
+                    category=categories.encode(raw["account_category"]),
+                    amount_usd=amount * rate, amount_local=amount, currency=cur)
+        _accumulate_digests(digests, months, raw, DIGEST_COLUMNS[ws.title])
+        stats["buffer_peak_bytes"] = max(stats.get("buffer_peak_bytes", 0), cols.nbytes)
+        del raw, block
+
+    n = cols.n
+    stats.setdefault("rows", {})[ws.title] = n
+    stats.setdefault("chunks", {})[ws.title] = n_chunks
+    return compact_pl_frame(pd.DataFrame({
+        "month": pd.PeriodIndex.from_ordinals(cols.month[:n], freq="M"),
+        "entity": entities.categorical(cols.entity[:n]),
+        "account_category": categories.categorical(cols.category[:n]),
+        "amount_usd": cols.amount_usd[:n],
+        "amount_local": cols.amount_local[:n],
+        "currency": pd.Categorical.from_codes(cols.currency[:n], categories=fx.currencies),
+    }))
+
+def stream_workbook(
+    xlsx_path: str | Path,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    stats: Optional[Dict[str, Any]] = None,
+) -> dict[str, pd.DataFrame]:
+    """
+    Streaming counterpart of data_loader._parse_workbook; same output frames.
+    If `stats` is given it is filled with rows/chunks per sheet, elapsed
+    seconds, peak column-buffer bytes and the process peak RSS (MB).
+    """
+    import openpyxl
+
+    xlsx = Path(xlsx_path)
+    stats = {} if stats is None else stats
+    stats["chunk_size"] = chunk_size
+    t0 = time.perf_counter()
+    wb = openpyxl.load_workbook(xlsx, read_only=True, data_only=True)
+    try:
+        missing = [s for s in REQUIRED_SHEETS if s not in wb.sheetnames]
+        if missing:
+            raise DataLoadError(f"Missing sheet(s) in {xlsx.name}: {', '.join(missing)}")
+
+        fx = normalize_month_column(_read_small_sheet(wb["fx"]), "month")
+        cash = _read_small_sheet(wb["cash"])
+        if not {"month", "cash_usd"}.issubset(cash.columns):
+            raise DataLoadError("cash sheet must have columns: month, cash_usd")
+        cash = normalize_month_column(cash, "month")
+
+        rates = _fx_rate_matrix(fx)
+        digests = {"actuals": {}, "budget": {}, "fx": {}}
+        actuals_usd = _stream_pl(wb["actuals"], rates, chunk_size, stats, digests["actuals"])
+        budget_usd = _stream_pl(wb["budget"], rates, chunk_size, stats, digests["budget"])
+        _accumulate_digests(digests["fx"], fx["month"].array.asi8, fx, DIGEST_COLUMNS["fx"])
+    finally:
+        wb.close()
+
+    stats["seconds"] = time.perf_counter() - t0
+    stats["peak_rss_mb"] = peak_rss_mb()
+    return {
+        "actuals_usd": actuals_usd,
+        "budget_usd": budget_usd,
+        "cash_usd": cash[["month", "cash_usd"]].copy(),
+        "fx": _compact_fx(fx),
+        "month_digests": _digest_frame(digests),
+    }
@@ -0,0 +1,191 @@
+# agent/tools/timing.py
+from __future__ import annotations
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+# Per-stage timing spans for the planner and PDF pipeline.
+#
+#     with trace("plan") as t:          # t is None when timing is disabled
+#         with span("plan.route"):
+#             ...
+#
+# Disabled (the default; set FPNA_TIMING=1 or call set_enabled) both return a
+# shared no-op context manager, so an instrumented stage costs one global
+# read and a with-statement. Enabled, every span is added to the innermost
+# trace of its thread (or an explicit one, for work handed to a pool) and to
+# a process-wide latency histogram per stage.
+
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+RECENT = 50
+
+_enabled = os.environ.get("FPNA_TIMING", "").lower() in ("1", "true", "yes", "on")
+_local = threading.local()
+_lock = threading.Lock()
+
+def enabled() -> bool:
+    return _enabled
+
+def set_enabled(on: bool = True) -> None:
+    global _enabled
+    _enabled = bool(on)
+
+class Histogram:
+    """Cumulative-bucket latency histogram (Prometheus semantics)."""
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(BUCKETS) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect_left(BUCKETS, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+
+    def cumulative(self) -> List[int]:
+        out, running = [], 0
+        for c in self.counts:
+            running += c
+            out.append(running)
+        return out
+
+_histograms: Dict[str, Histogram] = {}
+_recent: Deque[Dict[str, Any]] = deque(maxlen=RECENT)
+
+def _observe(stage: str, seconds: float) -> None:
+    with _lock:
+        h = _histograms.get(stage)
+        if h is None:
+            h = _histograms[stage] = Histogram()
+        h.observe(seconds)
+
+class Trace:
+    """Spans of one request; stages seen more than once are summed."""
+    __slots__ = ("label", "spans", "_lock", "_prev", "_t0")
+
+    def __init__(self, label: str) -> None:
+        self.label = label
+        self.spans: List[Tuple[str, float]] = []
+        self._lock = threading.Lock()
+
+    def add(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            self.spans.append((stage, seconds))
+
+    def as_dict(self) -> Dict[str, float]:
+        out: Dict[str, float] = {}
+        with self._lock:
+            for stage, seconds in self.spans:
+                out[stage] = out.get(stage, 0.0) + seconds
+        return out
+
+    # context manager: makes this the thread's current trace
+    def __enter__(self) -> "Trace":
+        self._prev = getattr(_local, "trace", None)
+        _local.trace = self
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        total = time.perf_counter() - self._t0
+        _local.trace = self._prev
+        stage = f"{self.label}.total"
+        self.add(stage, total)
+        _observe(stage, total)
+        with _lock:
+            _recent.append({"label": self.label, "at": time.time(), "spans": self.as_dict()})
+        return False
+
+class _Span:
+    __slots__ = ("stage", "trace", "t0")
+
+    def __init__(self, stage: str, trace: Optional[Trace]) -> None:
+        self.stage, self.trace = stage, trace
+
+    def __enter__(self) -> "_Span":
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        seconds = time.perf_counter() - self.t0
+        if self.trace is not None:
+            self.trace.add(self.stage, seconds)
+        _observe(self.stage, seconds)
+        return False
+
+class _Noop:
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *exc) -> bool:
+        return False
+
+_NOOP = _Noop()
+
+def span(stage: str, trace: Optional[Trace] = None):
+    """Time a stage into `trace` (default: the thread's current trace) and its histogram."""
+    if not _enabled:
+        return _NOOP
+    return _Span(stage, trace if trace is not None else getattr(_local, "trace", None))
+
+def trace(label: str):
+    """Collect the spans of one request; `as` binds the Trace, or None when disabled."""
+    if not _enabled:
+        return _NOOP
+    return Trace(label)
+
+def current_trace() -> Optional[Trace]:
+    return getattr(_local, "trace", None) if _enabled else None
+
+# ---------- export ----------
+
+def recent_traces(n: int = RECENT) -> List[Dict[str, Any]]:
+    """Newest-first summaries of the last `n` traces: label, unix time, seconds per stage."""
+    with _lock:
+        return list(_recent)[::-1][:n]
+
+def histograms() -> Dict[str, Dict[str, Any]]:
+    """JSON-ready histograms: stage -> {buckets: {le: cumulative count}, sum, count}."""
+    with _lock:
+        return {
+            stage: {
+                "buckets": dict(zip([str(b) for b in BUCKETS] + ["+Inf"], h.cumulative())),
+                "sum": h.sum,
+                "count": h.count,
+            }
+            for stage, h in sorted(_histograms.items())
+        }
+
+def prometheus_text(metric: str = "fpna_stage_seconds") -> str:
+    """Histograms in the Prometheus text exposition format."""
+    lines = [f"# HELP {metric} Latency of FP&A copilot pipeline stages.", f"# TYPE {metric} histogram"]
+    for stage, h in histograms().items():
+        for le, count in h["buckets"].items():
+            lines.append(f'{metric}_bucket{{stage="{stage}",le="{le}"}} {count}')
+        lines.append(f'{metric}_sum{{stage="{stage}"}} {h["sum"]:.9g}')
+        lines.append(f'{metric}_count{{stage="{stage}"}} {h["count"]}')
+    return "\n".join(lines) + "\n"
+
+def dump(path: str | Path) -> Path:
+    """Write histograms to `path`: JSON if it ends in .json, else Prometheus text (atomic)."""
+    path = Path(path)
+    body = (json.dumps({"histograms": histograms(), "recent": recent_traces()}, indent=2)
+            if path.suffix == ".json" else prometheus_text())
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(body)
+    os.replace(tmp, path)
+    return path
+
+def reset() -> None:
+    with _lock:
+        _histograms.clear()
+        _recent.clear()
@@ -1,16 +1,48 @@
+import os
+import threading
 import streamlit as st
 import pandas as pd
 
 from agent.tools.data_loader import load_finance_data
+from agent.tools.refresh import refresh_finance_data
 from agent.planners import plan_and_answer
-from agent.tools.pdf_export import build_board_pdf
+from agent.tools import timing
 
 st.set_page_config(page_title="FP&A Copilot", page_icon="💼", layout="wide")
 st.title("FP&A Copilot")
 
-@st.cache_data(show_spinner=False)
+XLSX = "data/finance.xlsx"
+
+def _stamp():
+    s = os.stat(XLSX)
+    return (s.st_size, s.st_mtime_ns)
+
+# FPNA_SHARED_DIR: attach read-only to the dataset published there by
+# `python -m agent.tools.shared_data` (one copy for every app/worker process);
+# the first process publishes it if nothing is there yet.
+SHARED_DIR = os.environ.get("FPNA_SHARED_DIR")
+
+# cache_resource keeps one shared, uncopied dataset so its KPI cubes are reused;
+# when the workbook changes only the new/edited months are folded in.
+@st.cache_resource(show_spinner=False)
+def _store():
+    if SHARED_DIR:
+        from agent.tools.shared_data import SharedDataset, current_version, publish
+        if current_version(SHARED_DIR) is None:
+            publish(load_finance_data(XLSX), SHARED_DIR)
+        return {"shared": SharedDataset(SHARED_DIR)}
+    return {"data": load_finance_data(XLSX), "stamp": _stamp(), "lock": threading.Lock()}
+
 def _load():
-    return load_finance_data("data/finance.xlsx")
+    store = _store()
+    if "shared" in store:
+        return store["shared"].get()  # follows the publisher's version swaps
+    with store["lock"]:
+        stamp = _stamp()
+        if stamp != store["stamp"]:
+            store["data"] = refresh_finance_data(XLSX, store["data"])
+            store["stamp"] = stamp
+    return store["data"]
 
 data = _load()
 
@@ -22,10 +54,17 @@ default_month = all_months[-1] if all_months else pd.Period("2025-01", freq="M")
 month_strs = [str(m) for m in all_months]
 sel = st.sidebar.selectbox("Month for PDF", options=month_strs, index=len(month_strs)-1 if month_strs else 0)
 sel_month = pd.Period(sel, freq="M") if sel else default_month
+from agent.tools.pdf_export import DEFAULT_RENDERER, RENDERERS  # no reportlab/kaleido yet
+renderer = st.sidebar.radio(
+    "PDF charts", options=list(RENDERERS), horizontal=True,
+    index=RENDERERS.index(DEFAULT_RENDERER),
+    help="plotly: the app's charts as images (needs Chrome for kaleido); vector: drawn natively, faster and smaller",
+)
 
 if st.sidebar.button("Export PDF"):
+    from agent.tools.pdf_export import build_board_pdf  # reportlab/kaleido load on first export only
     with st.spinner("Building PDF…"):
-        pdf_bytes = build_board_pdf(data, sel_month)
+        pdf_bytes = build_board_pdf(data, sel_month, renderer=renderer)
     st.sidebar.download_button(
         label="Download Board PDF",
         data=pdf_bytes,
@@ -42,3 +81,14 @@ if q:
     st.write(ans["text"])
     if ans.get("figure") is not None:
         st.plotly_chart(ans["figure"], use_container_width=True)
+
+# ---- Sidebar: stage timings (FPNA_TIMING=1) ----
+if timing.enabled():
+    with st.sidebar.expander("Timings"):
+        recent = timing.recent_traces(20)
+        if recent:
+            rows = [{"label": t["label"], **{k: round(v * 1e3, 2) for k, v in t["spans"].items()}} for t in recent]
+            st.caption("Recent requests, milliseconds per stage (newest first)")
+            st.dataframe(pd.DataFrame(rows), use_container_width=True)
+        st.download_button("Download metrics (Prometheus)", data=timing.prometheus_text(),
+                           file_name="fpna_timings.prom", mime="text/plain")
@@ -0,0 +1,53 @@
+# bench/bench_charts.py
+"""
+Long-history line charts: build time, JSON payload and serialization time
+for the cash and GM% trend figures as the series grows.
+
+    python bench/bench_charts.py --points 520 5000 50000
+"""
+from __future__ import annotations
+import argparse
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from agent.tools.charts import line_cash_trend, line_gm_trend
+
+def _series(n: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    weeks = pd.Series(pd.date_range("1990-01-07", periods=n, freq="W"))
+    cash = 5e6 + np.cumsum(rng.normal(0, 4e4, n))
+    gm = np.clip(0.55 + np.cumsum(rng.normal(0, 0.002, n)), -1, 1)
+    gm[rng.random(n) < 0.01] = np.nan  # months without revenue
+    return pd.DataFrame({"month": weeks, "cash_usd": cash, "gm_pct": gm})
+
+def _time(fn, repeat: int = 3):
+    best, out = float("inf"), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--points", type=int, nargs="+", default=[520, 5000, 50000])
+    args = ap.parse_args()
+
+    line_cash_trend(_series(10))  # plotly import and validator warm-up
+    print(f"{'chart':<6} {'points':>7} {'drawn':>7} {'trace':<10} {'build ms':>9} {'json KB':>9} {'to_json ms':>11}")
+    for n in args.points:
+        df = _series(n)
+        for name, fn in (("cash", lambda: line_cash_trend(df)), ("gm", lambda: line_gm_trend(df))):
+            build, fig = _time(fn)
+            ser, payload = _time(fig.to_json)
+            tr = fig.data[0]
+            print(f"{name:<6} {n:>7} {len(tr.y):>7} {tr.type:<10} {build * 1e3:>9.1f} "
+                  f"{len(payload) / 1024:>9.1f} {ser * 1e3:>11.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+# bench/bench_dtypes.py
+"""
+Object-string vs. compact (categorical + flags) P&L frames: memory and speed.
+
+    python bench/bench_dtypes.py --rows 5000000
+"""
+from __future__ import annotations
+import argparse
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from agent.tools.data_loader import compact_pl_frame
+from agent.tools.kpi_cube import build_kpi_cube
+from synthetic import make_ledger
+
+def _time(fn, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=5_000_000)
+    args = ap.parse_args()
+
+    legacy = make_ledger(args.rows, 60)
+    legacy["entity"] = legacy["entity"].astype(object)
+    legacy["account_category"] = legacy["account_category"].astype(object)
+    legacy["month"] = legacy["month"].astype(object)  # Period objects, as the old row-wise parser produced
+    t0 = time.perf_counter()
+    compact = compact_pl_frame(make_ledger(args.rows, 60))
+    t_compact = time.perf_counter() - t0
+    m = compact["month"].iloc[0]
+
+    mb = lambda df: df.memory_usage(deep=True).sum() / 1e6
+    print(f"rows={args.rows:,}  compact_pl_frame incl. generation: {t_compact:.2f}s")
+    print(f"{'':<28} {'object':>10} {'compact':>10}")
+    print(f"{'memory (MB)':<28} {mb(legacy):>10.0f} {mb(compact):>10.0f}")
+    cases = [
+        ("revenue mask", lambda d: d["account_category"] == "Revenue", lambda d: d["is_revenue"]),
+        ("opex mask", lambda d: d["account_category"].str.startswith("Opex:", na=False), lambda d: d["is_opex"]),
+        ("month == m", lambda d: d["month"] == m, lambda d: d["month"] == m),
+        ("sum by entity", lambda d: d.groupby("entity")["amount_usd"].sum(),
+                          lambda d: d.groupby("entity", observed=True)["amount_usd"].sum()),
+        ("KPI cube build", build_kpi_cube, build_kpi_cube),
+    ]
+    for name, old, new in cases:
+        print(f"{name + ' (s)':<28} {_time(lambda: old(legacy)):>10.3f} {_time(lambda: new(compact)):>10.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+# bench/bench_fx.py
+"""
+USD projection: (month, currency) merge vs. dense rate-matrix gather.
+
+    python bench/bench_fx.py --rows 5000000 --currencies 12
+"""
+from __future__ import annotations
+import argparse
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from agent.tools.data_loader import _project_usd
+from synthetic import SynthSpec, make_fx, make_pl
+
+def _legacy_project(pl: pd.DataFrame, fx: pd.DataFrame) -> pd.DataFrame:
+    merged = pl.merge(fx[["month", "currency", "rate_to_usd"]],
+                      on=["month", "currency"], how="left", validate="many_to_one")
+    merged["amount_usd"] = merged["amount"].astype(float) * merged["rate_to_usd"].astype(float)
+    return merged[["month", "entity", "account_category", "amount_usd"]].copy()
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=5_000_000)
+    ap.add_argument("--currencies", type=int, default=12)
+    args = ap.parse_args()
+
+    spec = SynthSpec(rows=args.rows, months=120, entities=40, currencies=args.currencies, start="2016-01", seed=11)
+    pl, fx = make_pl(spec), make_fx(spec)
+    fx["currency"] = fx["currency"].astype("category")
+
+    t0 = time.perf_counter()
+    old = _legacy_project(pl, fx)
+    t_old = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    new = _project_usd(pl, fx)
+    t_new = time.perf_counter() - t0
+    assert np.allclose(old["amount_usd"].to_numpy(), new["amount_usd"].to_numpy())
+    print(f"rows={args.rows:,} currencies={args.currencies}: merge {t_old:.2f}s, gather {t_new:.2f}s")
+
+if __name__ == "__main__":
+    main()
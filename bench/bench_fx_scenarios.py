@@ -0,0 +1,65 @@
+# bench/bench_fx_scenarios.py
+"""
+FX scenarios: reprojecting actuals + budget under N alternate rate tables,
+one _project_usd + KPI cube rebuild per scenario vs. one batched contraction
+over the local-currency cube (fx_scenarios).
+
+    python bench/bench_fx_scenarios.py --rows 2000000 --scenarios 20
+"""
+from __future__ import annotations
+import argparse
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from agent.tools.data_loader import compact_pl_frame, _project_usd
+from agent.tools.fx_scenarios import fx_scenarios, local_cube, shifted_rates
+from agent.tools.metrics import range_summary
+from synthetic import SynthSpec, make_fx, make_pl, make_frames
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--rows", type=int, default=2_000_000)
+    ap.add_argument("--currencies", type=int, default=8)
+    ap.add_argument("--scenarios", type=int, default=20)
+    args = ap.parse_args()
+
+    spec = SynthSpec(rows=args.rows, months=60, entities=40, currencies=args.currencies, seed=5)
+    actuals, budget, fx = make_pl(spec), make_pl(spec, "budget"), make_fx(spec)
+    data = make_frames(spec, cubes=False)
+    start, end = spec.month_index[0], spec.month_index[-1]
+    pcts = np.linspace(-0.15, 0.15, args.scenarios)
+    tables = {f"{p:+.1%}": shifted_rates(data["fx"], p) for p in pcts}
+
+    t0 = time.perf_counter()
+    _project_usd(actuals, fx), _project_usd(budget, fx)
+    t_one = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    loop = []
+    for table in tables.values():
+        a, b = (compact_pl_frame(_project_usd(df, table)) for df in (actuals, budget))
+        loop.append(range_summary(a, b, start, end).loc["revenue", "actual_usd"])
+    t_loop = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    res = fx_scenarios(data, tables, start, end)
+    t_cold = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    fx_scenarios(data, tables, start, end)
+    t_warm = time.perf_counter() - t0
+    assert np.allclose(res["scenarios"]["revenue_usd"].to_numpy()[1:], loop)
+
+    cube = local_cube(data["actuals_usd"])
+    print(f"rows={args.rows:,} currencies={args.currencies} scenarios={args.scenarios} "
+          f"local cube {cube.values.shape} {cube.values.nbytes / 1024:.0f} KB")
+    print(f"  one projection (actuals+budget)    {t_one * 1e3:>9.1f} ms")
+    print(f"  re-project per scenario            {t_loop * 1e3:>9.1f} ms")
+    print(f"  fx_scenarios (builds local cubes)  {t_cold * 1e3:>9.1f} ms")
+    print(f"  fx_scenarios (cubes cached)        {t_warm * 1e3:>9.1f} ms")
+
+if __name__ == "__main__":
+    main()
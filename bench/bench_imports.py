@@ -0,0 +1,60 @@
+# bench/bench_imports.py
+"""
+Cold import cost of the entry points, from `python -X importtime` in fresh
+interpreters (median of --repeat runs), plus which heavy libraries each one
+pulls in.
+
+    python bench/bench_imports.py --repeat 5
+"""
+from __future__ import annotations
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+MODULES = (
+    "agent.intent_router",
+    "agent.tools.metrics",
+    "agent.tools.charts",
+    "agent.planners",
+    "agent.tools.pdf_export",
+    "agent.server",
+)
+HEAVY = ("pandas", "dateutil", "plotly", "reportlab", "kaleido")
+
+_LINE_RX = re.compile(r"import time:\s+\d+ \|\s+(\d+) \|( *)(\S+)")
+
+def import_time(module: str) -> Tuple[float, List[str]]:
+    """(cumulative ms of the top-level imports, heavy libraries loaded) for one cold import."""
+    probe = f"import sys, {module}; print(','.join(m for m in {HEAVY!r} if m in sys.modules))"
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", probe],
+                          capture_output=True, text=True, cwd=ROOT, check=True)
+    total = 0
+    for line in proc.stderr.splitlines():
+        m = _LINE_RX.match(line)
+        if m and len(m.group(2)) == 1:  # top level: one space of indent
+            total += int(m.group(1))
+    return total / 1e3, [m for m in proc.stdout.strip().split(",") if m]
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("modules", nargs="*", default=list(MODULES))
+    args = ap.parse_args()
+
+    print(f"{'module':<26} {'median ms':>10} {'min ms':>8}  heavy deps loaded")
+    for mod in args.modules:
+        runs: List[float] = []
+        loaded: List[str] = []
+        for _ in range(args.repeat):
+            ms, loaded = import_time(mod)
+            runs.append(ms)
+        print(f"{mod:<26} {statistics.median(runs):>10.0f} {min(runs):>8.0f}  {', '.join(loaded) or '-'}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+# bench/bench_months.py
+"""
+Month normalization: row-by-row parse_month_to_period vs. to_month_periods.
+
+    python bench/bench_months.py --rows 5000000 --legacy-rows 200000
+"""
+from __future__ import annotations
+import argparse
+import os
+import sys
+import time
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from agent.tools.finance_utils import parse_month_to_period, to_month_periods
+from synthetic import make_month_labels
+
+def _time(fn) -> float:
+    t0 = time.perf_counter()
+    fn()
+    return time.perf_counter() - t0
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=5_000_000)
+    ap.add_argument("--legacy-rows", type=int, default=200_000,
+                    help="rows for the row-by-row path (extrapolated to --rows)")
+    args = ap.parse_args()
+
+    big = make_month_labels(args.rows)
+    small = make_month_labels(args.legacy_rows)
+    scale = args.rows / args.legacy_rows
+    print(f"{'input':>10} {'legacy est. (s)':>16} {'vectorized (s)':>15}")
+    for name in big:
+        legacy = _time(lambda: small[name].map(parse_month_to_period)) * scale
+        fast = _time(lambda: to_month_periods(big[name]))
+        print(f"{name:>10} {legacy:>16.1f} {fast:>15.2f}")
+
+if __name__ == "__main__":
+    main()
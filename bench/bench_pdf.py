@@ -0,0 +1,57 @@
+# bench/bench_pdf.py
+"""
+Board PDF export per chart renderer: cold (first export in the process) and
+warm build time, file size and peak traced memory. The plotly renderer
+needs kaleido with a Chrome/Chromium it can start; without one it is
+reported as unavailable.
+
+    python bench/bench_pdf.py --rows 200000 --repeat 5
+"""
+from __future__ import annotations
+import argparse
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from agent.tools.pdf_export import RENDERERS, build_board_pdf, png_cache
+from synthetic import SynthSpec, make_frames
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--rows", type=int, default=200_000)
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--renderers", nargs="+", default=list(RENDERERS), choices=RENDERERS)
+    args = ap.parse_args()
+
+    data = make_frames(SynthSpec(rows=args.rows))
+    month = data["cash_usd"]["month"].max()
+    print(f"{'renderer':<9} {'cold ms':>9} {'warm ms':>9} {'KiB':>8} {'peak MiB':>9}")
+    for renderer in args.renderers:
+        try:
+            t0 = time.perf_counter()
+            build_board_pdf(data, month, renderer=renderer)
+            cold = time.perf_counter() - t0
+        except Exception as e:  # plotly without a browser for kaleido
+            first = next((line for line in str(e).splitlines() if line.strip()), "")
+            print(f"{renderer:<9} unavailable: {type(e).__name__}: {first[:70]}")
+            continue
+        runs = []
+        for _ in range(args.repeat):
+            png_cache.clear()  # time rendering, not cache hits
+            t0 = time.perf_counter()
+            pdf = build_board_pdf(data, month, renderer=renderer)
+            runs.append(time.perf_counter() - t0)
+        png_cache.clear()
+        tracemalloc.start()
+        build_board_pdf(data, month, renderer=renderer)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"{renderer:<9} {cold * 1e3:>9.1f} {statistics.median(runs) * 1e3:>9.1f} "
+              f"{len(pdf) / 1024:>8.1f} {peak / 2**20:>9.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# bench/bench_router.py
+"""
+Intent routing throughput: legacy keyword/regex chain vs. the compiled router.
+
+    python bench/bench_router.py --queries 1000000
+"""
+from __future__ import annotations
+import argparse
+import os
+import re
+import sys
+import time
+from typing import Any, Dict, List, Optional
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from agent.intent_router import MONTH_RX, YM_RX, route_intent, route_intents
+from agent.tools.finance_utils import parse_month_to_period
+from synthetic import make_queries
+
+# ---- the router before compilation, kept for comparison ----
+
+def _legacy_single_month(text: str) -> Optional[pd.Period]:
+    s = text.strip()
+    m1 = MONTH_RX.search(s)
+    if m1:
+        return parse_month_to_period(m1.group(0))
+    m2 = YM_RX.search(s)
+    if m2:
+        return pd.Period(f"{int(m2.group(1)):04d}-{int(m2.group(2)):02d}", freq="M")
+    return None
+
+def _legacy_last_n(text: str) -> Optional[int]:
+    m = re.search(r"last\s+(\d+)\s+months?", text, re.I)
+    if m:
+        return int(m.group(1))
+    if re.search(r"\btrend\b", text, re.I):
+        return 3
+    return None
+
+def legacy_route_intent(text: str) -> Dict[str, Any]:
+    t = text.strip().lower()
+    if "cash" in t and "runway" in t:
+        return {"intent": "cash_runway", "month": None, "last_n": None}
+    if "revenue" in t and ("budget" in t or "vs" in t):
+        return {"intent": "revenue_vs_budget", "month": _legacy_single_month(text), "last_n": None}
+    if ("gross margin" in t or "gm" in t) and ("trend" in t or "last" in t):
+        return {"intent": "gross_margin_trend", "month": None, "last_n": _legacy_last_n(text)}
+    if "opex" in t and ("breakdown" in t or "by category" in t):
+        return {"intent": "opex_breakdown", "month": _legacy_single_month(text), "last_n": None}
+    if "gross margin" in t:
+        return {"intent": "gross_margin_trend", "month": None, "last_n": 3}
+    return {"intent": None, "month": _legacy_single_month(text), "last_n": None}
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--queries", type=int, default=1_000_000)
+    ap.add_argument("--legacy-queries", type=int, default=200_000,
+                    help="queries for the legacy router (extrapolated to --queries)")
+    args = ap.parse_args()
+
+    queries = make_queries(args.queries)
+    sample = queries[:args.legacy_queries]
+    # the legacy router predates drill-downs ("by") and the ebitda intent
+    legacy_fields = ("intent", "month", "last_n")
+    assert [{k: r[k] for k in legacy_fields} for r in map(route_intent, sample)] == \
+        [legacy_route_intent(q) for q in sample]
+
+    t0 = time.perf_counter()
+    for q in sample:
+        legacy_route_intent(q)
+    legacy = (time.perf_counter() - t0) * len(queries) / len(sample)
+    t0 = time.perf_counter()
+    for q in queries:
+        route_intent(q)
+    single = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    route_intents(queries)
+    batch = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    route_intents(queries, dedupe=False)
+    batch_all = time.perf_counter() - t0
+
+    n = len(queries)
+    print(f"{n:,} queries ({len(set(queries)):,} distinct)")
+    for name, s in (("legacy route_intent (est.)", legacy), ("route_intent", single),
+                    ("route_intents, no dedupe", batch_all), ("route_intents", batch)):
+        print(f"{name:>28}: {s:6.2f}s  {n / s / 1e3:8.0f}k q/s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# bench/bench_server.py
+"""
+Latency of the async query server under concurrent analysts.
+
+    python bench/bench_server.py --clients 64 --requests 4000 --rows 1000000
+
+Starts agent.server in-process on synthetic data, then `--clients` keep-alive
+connections send /ask requests back to back (a mix of templated questions,
+--distinct of them, so the answer cache sees realistic reuse). Reports
+throughput, latency percentiles of successful requests and 503 rejections.
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from urllib.parse import quote
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+
+from synthetic import SynthSpec, make_frames, make_queries
+from agent.answer_cache import answer_cache
+from agent.server import FinanceServer, ServerConfig
+
+async def _client(port: int, queries, latencies, statuses) -> None:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        for q in queries:
+            t0 = time.perf_counter()
+            writer.write(f"GET /ask?figure=0&q={quote(q)} HTTP/1.1\r\nHost: bench\r\n\r\n".encode())
+            head = await reader.readuntil(b"\r\n\r\n")
+            length = int(head.split(b"Content-Length: ")[1].split(b"\r\n")[0])
+            json.loads(await reader.readexactly(length))
+            status = int(head.split(b" ", 2)[1])
+            statuses.append(status)
+            if status == 200:
+                latencies.append(time.perf_counter() - t0)
+            else:
+                await asyncio.sleep(0.01)
+    finally:
+        writer.close()
+
+async def run(args) -> None:
+    data = make_frames(SynthSpec(rows=args.rows, entities=args.entities))
+    server = FinanceServer(data, ServerConfig(port=0, ask_limit=args.ask_limit, ask_backlog=args.ask_backlog))
+    await server.start()
+    pool = make_queries(args.distinct)
+    per_client = args.requests // args.clients
+    rng = np.random.default_rng(5)
+    latencies, statuses = [], []
+    answer_cache.invalidate()
+    t0 = time.perf_counter()
+    await asyncio.gather(*[_client(server.port, [pool[i] for i in rng.integers(0, len(pool), per_client)],
+                                   latencies, statuses) for _ in range(args.clients)])
+    wall = time.perf_counter() - t0
+    await server.close()
+    lat = np.array(latencies) * 1e3
+    print(f"{len(statuses):,} requests from {args.clients} clients in {wall:.2f}s "
+          f"({len(statuses) / wall:,.0f} req/s); {statuses.count(503)} rejected (503)")
+    if len(lat):
+        p50, p95, p99 = np.percentile(lat, [50, 95, 99])
+        print(f"latency ms: p50 {p50:.1f}  p95 {p95:.1f}  p99 {p99:.1f}  max {lat.max():.1f}")
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=1_000_000)
+    ap.add_argument("--entities", type=int, default=200)
+    ap.add_argument("--clients", type=int, default=64)
+    ap.add_argument("--requests", type=int, default=4000)
+    ap.add_argument("--distinct", type=int, default=400, help="distinct questions in the mix")
+    ap.add_argument("--ask-limit", type=int, default=ServerConfig.ask_limit)
+    ap.add_argument("--ask-backlog", type=int, default=ServerConfig.ask_backlog)
+    asyncio.run(run(ap.parse_args()))
+
+if __name__ == "__main__":
+    main()
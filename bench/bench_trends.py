@@ -0,0 +1,63 @@
+# bench/bench_trends.py
+"""
+GM% trend and cash runway scaling vs. number of months on a large ledger.
+
+    python bench/bench_trends.py --rows 2000000 --months 12 24 60 120
+
+"legacy" re-implements the old per-month boolean-mask scans for comparison;
+"cube build" is the one-off aggregation done at load; the remaining columns
+are per-call costs once the cube exists.
+"""
+from __future__ import annotations
+import argparse
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from agent.tools.kpi_cube import build_kpi_cube, kpi_cube
+from agent.tools.metrics import gross_margin_pct_trend, cash_runway_months
+from synthetic import make_ledger
+
+def _legacy_gm_trend(df: pd.DataFrame, months: list) -> list:
+    out = []
+    for m in months:
+        in_month = df["month"] == m
+        rev = df.loc[in_month & (df["account_category"] == "Revenue"), "amount_usd"].sum()
+        cogs = df.loc[in_month & (df["account_category"] == "COGS"), "amount_usd"].sum()
+        out.append(None if rev == 0 else (rev - cogs) / rev)
+    return out
+
+def _timeit(fn, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=2_000_000)
+    ap.add_argument("--months", type=int, nargs="+", default=[12, 24, 60, 120])
+    ap.add_argument("--skip-legacy", action="store_true")
+    args = ap.parse_args()
+
+    print(f"{'months':>6} {'legacy GM (s)':>14} {'cube build (s)':>15} {'GM trend (ms)':>14} {'runway (ms)':>12}")
+    for n in args.months:
+        df = make_ledger(args.rows, n)
+        months = list(pd.period_range(pd.Period("2015-01", freq="M"), periods=n, freq="M"))
+        cash = pd.DataFrame({"month": months, "cash_usd": np.full(n, 5e7)})
+
+        legacy = float("nan") if args.skip_legacy else _timeit(lambda: _legacy_gm_trend(df, months), 1)
+        build = _timeit(lambda: build_kpi_cube(df))
+        kpi_cube(df)
+        gm = _timeit(lambda: gross_margin_pct_trend(df, months), 20)
+        runway = _timeit(lambda: cash_runway_months(df, cash, burn_lookback=n - 1), 20)
+        print(f"{n:>6} {legacy:>14.2f} {build:>15.2f} {gm*1e3:>14.2f} {runway*1e3:>12.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+# bench/run_suite.py
+"""
+End-to-end benchmark suite on synthetic data (see synthetic.py).
+
+    python bench/run_suite.py                                 # default scale
+    python bench/run_suite.py --rows 5000000 --workbook-rows 500000
+    python bench/run_suite.py --save bench/baseline.json      # record a baseline
+    python bench/run_suite.py --compare bench/baseline.json   # exit 1 on regressions
+
+Every case reports its best wall time over several runs and the peak
+Python-heap allocation (tracemalloc, one extra run) while it executes. The
+process peak RSS is recorded once at the end. Loader cases read a generated
+workbook (capped at Excel's sheet size), while metric, planner and PDF cases
+run on in-memory frames of `--rows` rows.
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+import pandas as pd
+
+from synthetic import SynthSpec, make_frames, make_queries, write_workbook
+from agent.tools import metrics
+from agent.tools.data_loader import load_finance_data
+from agent.tools.fx_scenarios import build_local_cube, fx_scenarios, shifted_rates
+from agent.tools.kpi_cube import build_kpi_cube
+from agent.tools.runway_scenarios import RunwayScenario, simulate_runway
+from agent.tools.stream_loader import peak_rss_mb
+from agent.intent_router import route_intent, route_intents
+from agent.planners import plan_and_answer, plan_and_answer_many
+
+Case = Tuple[str, Callable[[], Any], int]  # name, fn, repeat
+
+class Skip(Exception):
+    pass
+
+def _loader_cases(xlsx: Path) -> List[Case]:
+    return [
+        ("load: parse", lambda: load_finance_data(xlsx, cache=False), 1),
+        ("load: streaming", lambda: load_finance_data(xlsx, cache=False, streaming=True), 1),
+        ("load: warm cache", lambda: load_finance_data(xlsx, cache=True), 3),
+    ]
+
+def _metric_cases(data: Dict[str, Any]) -> List[Case]:
+    a, b, cash = data["actuals_usd"], data["budget_usd"], data["cash_usd"]
+    months = list(pd.PeriodIndex(a["month"].unique()).sort_values())
+    m = months[-1]
+    fx_tables = [shifted_rates(data["fx"], p) for p in np.linspace(-0.1, 0.1, 20)]
+    return [
+        ("cube: build actuals", lambda: build_kpi_cube(a), 3),
+        ("metric: revenue_vs_budget", lambda: metrics.revenue_vs_budget(a, b, m), 50),
+        ("metric: revenue_vs_budget_many", lambda: metrics.revenue_vs_budget_many(a, b, months), 20),
+        ("metric: gross_margin_pct_trend", lambda: metrics.gross_margin_pct_trend(a, months), 20),
+        ("metric: gross_margin_pct_trends", lambda: metrics.gross_margin_pct_trends(a, [months[-3:], months]), 20),
+        ("metric: opex_breakdown_by_category", lambda: metrics.opex_breakdown_by_category(a, m), 50),
+        ("metric: opex_breakdowns_by_category", lambda: metrics.opex_breakdowns_by_category(a, months), 20),
+        ("metric: ebitda_value", lambda: metrics.ebitda_value(a, m), 50),
+        ("metric: revenue_vs_budget_by entity", lambda: metrics.revenue_vs_budget_by(a, b, m), 20),
+        ("metric: opex_breakdown_by entity", lambda: metrics.opex_breakdown_by(a, m), 20),
+        ("metric: cash_runway_months", lambda: metrics.cash_runway_months(a, cash), 50),
+        ("metric: revenue_vs_budget_range", lambda: metrics.revenue_vs_budget_range(a, b, months[0], m), 50),
+        ("metric: range_summary", lambda: metrics.range_summary(a, b, months[-12], m), 50),
+        ("metric: opex_breakdown_range", lambda: metrics.opex_breakdown_range(a, months[-12], m), 50),
+        ("scenario: simulate_runway 50k x 36",
+         lambda: simulate_runway(a, cash, RunwayScenario(paths=50_000, horizon=36)), 3),
+        ("fx: build local cube actuals", lambda: build_local_cube(a), 3),
+        ("fx: fx_scenarios x20", lambda: fx_scenarios(data, fx_tables), 10),
+    ]
+
+def _router_cases(queries: List[str]) -> List[Case]:
+    return [
+        (f"router: route_intent x{len(queries):,}", lambda: [route_intent(q) for q in queries], 3),
+        (f"router: route_intents x{len(queries):,}", lambda: route_intents(queries), 3),
+    ]
+
+def _planner_cases(data: Dict[str, Any], month: pd.Period) -> List[Case]:
+    qs = {
+        "revenue": f"What was {month.strftime('%B %Y')} revenue vs budget?",
+        "gm": "Show Gross Margin % trend for the last 12 months",
+        "opex": f"Break down Opex by category for {month}",
+        "runway": "What is our cash runway right now?",
+        "revenue by entity": f"Revenue vs budget by entity for {month}",
+        "revenue ytd": "Revenue vs budget YTD",
+    }
+    dashboard = [q for p in pd.period_range(end=month, periods=12, freq="M")
+                 for q in (f"revenue vs budget {p}", f"opex breakdown {p}")] + [qs["gm"], qs["runway"]]
+    cases = [(f"plan: {k}", lambda q=q: plan_and_answer(q, data, cache=False), 10) for k, q in qs.items()]
+    cases.append((f"plan: many x{len(dashboard)}", lambda: plan_and_answer_many(dashboard, data, cache=False), 5))
+    cases.append(("plan: cached", lambda: plan_and_answer(qs["revenue"], data), 200))
+    return cases
+
+def _pdf_cases(data: Dict[str, Any], month: pd.Period) -> List[Case]:
+    from agent.tools.pdf_export import build_board_pdf, png_cache
+
+    def build():
+        png_cache.clear()  # time rendering, not cache hits
+        try:
+            return build_board_pdf(data, month)
+        except Exception as e:  # typically no headless browser for kaleido
+            first = next((line for line in str(e).splitlines() if line.strip()), "")
+            raise Skip(f"{type(e).__name__}: {first[:80]}") from e
+    return [("pdf: build_board_pdf", build, 2),
+            ("pdf: build_board_pdf vector", lambda: build_board_pdf(data, month, renderer="vector"), 5)]
+
+def _measure(fn: Callable[[], Any], repeat: int, memory: bool) -> Dict[str, Optional[float]]:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    peak = None
+    if memory:
+        tracemalloc.start()
+        try:
+            fn()
+            peak = tracemalloc.get_traced_memory()[1] / 1e6
+        finally:
+            tracemalloc.stop()
+    return {"seconds": best, "peak_mb": peak}
+
+def run(spec: SynthSpec, workbook_rows: int, n_queries: int, memory: bool, skip: List[str]) -> Dict[str, Any]:
+    results: Dict[str, Any] = {}
+
+    def record(cases: List[Case]) -> None:
+        for name, fn, repeat in cases:
+            if any(name.startswith(s) for s in skip):
+                continue
+            try:
+                results[name] = _measure(fn, repeat, memory)
+                r = results[name]
+                mem = f"{r['peak_mb']:9.1f} MB" if r["peak_mb"] is not None else ""
+                print(f"  {name:<42} {r['seconds'] * 1e3:12.3f} ms {mem}", flush=True)
+            except Skip as e:
+                results[name] = {"skipped": str(e)}
+                print(f"  {name:<42} skipped ({e})", flush=True)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        xlsx = Path(tmp) / "finance.xlsx"
+        if not all(any(name.startswith(s) for s in skip) for name, _, _ in _loader_cases(xlsx)):
+            t0 = time.perf_counter()
+            write_workbook(SynthSpec(**{**asdict(spec), "rows": workbook_rows, "budget_rows": None}), xlsx)
+            print(f"workbook: {workbook_rows:,} actuals rows written in {time.perf_counter() - t0:.1f}s")
+            load_finance_data(xlsx, cache=True)  # populate the cache for the warm case
+            record(_loader_cases(xlsx))
+
+    t0 = time.perf_counter()
+    data = make_frames(spec)
+    print(f"frames: {spec.rows:,} actuals rows generated in {time.perf_counter() - t0:.1f}s")
+    month = data["actuals_usd"]["month"].max()
+    record(_metric_cases(data))
+    record(_router_cases(make_queries(n_queries)))
+    record(_planner_cases(data, month))
+    record(_pdf_cases(data, month))
+    return {
+        "spec": asdict(spec),
+        "workbook_rows": workbook_rows,
+        "queries": n_queries,
+        "env": {"python": platform.python_version(), "pandas": pd.__version__, "numpy": np.__version__,
+                "machine": platform.machine(), "cpus": os.cpu_count()},
+        "results": results,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float, floor_ms: float) -> List[str]:
+    """Names of cases slower than baseline by more than `tolerance` (and `floor_ms`)."""
+    if current["spec"] != baseline["spec"] or current["workbook_rows"] != baseline["workbook_rows"]:
+        print("warning: baseline was recorded at a different scale; ratios are not like for like")
+    print(f"\n{'case':<42} {'baseline':>12} {'current':>12} {'ratio':>7}")
+    regressions = []
+    for name, base in baseline["results"].items():
+        cur = current["results"].get(name)
+        if cur is None or "seconds" not in cur or "seconds" not in base:
+            continue
+        ratio = cur["seconds"] / base["seconds"] if base["seconds"] else float("inf")
+        slow = ratio > 1 + tolerance and (cur["seconds"] - base["seconds"]) * 1e3 > floor_ms
+        if slow:
+            regressions.append(name)
+        print(f"{name:<42} {base['seconds'] * 1e3:10.3f}ms {cur['seconds'] * 1e3:10.3f}ms "
+              f"{ratio:6.2f}x{'  REGRESSION' if slow else ''}")
+    return regressions
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Benchmark loader, metrics, router, planner and PDF export.")
+    ap.add_argument("--rows", type=int, default=1_000_000, help="actuals rows for in-memory cases")
+    ap.add_argument("--workbook-rows", type=int, default=100_000, help="actuals rows in the loader workbook")
+    ap.add_argument("--months", type=int, default=60)
+    ap.add_argument("--entities", type=int, default=40)
+    ap.add_argument("--currencies", type=int, default=6)
+    ap.add_argument("--opex-categories", type=int, default=6)
+    ap.add_argument("--queries", type=int, default=10_000)
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass")
+    ap.add_argument("--skip", nargs="*", default=[], help="case name prefixes to skip, e.g. load pdf")
+    ap.add_argument("--save", help="write results JSON here (e.g. a new baseline)")
+    ap.add_argument("--compare", help="baseline JSON to compare against")
+    ap.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown (0.25 = +25%%)")
+    ap.add_argument("--floor-ms", type=float, default=1.0, help="ignore slowdowns smaller than this")
+    args = ap.parse_args(argv)
+
+    spec = SynthSpec(rows=args.rows, months=args.months, entities=args.entities, currencies=args.currencies,
+                     opex_categories=args.opex_categories, start="2020-01", seed=args.seed)
+    current = run(spec, args.workbook_rows, args.queries, not args.no_memory, args.skip)
+    print(f"peak RSS: {current['peak_rss_mb']:.0f} MB" if current["peak_rss_mb"] else "peak RSS: n/a")
+    if args.save:
+        Path(args.save).write_text(json.dumps(current, indent=2, default=str) + "\n")
+    if args.compare:
+        regressions = compare(current, json.loads(Path(args.compare).read_text()), args.tolerance, args.floor_ms)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,210 @@
+# bench/synthetic.py
+"""
+Deterministic synthetic finance data for benchmarks.
+
+    spec = SynthSpec(rows=5_000_000, months=60, entities=40, currencies=6)
+    data = make_frames(spec)               # same shape as load_finance_data()
+    write_workbook(SynthSpec(rows=200_000), "/tmp/finance.xlsx")
+
+Everything is generated with numpy from `spec.seed`, so the same spec always
+gives the same rows. Frames are built column-wise from integer codes and scale
+to tens of millions of rows. Workbooks are written row by row with openpyxl in
+write-only mode and are capped by Excel's sheet size (1,048,575 data rows).
+"""
+from __future__ import annotations
+import os
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from agent.tools.data_loader import (
+    compact_pl_frame, dataset_version, _compact_fx, _month_digests, _project_usd,
+)
+from agent.tools.kpi_cube import kpi_cube
+
+EXCEL_MAX_ROWS = 1_048_575
+CURRENCY_CODES = ["USD", "EUR", "GBP", "JPY", "CAD", "AUD", "CHF", "SEK", "NOK", "DKK", "SGD", "HKD"]
+OPEX_NAMES = ["Sales", "Marketing", "R&D", "G&A", "Facilities", "IT", "Travel", "Legal"]
+# amount ranges in reporting currency per account group
+_RANGES = {"Revenue": (1_000, 10_000), "COGS": (300, 4_000), "Opex": (100, 3_000)}
+
+@dataclass(frozen=True)
+class SynthSpec:
+    rows: int = 100_000              # actuals rows
+    budget_rows: Optional[int] = None  # default: rows // 2
+    months: int = 36
+    entities: int = 20
+    currencies: int = 4              # entity i reports in currency i % currencies; first is USD
+    opex_categories: int = 6
+    start: str = "2022-01"
+    seed: int = 7
+
+    @property
+    def month_index(self) -> pd.PeriodIndex:
+        return pd.period_range(self.start, periods=self.months, freq="M")
+
+    @property
+    def entity_names(self) -> List[str]:
+        return [f"E{i:03d}" for i in range(self.entities)]
+
+    @property
+    def currency_names(self) -> List[str]:
+        return (CURRENCY_CODES + [f"C{i:02d}" for i in range(len(CURRENCY_CODES), self.currencies)])[:self.currencies]
+
+    @property
+    def categories(self) -> List[str]:
+        names = (OPEX_NAMES + [f"Cat{i:02d}" for i in range(len(OPEX_NAMES), self.opex_categories)])
+        return ["Revenue", "COGS"] + [f"Opex:{n}" for n in names[:self.opex_categories]]
+
+def _category_weights(spec: SynthSpec) -> np.ndarray:
+    n_opex = spec.opex_categories
+    if not n_opex:
+        return np.array([0.6, 0.4])
+    return np.array([0.3, 0.2] + [0.5 / n_opex] * n_opex)
+
+def make_pl(spec: SynthSpec, kind: str = "actuals") -> pd.DataFrame:
+    """Raw P&L sheet (month, entity, account_category, amount, currency) in local currency."""
+    rows = spec.rows if kind == "actuals" else (spec.budget_rows if spec.budget_rows is not None else spec.rows // 2)
+    rng = np.random.default_rng([spec.seed, 0 if kind == "actuals" else 1])
+    months = spec.month_index
+    cats = spec.categories
+    ent = rng.integers(0, spec.entities, rows, dtype=np.int32)
+    cat = rng.choice(len(cats), rows, p=_category_weights(spec)).astype(np.int32)
+    lo = np.array([_RANGES[c.split(":")[0]][0] for c in cats], dtype=float)
+    hi = np.array([_RANGES[c.split(":")[0]][1] for c in cats], dtype=float)
+    amount = np.round(lo[cat] + rng.random(rows) * (hi[cat] - lo[cat]), 2)  # cents survive the xlsx round trip
+    cur_of_entity = np.arange(spec.entities, dtype=np.int32) % spec.currencies
+    return pd.DataFrame({
+        "month": pd.PeriodIndex.from_ordinals(months[0].ordinal + rng.integers(0, spec.months, rows), freq="M"),
+        "entity": _sorted_categorical(ent, spec.entity_names),
+        "account_category": _sorted_categorical(cat, cats),
+        "amount": amount,
+        "currency": _sorted_categorical(cur_of_entity[ent], spec.currency_names),
+    })
+
+def _sorted_categorical(codes: np.ndarray, labels: List[str]) -> pd.Categorical:
+    # sorted categories, as the loader's astype("category") produces
+    order = np.argsort(labels)
+    rank = np.empty(len(labels), dtype=np.int32)
+    rank[order] = np.arange(len(labels))
+    return pd.Categorical.from_codes(rank[codes], categories=[labels[i] for i in order])
+
+def make_fx(spec: SynthSpec) -> pd.DataFrame:
+    """Monthly rate_to_usd per currency: USD fixed at 1.0, others a small random walk."""
+    rng = np.random.default_rng([spec.seed, 2])
+    base = np.concatenate([[1.0], rng.uniform(0.5, 1.5, spec.currencies - 1)])
+    drift = np.cumprod(1 + rng.normal(0, 0.01, (spec.months, spec.currencies)), axis=0)
+    drift[:, 0] = 1.0
+    rates = np.round(base * drift, 6)
+    months = spec.month_index
+    return pd.DataFrame({
+        "month": months.repeat(spec.currencies),
+        "currency": np.tile(spec.currency_names, spec.months),
+        "rate_to_usd": rates.ravel(),
+    })
+
+def make_cash(spec: SynthSpec) -> pd.DataFrame:
+    rng = np.random.default_rng([spec.seed, 3])
+    burn = rng.uniform(-50_000, 250_000, spec.months)
+    return pd.DataFrame({"month": spec.month_index, "cash_usd": np.round(5e7 - np.cumsum(burn), 2)})
+
+def make_frames(spec: SynthSpec, cubes: bool = True) -> Dict[str, pd.DataFrame]:
+    """In-memory equivalent of load_finance_data() for `spec` (no workbook involved)."""
+    actuals, budget, fx, cash = make_pl(spec, "actuals"), make_pl(spec, "budget"), make_fx(spec), make_cash(spec)
+    data = {
+        "actuals_usd": compact_pl_frame(_project_usd(actuals, fx)),
+        "budget_usd": compact_pl_frame(_project_usd(budget, fx)),
+        "cash_usd": cash,
+        "fx": _compact_fx(fx),
+        "month_digests": _month_digests(actuals=actuals, budget=budget, fx=fx),
+    }
+    data["version"] = dataset_version(data)
+    if cubes:
+        kpi_cube(data["actuals_usd"])
+        kpi_cube(data["budget_usd"])
+    return data
+
+def write_workbook(spec: SynthSpec, path: str | Path, chunk_size: int = 100_000) -> Path:
+    """Write the four sheets load_finance_data expects; rows are streamed, not held as cells."""
+    import openpyxl
+
+    budget_rows = spec.budget_rows if spec.budget_rows is not None else spec.rows // 2
+    if max(spec.rows, budget_rows) > EXCEL_MAX_ROWS:
+        raise ValueError(f"an Excel sheet holds at most {EXCEL_MAX_ROWS:,} rows; use make_frames() beyond that")
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    wb = openpyxl.Workbook(write_only=True)
+
+    def sheet(name: str, df: pd.DataFrame) -> None:
+        ws = wb.create_sheet(name)
+        ws.append(list(df.columns))
+        for start in range(0, len(df), chunk_size):
+            block = df.iloc[start:start + chunk_size]
+            cols = [block[c].astype(str).tolist() if not pd.api.types.is_float_dtype(block[c])
+                    else block[c].tolist() for c in df.columns]
+            for row in zip(*cols):
+                ws.append(row)
+
+    sheet("actuals", make_pl(spec, "actuals"))
+    sheet("budget", make_pl(spec, "budget"))
+    sheet("fx", make_fx(spec))
+    cash = make_cash(spec)
+    sheet("cash", pd.DataFrame({"month": cash["month"], "entity": "Consolidated", "cash_usd": cash["cash_usd"]}))
+    wb.save(path)
+    return path
+
+# ---------- smaller generators used by the single-topic benchmarks ----------
+
+LEDGER_CATEGORIES = ["Revenue", "COGS", "Opex:Sales", "Opex:Marketing", "Opex:R&D", "Opex:G&A"]
+
+def make_ledger(rows: int, months: int, entities: int = 40, seed: int = 7) -> pd.DataFrame:
+    """USD ledger (month, entity, account_category, amount_usd) starting 2015-01, object labels."""
+    rng = np.random.default_rng(seed)
+    base = pd.Period("2015-01", freq="M").ordinal
+    return pd.DataFrame({
+        "month": pd.PeriodIndex.from_ordinals(base + rng.integers(0, months, rows), freq="M"),
+        "entity": rng.choice([f"E{i:03d}" for i in range(entities)], rows),
+        "account_category": rng.choice(LEDGER_CATEGORIES, rows, p=[0.3, 0.2, 0.125, 0.125, 0.125, 0.125]),
+        "amount_usd": rng.uniform(100, 10_000, rows),
+    })
+
+def make_month_labels(rows: int, seed: int = 3) -> Dict[str, pd.Series]:
+    """Month columns as the loader may see them: 'YYYY-MM', mixed with 'June 2025', datetime64."""
+    rng = np.random.default_rng(seed)
+    months = pd.period_range("2016-01", periods=120, freq="M")
+    picks = months[rng.integers(0, len(months), rows)]
+    ym = pd.Series(picks.strftime("%Y-%m"), dtype=object)
+    mixed = ym.copy()
+    mixed.iloc[::10] = picks[::10].strftime("%B %Y")  # 10% "June 2025"-style labels
+    return {"YYYY-MM": ym, "mixed": mixed, "datetime64": pd.Series(picks.to_timestamp())}
+
+QUERY_TEMPLATES = [
+    "What was {m} revenue vs budget in USD?",
+    "revenue vs budget {m}",
+    "Show Gross Margin % trend for the last {n} months.",
+    "GM trend",
+    "gross margin last {n} months by segment",
+    "Break down Opex by category for {m}.",
+    "opex breakdown {m} please",
+    "What is our cash runway right now?",
+    "CASH RUNWAY?",
+    "How did the segment budget look in {m}?",
+    "hello there",
+]
+
+def make_queries(n: int, seed: int = 11, start: str = "2019-01", months: int = 84) -> List[str]:
+    """Templated user questions with months in several spellings."""
+    rng = np.random.default_rng(seed)
+    periods = pd.period_range(start, periods=months, freq="M")
+    styles = ["%Y-%m", "%B %Y", "%b %Y", "%Y/%m"]
+    t = rng.integers(0, len(QUERY_TEMPLATES), n)
+    m = rng.integers(0, len(periods), n)
+    s = rng.integers(0, len(styles), n)
+    k = rng.integers(1, 13, n)
+    return [QUERY_TEMPLATES[ti].format(m=periods[mi].strftime(styles[si]), n=ki)
+            for ti, mi, si, ki in zip(t.tolist(), m.tolist(), s.tolist(), k.tolist())]
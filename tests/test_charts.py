@@ -0,0 +1,32 @@
+# tests/test_charts.py
+import numpy as np
+import pandas as pd
+from agent.tools.charts import MAX_POINTS, line_cash_trend, line_gm_trend, lttb
+
+def test_lttb_keeps_endpoints_and_extremes():
+    x = np.arange(10_000, dtype=float)
+    y = np.sin(x / 300)
+    y[4321], y[7777] = 50.0, -50.0
+    keep = lttb(x, y, 200)
+    assert len(keep) == 200 and keep[0] == 0 and keep[-1] == len(x) - 1
+    assert np.all(np.diff(keep) > 0)
+    assert {4321, 7777} <= set(keep.tolist())
+    assert np.array_equal(lttb(x[:50], y[:50], 200), np.arange(50))
+
+def test_short_series_are_drawn_as_before():
+    df = pd.DataFrame({"month": pd.period_range("2025-01", periods=12, freq="M"),
+                       "cash_usd": np.linspace(1e6, 2e6, 12), "gm_pct": [0.5] * 11 + [None]})
+    cash = line_cash_trend(df).data[0]
+    assert cash.type == "scatter" and cash.mode == "lines+markers"
+    assert list(cash.x) == [str(m) for m in df["month"]]
+    gm = line_gm_trend(df).data[0]
+    assert gm.y[0] == 50.0 and np.isnan(gm.y[-1])
+
+def test_long_series_are_downsampled_to_webgl():
+    n = 20_000
+    df = pd.DataFrame({"month": pd.date_range("1990-01-07", periods=n, freq="D"),
+                       "cash_usd": np.random.default_rng(0).normal(0, 1, n).cumsum()})
+    trace = line_cash_trend(df).data[0]
+    assert trace.type == "scattergl" and len(trace.y) == MAX_POINTS and trace.x[0] == "1990-01-07"
+    assert trace.y.max() == df["cash_usd"].max() or trace.y.min() == df["cash_usd"].min()
+    assert len(line_cash_trend(df, max_points=None).data[0].y) == n
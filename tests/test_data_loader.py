@@ -0,0 +1,136 @@
+# tests/test_data_loader.py
+import os
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from agent.tools.finance_utils import normalize_month_column, parse_month_to_period
+from agent.tools.data_loader import load_finance_data
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "..", "fixtures", "finance.xlsx")
+
+def test_normalize_month_column_matches_row_parser():
+    raw = ["2025-06", "June 2025", "2025/06", " 2024-3 ", datetime(2024, 3, 5), "Dec 2023", "2025-06"]
+    df = normalize_month_column(pd.DataFrame({"month": pd.Series(raw, dtype=object)}))
+    assert isinstance(df["month"].dtype, pd.PeriodDtype)
+    assert df["month"].tolist() == [parse_month_to_period(v) for v in raw]
+    # already-normalized frames pass straight through
+    assert normalize_month_column(df) is df
+    blank = normalize_month_column(pd.DataFrame({"month": ["2025-01", np.nan]}))
+    assert blank["month"].isna().tolist() == [False, True]
+
+def test_load_fixture_workbook():
+    data = load_finance_data(FIXTURE, cache=False)
+    a = data["actuals_usd"]
+    assert list(a.columns[:4]) == ["month", "entity", "account_category", "amount_usd"]
+    assert isinstance(a["month"].dtype, pd.PeriodDtype)
+    assert len(a) == 396 and a["amount_usd"].notna().all()
+    assert a["entity"].dtype == "category" and a["account_category"].dtype == "category"
+    assert (a["is_revenue"] == (a["account_category"] == "Revenue")).all()
+    opex = a[a["is_opex"]]
+    assert (("Opex:" + opex["opex_category"].astype(str)) == opex["account_category"].astype(str)).all()
+    assert a.loc[~a["is_opex"], "opex_category"].isna().all()
+    # local amounts are kept for FX reprojection
+    assert a["currency"].dtype == "category" and a["amount_local"].notna().all()
+    assert (a.loc[a["currency"] == "USD", "amount_local"] == a.loc[a["currency"] == "USD", "amount_usd"]).all()
+
+def test_parquet_sidecar_cache_tracks_workbook_content(tmp_path, monkeypatch):
+    import shutil
+    import pytest
+    from agent.tools import data_cache, data_loader
+    if not data_cache.cache_available():
+        pytest.skip("pyarrow not installed")
+    xlsx = tmp_path / "finance.xlsx"
+    shutil.copy(FIXTURE, xlsx)
+
+    cold = load_finance_data(xlsx)
+    assert (data_cache.cache_dir_for(xlsx) / "manifest.json").exists()
+
+    def _no_parse(_):
+        raise AssertionError("workbook parsed despite warm cache")
+    monkeypatch.setattr(data_loader, "_parse_workbook", _no_parse)
+    os.utime(xlsx)  # touched but unchanged -> still warm
+    warm = load_finance_data(xlsx)
+    for name in data_cache.CACHED_FRAMES:
+        pd.testing.assert_frame_equal(warm[name], cold[name])
+
+    with open(xlsx, "ab") as f:  # content change -> rebuild
+        f.write(b"\0")
+    with pytest.raises(AssertionError, match="workbook parsed"):
+        load_finance_data(xlsx)
+
+def test_streaming_loader_matches_eager_loader():
+    eager = load_finance_data(FIXTURE, cache=False)
+    stats = {}
+    streamed = load_finance_data(FIXTURE, cache=False, streaming=True, chunk_size=64, stats=stats)
+    for name in ("actuals_usd", "budget_usd", "cash_usd", "fx"):
+        pd.testing.assert_frame_equal(streamed[name], eager[name], check_dtype=False)
+    assert stats["rows"]["actuals"] == 396 and stats["chunks"]["actuals"] == 7
+    assert stats["buffer_peak_bytes"] > 0
+
+def test_project_usd_gathers_rates_and_reports_missing_pairs():
+    import pytest
+    from agent.tools.data_loader import DataLoadError, _project_usd
+    pl = pd.DataFrame({
+        "month": ["2025-01", "2025-01", "2025-02"],
+        "entity": ["US", "EU", "EU"],
+        "account_category": ["Revenue"] * 3,
+        "amount": [100, 200, 300],
+        "currency": ["USD", "eur", "EUR"],
+    })
+    fx = pd.DataFrame({
+        "month": ["2025-01", "2025-01", "2025-02", "2025-02"],
+        "currency": ["USD", "EUR", "USD", "EUR"],
+        "rate_to_usd": [1.0, 1.1, 1.0, 1.2],
+    })
+    out = _project_usd(pl, fx)
+    assert out["amount_usd"].tolist() == pytest.approx([100.0, 220.0, 360.0])
+
+    with pytest.raises(DataLoadError, match=r"Missing FX rate_to_usd .*'currency': 'EUR'"):
+        _project_usd(pl, fx.iloc[:3])
+    with pytest.raises(DataLoadError, match="Duplicate FX"):
+        _project_usd(pl, pd.concat([fx, fx.iloc[:1]]))
+
+def test_refresh_folds_in_appended_and_edited_months(tmp_path):
+    import shutil
+    import openpyxl
+    from agent.tools.kpi_cube import build_kpi_cube, kpi_cube
+    from agent.tools.refresh import refresh_finance_data
+    xlsx = tmp_path / "finance.xlsx"
+    shutil.copy(FIXTURE, xlsx)
+    prev = load_finance_data(xlsx, cache=False)
+    assert refresh_finance_data(xlsx, prev, cache=False) is prev
+
+    wb = openpyxl.load_workbook(xlsx)
+    wb["actuals"].append(["2026-01", "ParentCo", "Revenue", 5000, "USD"])
+    wb["actuals"].append(["2026-01", "NewCo", "Opex:Travel", 70, "EUR"])
+    wb["actuals"].cell(row=2, column=4).value = 1  # edit a 2023-01 row
+    wb["fx"].append(["2026-01", "USD", 1.0])
+    wb["fx"].append(["2026-01", "EUR", 1.2])
+    wb.save(xlsx)
+
+    stats = {}
+    new = refresh_finance_data(xlsx, prev, cache=False, stats=stats)
+    assert stats["mode"] == "incremental"
+    assert stats["changed_months"]["actuals"] == ["2023-01", "2026-01"]
+    full = load_finance_data(xlsx, cache=False)
+    for key in ("actuals_usd", "budget_usd"):
+        a, b = kpi_cube(new[key]), build_kpi_cube(full[key])
+        assert list(a.entities) == list(b.entities) and list(a.categories) == list(b.categories)
+        assert np.allclose(a.values, b.values) and (a.month_present == b.month_present).all()
+    assert new["actuals_usd"]["entity"].dtype == "category"
+    assert new["version"] == full["version"] != prev["version"]
+
+def test_loaded_frames_are_read_only_so_cubes_stay_valid():
+    import pytest
+    from agent.tools.kpi_cube import kpi_cube
+    from agent.tools.metrics import ebitda_value
+    data = load_finance_data(FIXTURE, cache=False)
+    actuals = data["actuals_usd"]
+    month = kpi_cube(actuals).present_months()[-1]
+    before = ebitda_value(actuals, month)
+    for col, value in (("amount_usd", 0.0), ("is_revenue", False), ("entity", actuals["entity"].iloc[-1])):
+        with pytest.raises(ValueError, match="read-only"):
+            actuals.loc[actuals.index[:1], col] = value
+    assert ebitda_value(actuals, month) == before
+    edited = actuals.assign(amount_usd=0.0)  # a new frame gets its own cube
+    assert kpi_cube(edited) is not kpi_cube(actuals) and ebitda_value(edited, month) == 0.0
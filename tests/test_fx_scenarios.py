@@ -0,0 +1,44 @@
+# tests/test_fx_scenarios.py
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from agent.tools.data_loader import compact_pl_frame, load_finance_data, _project_usd, _read_sheets
+from agent.tools.fx_scenarios import constant_rates, fx_scenarios, shifted_rates
+from agent.tools.metrics import range_summary
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "..", "fixtures", "finance.xlsx")
+
+def test_scenarios_match_reprojecting_the_workbook():
+    data = load_finance_data(FIXTURE, cache=False)
+    actuals, budget, fx, _ = _read_sheets(FIXTURE)
+    tables = {f"{p:+.0%}": shifted_rates(data["fx"], p) for p in (-0.1, 0.05, 0.1)}
+    tables["flat 2025-01"] = constant_rates(data["fx"], "2025-01")
+    res = fx_scenarios(data, tables, "2025-01", "2025-06")
+    s = res["scenarios"]
+    assert list(s.index) == ["reported", "-10%", "+5%", "+10%", "flat 2025-01"]
+
+    for name, table in (("reported", fx), ("-10%", tables["-10%"]), ("+10%", tables["+10%"])):
+        a, b = (compact_pl_frame(_project_usd(df, table)) for df in (actuals, budget))
+        ref = range_summary(a, b, res["start"], res["end"])
+        assert s.loc[name, "revenue_usd"] == pytest.approx(ref.loc["revenue", "actual_usd"])
+        assert s.loc[name, "ebitda_usd"] == pytest.approx(ref.loc["ebitda", "actual_usd"])
+        assert s.loc[name, "budget_ebitda_usd"] == pytest.approx(ref.loc["ebitda", "budget_usd"])
+        g = ref.loc["revenue", "actual_usd"]
+        assert s.loc[name, "gm_pct"] == pytest.approx((g - ref.loc["cogs", "actual_usd"]) / g)
+
+def test_constant_currency_split_adds_up():
+    data = load_finance_data(FIXTURE, cache=False)
+    res = fx_scenarios(data, [constant_rates(data["fx"], "2024-01", "2024-12"), {"EUR": 2.0}])
+    cc = res["constant_currency"]
+    assert np.allclose(cc["operational_usd"] + cc["fx_effect_usd"], cc["variance_usd"])
+    assert np.allclose(cc["variance_usd"], cc["actual_usd"] - cc["budget_cc_usd"])
+    assert (cc.loc["reported", "fx_effect_usd"] == 0).all()
+    # a pinned EUR rate moves only the EUR rows
+    eur = data["actuals_usd"]["currency"] == "EUR"
+    rev = data["actuals_usd"]["is_revenue"] & eur
+    moved = cc.loc[("scenario 2", "revenue"), "actual_cc_usd"] - cc.loc[("reported", "revenue"), "actual_cc_usd"]
+    expected = (data["actuals_usd"]["amount_local"][rev] * 2.0 - data["actuals_usd"]["amount_usd"][rev]).sum()
+    assert expected != 0 and moved == pytest.approx(expected)
+    with pytest.raises(ValueError, match="no amount_local"):
+        fx_scenarios({**data, "actuals_usd": data["actuals_usd"].drop(columns=["amount_local"])}, [{}])
@@ -0,0 +1,21 @@
+# tests/test_imports.py
+import os
+import subprocess
+import sys
+import pytest
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+
+def _loaded(module: str, heavy=("pandas", "dateutil", "plotly", "reportlab", "kaleido")) -> set:
+    code = f"import sys, {module}; print(' '.join(m for m in {heavy!r} if m in sys.modules))"
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True, cwd=ROOT).stdout
+    return set(out.split())
+
+@pytest.mark.parametrize("module, allowed", [
+    ("agent.intent_router", set()),
+    ("agent.tools.metrics", {"pandas", "dateutil"}),
+    ("agent.planners", {"pandas", "dateutil"}),
+    ("agent.tools.pdf_export", {"pandas", "dateutil"}),
+])
+def test_heavy_libraries_load_on_first_use(module, allowed):
+    assert _loaded(module) <= allowed
@@ -17,3 +17,84 @@ def test_route_intent_variants():
 
     r = route_intent("What is our cash runway right now?")
     assert r["intent"] == "cash_runway"
+
+def test_route_intents_matches_route_intent():
+    from agent.intent_router import route_intents
+    queries = [
+        "What was June 2025 revenue vs budget in USD?",
+        "segment budgetrend for revenue",        # overlapping "budget"/"trend"; "gm" in "segment" is no keyword
+        "GM last 6 months",
+        "opex by category 2024/7",
+        "What was June 2025 revenue vs budget in USD?",
+        "nothing here",
+    ]
+    batch = route_intents(queries)
+    assert batch == [route_intent(q) for q in queries]
+    assert batch[0] is not batch[4]
+    assert batch[1]["intent"] == "revenue_vs_budget"
+    assert batch[2]["last_n"] == 6
+
+def test_route_runway_scenarios():
+    assert route_intent("Simulate cash runway scenarios under revenue shocks")["intent"] == "runway_scenarios"
+    assert route_intent("runway percentiles")["intent"] == "runway_scenarios"
+    assert route_intent("What is our cash runway right now?")["intent"] == "cash_runway"
+
+def test_route_drilldowns_by_entity():
+    r = route_intent("Revenue vs budget by entity for June 2025")
+    assert r["intent"] == "revenue_vs_budget" and r["by"] == "entity" and str(r["month"]) == "2025-06"
+    assert route_intent("Which entity drives opex?")["intent"] == "opex_breakdown"
+    r = route_intent("Gross margin by segment over the last 6 months")
+    assert r["intent"] == "gross_margin_trend" and r["by"] == "entity" and r["last_n"] == 6
+    r = route_intent("Gross margin by entity")
+    assert r["by"] == "entity" and r["last_n"] is None  # planner's default window applies
+    r = route_intent("EBITDA for 2025-05")
+    assert r["intent"] == "ebitda" and r["by"] is None
+    assert route_intent("segment budgetrend for revenue")["by"] is None
+    # opex/EBITDA questions that name the drill-down keep their own intent
+    for q, intent in [("Which entity drove opex last month?", "opex_breakdown"),
+                      ("EBITDA by entity for the last 3 months", "ebitda"),
+                      ("Which segment had the best EBITDA trend?", "ebitda")]:
+        r = route_intent(q)
+        assert r["intent"] == intent and r["by"] == "entity", q
+
+def test_segment_drilldowns_keep_their_intent():
+    for q, intent in [("Which segment drove opex last month?", "opex_breakdown"),
+                      ("opex by segment Q2 2025", "opex_breakdown"),
+                      ("Opex by entity trend", "opex_breakdown"),
+                      ("EBITDA by segment last 3 months", "ebitda"),
+                      ("EBITDA per entity for H1 2025", "ebitda"),
+                      ("revenue by segment last 3 months", "revenue_vs_budget"),
+                      ("GM by segment last 3 months", "gross_margin_trend")]:
+        r = route_intent(q)
+        assert r["intent"] == intent and r["by"] == "entity", q
+
+def test_month_names_route_without_dateutil():
+    from agent.tools.finance_utils import parse_month_to_period
+    for label in ("January 2025", "feb 2024", "Sept 2025", "SEPTEMBER 2023", "Dec  2026"):
+        r = route_intent(f"opex breakdown for {label}")
+        assert r["month"] == parse_month_to_period(" ".join(label.split()))
+
+def test_month_ranges():
+    P = lambda s: pd.Period(s, freq="M")
+    latest = P("2025-05")
+    cases = {
+        "Revenue vs budget Q2 2025": ("Q2 2025", "2025-04", "2025-06"),
+        "revenue YTD": ("YTD", "2025-01", "2025-05"),
+        "GM% for H1": ("H1", "2025-01", "2025-06"),
+        "opex breakdown for Jan–Jun 2025": ("Jan–Jun 2025", "2025-01", "2025-06"),
+        "EBITDA for Nov 2024 - Feb 2025": ("Nov 2024–Feb 2025", "2024-11", "2025-02"),
+        "ebitda FY24": ("FY2024", "2024-01", "2024-12"),
+        "ebitda Q3": ("Q3", "2024-07", "2024-09"),  # latest Q3 that has started
+        "revenue from 2025-01 to 2025-03 by entity": ("Jan 2025–Mar 2025", "2025-01", "2025-03"),
+        "opex quarter to date": ("QTD", "2025-04", "2025-05"),
+        # written backwards: the ends are swapped
+        "revenue 2025-06 to 2025-01": ("Jan 2025–Jun 2025", "2025-01", "2025-06"),
+        "opex Jun 2025 to Jan 2025": ("Jan 2025–Jun 2025", "2025-01", "2025-06"),
+    }
+    for q, (label, start, end) in cases.items():
+        r = route_intent(q)
+        assert r["month"] is None and r["range"].label == label, q
+        assert r["range"].resolve(latest) == (P(start), P(end)), q
+    r = route_intent("revenue vs budget June 2025")
+    assert r["range"] is None and str(r["month"]) == "2025-06"
+    assert route_intent("gm trend last 6 months")["range"] is None
@@ -67,3 +67,106 @@ def test_opex_breakdown_and_runway():
     ans = cash_runway_months(actuals, cash, asof=m4, burn_lookback=3)
     assert ans["months_used"] == [m1,m2,m3]
     assert round(ans["runway_months"], 1) == round(2000/(100/3), 1)
+
+def test_kpi_cube_is_built_once_per_frame():
+    from agent.tools.kpi_cube import kpi_cube
+    m = _mk_period("2025-06")
+    actuals = pd.DataFrame({
+        "month": [m, m, m, _mk_period("2025-08")],
+        "entity": ["A", "B", "B", "A"],
+        "account_category": ["Opex:Sales", "Opex:Sales", "Opex:IT", "Revenue"],
+        "amount_usd": [10.0, 5.0, 30.0, 99.0],
+    })
+    cube = kpi_cube(actuals)
+    assert kpi_cube(actuals) is cube
+    ob = opex_breakdown_by_category(actuals, m)
+    assert list(ob.index) == ["IT", "Sales"]
+    assert ob["Sales"] == 15.0
+    # months without rows are on the cube axis but not "present"
+    assert [str(p) for p in cube.present_months()] == ["2025-06", "2025-08"]
+    assert ebitda_value(actuals, _mk_period("2025-07")) == 0.0
+
+def test_gm_trend_none_for_zero_revenue_and_zero_burn():
+    m1, m2, m3 = map(_mk_period, ["2025-04", "2025-05", "2025-06"])
+    actuals = pd.DataFrame({
+        "month": [m1, m1, m2],
+        "entity": ["A"]*3,
+        "account_category": ["Revenue", "COGS", "COGS"],
+        "amount_usd": [500.0, 100.0, 50.0],
+    })
+    gm = gross_margin_pct_trend(actuals, [m1, m2, m3])
+    assert abs(gm["gm_pct"].iloc[0] - 0.8) < 1e-9
+    assert pd.isna(gm["gm_pct"].iloc[1]) and pd.isna(gm["gm_pct"].iloc[2])
+
+    cash = pd.DataFrame({"month": [m2, m3], "cash_usd": [900.0, 1000.0]})
+    ans = cash_runway_months(actuals, cash, asof=m3, burn_lookback=1)
+    assert ans["months_used"] == [m2]
+    assert ans["avg_burn_usd"] == 50.0 and ans["runway_months"] == 20.0
+    ans = cash_runway_months(actuals, cash, asof=m2, burn_lookback=1)
+    assert ans["avg_burn_usd"] == 0.0 and ans["runway_months"] is None
+
+def test_drilldowns_by_entity_and_by_other_columns():
+    from agent.tools.metrics import revenue_vs_budget_by, gross_margin_pct_by, opex_breakdown_by, ebitda_by
+    m1, m2 = _mk_period("2025-05"), _mk_period("2025-06")
+    actuals = pd.DataFrame({
+        "month": [m2, m2, m2, m2, m2, m1],
+        "entity": ["A", "A", "A", "B", "B", "C"],
+        "region": ["EU", "EU", "EU", "US", "US", "US"],
+        "account_category": ["Revenue", "COGS", "Opex:Sales", "Revenue", "Opex:IT", "Revenue"],
+        "amount_usd": [1000.0, 400.0, 100.0, 500.0, 50.0, 70.0],
+    })
+    budget = pd.DataFrame({
+        "month": [m2, m2], "entity": ["A", "D"], "region": ["EU", "US"],
+        "account_category": ["Revenue", "Revenue"], "amount_usd": [800.0, 10.0],
+    })
+    rv = revenue_vs_budget_by(actuals, budget, m2)
+    assert list(rv.index) == ["A", "B", "D"]  # C has no rows in m2
+    assert rv.loc["A", "variance_usd"] == 200.0 and rv.loc["A", "variance_pct"] == 0.25
+    assert pd.isna(rv.loc["B", "variance_pct"]) and rv.loc["D", "revenue_actual_usd"] == 0.0
+    assert rv["revenue_actual_usd"].sum() == revenue_vs_budget(actuals, budget, m2)["revenue_actual_usd"]
+
+    gm = gross_margin_pct_by(actuals, [m1, m2])
+    assert gm.loc["A", "gm_pct"] == 0.6 and gm.loc["C", "gm_pct"] == 1.0
+
+    ob = opex_breakdown_by(actuals, m2)
+    assert list(ob.columns) == ["Sales", "IT"] and ob.loc["B", "IT"] == 50.0
+
+    eb = ebitda_by(actuals, m2)
+    assert eb.to_dict() == {"A": 500.0, "B": 450.0} and eb.sum() == ebitda_value(actuals, m2)
+    by_region = ebitda_by(actuals, m2, by="region")
+    assert by_region.to_dict() == {"EU": 500.0, "US": 450.0}
+    both = revenue_vs_budget_by(actuals, budget, m2, by=["region", "entity"])
+    assert both.loc[("US", "D"), "revenue_budget_usd"] == 10.0
+
+def test_range_metrics_match_month_by_month_sums():
+    import numpy as np
+    from agent.tools.metrics import (
+        revenue_vs_budget_range, gross_margin_pct_range, opex_breakdown_range, ebitda_range, range_summary,
+        revenue_vs_budget_by,
+    )
+    months = pd.period_range("2024-11", "2025-06", freq="M")
+    rng = np.random.default_rng(3)
+    rows = [(m, e, c, float(rng.integers(1, 100)))
+            for m in months if m != _mk_period("2025-02")  # a month without data
+            for e in ("A", "B") for c in ("Revenue", "COGS", "Opex:IT", "Opex:Sales")]
+    actuals = pd.DataFrame(rows, columns=["month", "entity", "account_category", "amount_usd"])
+    budget = actuals.assign(amount_usd=actuals["amount_usd"] * 1.1)
+    start, end = _mk_period("2024-12"), _mk_period("2025-03")
+    span = list(pd.period_range(start, end, freq="M"))
+
+    r = revenue_vs_budget_range(actuals, budget, start, end)
+    want = sum(revenue_vs_budget(actuals, budget, m)["revenue_actual_usd"] for m in span)
+    assert abs(r["revenue_actual_usd"] - want) < 1e-9 and r["months"] == 3
+    assert abs(r["revenue_avg_usd"] - want / 3) < 1e-9 and abs(r["variance_pct"] + 1 / 11) < 1e-9
+    gm = gross_margin_pct_range(actuals, start, end)
+    assert abs(gm["gm_pct"] - (gm["revenue_usd"] - gm["cogs_usd"]) / gm["revenue_usd"]) < 1e-12
+    e = ebitda_range(actuals, start, end)
+    assert abs(e["ebitda_usd"] - sum(ebitda_value(actuals, m) for m in span)) < 1e-9
+    ox = opex_breakdown_range(actuals, start, end)
+    assert abs(ox["IT"] - sum(opex_breakdown_by_category(actuals, m).get("IT", 0.0) for m in span)) < 1e-9
+    summary = range_summary(actuals, budget, start, end)
+    assert abs(summary.loc["ebitda", "actual_usd"] - e["ebitda_usd"]) < 1e-9
+    # ranges reaching past the data read as zero; by-entity ranges use the same running totals
+    assert revenue_vs_budget_range(actuals, budget, _mk_period("2030-01"), _mk_period("2030-12"))["months"] == 0
+    by = revenue_vs_budget_by(actuals, budget, span)
+    assert abs(by["revenue_actual_usd"].sum() - r["revenue_actual_usd"]) < 1e-9
@@ -0,0 +1,159 @@
+# tests/test_pdf_export.py
+import os
+import re
+import time
+from io import BytesIO
+import pandas as pd
+import pytest
+
+pytest.importorskip("reportlab")
+from PIL import Image
+from agent.tools import pdf_export
+from agent.tools.data_loader import load_finance_data
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "..", "fixtures", "finance.xlsx")
+
+def _png() -> bytes:
+    buf = BytesIO()
+    Image.new("RGB", (18, 10), "white").save(buf, format="PNG")
+    return buf.getvalue()
+
+@pytest.fixture
+def slow_renderer(monkeypatch):
+    """Stand-in for kaleido: fixed latency per chart, no browser needed."""
+    png, spans = _png(), []
+    def render(fig, scale=2.0, width=900, height=500):
+        t0 = time.perf_counter()
+        time.sleep(0.3)
+        spans.append((t0, time.perf_counter()))
+        return png
+    monkeypatch.setattr(pdf_export, "_plotly_fig_to_png_bytes", render)
+    return spans
+
+def test_board_pdf_renders_charts_concurrently(slow_renderer):
+    data = load_finance_data(FIXTURE, cache=False)
+    pdf_export.warm_renderer(start_browser=False)
+    pdf = pdf_export.build_board_pdf(data, pd.Period("2025-06", freq="M"))
+    assert pdf.startswith(b"%PDF")
+    assert len(slow_renderer) == 3
+    assert max(s for s, _ in slow_renderer) < min(e for _, e in slow_renderer)  # all three in flight at once
+
+def test_batch_export_writes_one_pack_per_month_and_entity(slow_renderer, tmp_path):
+    import zipfile
+    from agent.tools.batch_export import export_board_packs
+    data = load_finance_data(FIXTURE, cache=False)
+    months = [pd.Period("2025-05", freq="M"), pd.Period("2025-06", freq="M")]
+    entities = sorted(data["actuals_usd"]["entity"].unique())[:2]
+    results = export_board_packs(data, months, tmp_path / "packs.zip", entities=entities, workers=0,
+                                 png_cache_dir=tmp_path / "png")
+    assert len(results) == 4 and all(r.seconds > 0 for r in results)
+    assert pdf_export.png_cache.disk_dir is None  # the caller's cache is left as it was
+    with zipfile.ZipFile(tmp_path / "packs.zip") as zf:
+        names = sorted(zf.namelist())
+        assert names == sorted(r.filename for r in results)
+        assert all(zf.read(n).startswith(b"%PDF") for n in names)
+
+def test_png_cache_renders_identical_figures_once(monkeypatch, tmp_path):
+    from agent.tools.charts import line_cash_trend
+    from agent.tools.render_cache import PngCache
+    calls = []
+    def rasterize(fig, scale=2.0, width=900, height=500):
+        calls.append(fig)
+        return _png()
+    monkeypatch.setattr(pdf_export, "_rasterize_png", rasterize)
+    monkeypatch.setattr(pdf_export, "png_cache", PngCache(disk_dir=tmp_path))
+    df = pd.DataFrame({"month": ["2025-01", "2025-02"], "cash_usd": [1.0, 2.0]})
+    a = pdf_export._plotly_fig_to_png_bytes(line_cash_trend(df))
+    b = pdf_export._plotly_fig_to_png_bytes(line_cash_trend(df))
+    pdf_export._plotly_fig_to_png_bytes(line_cash_trend(df), width=600)
+    assert a == b and len(calls) == 2
+    assert pdf_export.png_cache.stats()["hits"] == 1
+
+    # a fresh process-local tier still hits through the shared disk tier
+    monkeypatch.setattr(pdf_export, "png_cache", PngCache(disk_dir=tmp_path))
+    pdf_export._plotly_fig_to_png_bytes(line_cash_trend(df))
+    assert len(calls) == 2 and pdf_export.png_cache.stats()["disk_hits"] == 1
+
+def test_board_pdf_stage_timings(slow_renderer):
+    from agent.tools import timing
+    data = load_finance_data(FIXTURE, cache=False)
+    pdf_export.warm_renderer(start_browser=False)
+    timing.reset()
+    timing.set_enabled(True)
+    try:
+        pdf_export.build_board_pdf(data, pd.Period("2025-06", freq="M"))
+    finally:
+        timing.set_enabled(False)
+    spans = timing.recent_traces(1)[0]["spans"]
+    assert {"pdf.metrics", "pdf.figures", "pdf.rasterize", "pdf.assembly", "pdf.render_wait", "pdf.total"} <= spans.keys()
+    assert spans["pdf.rasterize"] >= 0.9  # three charts, timed on the pool threads
+
+def test_vector_renderer_draws_charts_without_kaleido(monkeypatch):
+    def no_raster(*args, **kwargs):
+        raise AssertionError("vector renderer rasterized a chart")
+    monkeypatch.setattr(pdf_export, "_plotly_fig_to_png_bytes", no_raster)
+    data = load_finance_data(FIXTURE, cache=False)
+    month = pd.Period("2025-06", freq="M")
+    pdf = pdf_export.build_board_pdf(data, month, subtitle="EU", renderer="vector")
+    assert pdf.startswith(b"%PDF") and b"/Subtype /Image" not in pdf
+    assert len(re.findall(rb"/Type /Page\b", pdf)) == 2
+    with pytest.raises(ValueError, match="unknown PDF renderer"):
+        pdf_export.build_board_pdf(data, month, renderer="svg")
+
+def test_bad_renderer_setting_falls_back_to_plotly(monkeypatch):
+    monkeypatch.setenv("FPNA_PDF_RENDERER", "Vector")
+    assert pdf_export._default_renderer() == "vector"
+    monkeypatch.setenv("FPNA_PDF_RENDERER", "svg")
+    with pytest.warns(UserWarning, match="FPNA_PDF_RENDERER"):
+        assert pdf_export._default_renderer() == "plotly"
+
+def test_batch_export_with_worker_processes(tmp_path):
+    import zipfile
+    from agent.tools.batch_export import export_board_packs
+    data = load_finance_data(FIXTURE, cache=False)
+    months = [pd.Period("2025-05", freq="M"), pd.Period("2025-06", freq="M")]
+    entities = sorted(data["actuals_usd"]["entity"].unique())[:2]
+    results = export_board_packs(data, months, tmp_path / "packs.zip", entities=entities, workers=2,
+                                 renderer="vector")
+    assert len(results) == 4
+    with zipfile.ZipFile(tmp_path / "packs.zip") as zf:
+        assert sorted(zf.namelist()) == sorted(r.filename for r in results)
+        assert all(zf.read(n).startswith(b"%PDF") for n in zf.namelist())
+
+def test_batch_export_workers_attach_to_the_published_dataset(tmp_path):
+    import zipfile
+    from agent.tools import batch_export, shared_data
+    data = load_finance_data(FIXTURE, cache=False)
+    assert batch_export._published(data, tmp_path / "shm") is None  # not published: workers get a copy
+    shared_data.publish(data, tmp_path / "shm")
+    assert batch_export._published(data, tmp_path / "shm") == (str(tmp_path / "shm"), data["version"])
+    months = [pd.Period("2025-06", freq="M")]
+    results = batch_export.export_board_packs(data, months, tmp_path / "packs.zip", workers=1, renderer="vector",
+                                              shared_dir=tmp_path / "shm")
+    with zipfile.ZipFile(tmp_path / "packs.zip") as zf:
+        assert zf.namelist() == [r.filename for r in results] == ["fpna_board_2025-06.pdf"]
+
+def test_serial_batch_exports_do_not_share_state(tmp_path, monkeypatch):
+    from concurrent.futures import ThreadPoolExecutor
+    from agent.tools import batch_export
+    def build(data, month, subtitle=None, renderer=None):
+        time.sleep(0.05)  # let the two exports interleave
+        return data["version"].encode()
+    monkeypatch.setattr(pdf_export, "build_board_pdf", build)
+    data = load_finance_data(FIXTURE, cache=False)
+    months = list(pd.period_range("2025-01", "2025-06", freq="M"))
+    def run(version):
+        batch_export.export_board_packs(dict(data, version=version), months, tmp_path / version, workers=0)
+    with ThreadPoolExecutor(2) as pool:
+        list(pool.map(run, ["a", "b"]))
+    for version in ("a", "b"):
+        assert {f.read_bytes() for f in (tmp_path / version).iterdir()} == {version.encode()}
+    assert batch_export._worker_data is None
+
+def test_pack_names_never_collide():
+    from agent.tools.batch_export import pack_filename, pack_slugs
+    slugs = pack_slugs([None, "A/B", "A B", "a-b", "A/B", "Ünïcode"])
+    assert slugs == {None: None, "A/B": "A-B", "A B": "A-B-2", "a-b": "a-b-3", "Ünïcode": "Ünïcode"}
+    month = pd.Period("2025-06", freq="M")
+    assert pack_filename(month) == "fpna_board_2025-06.pdf"
+    assert pack_filename(month, "A B", slugs["A B"]) == "fpna_board_2025-06_A-B-2.pdf"
@@ -0,0 +1,94 @@
+# tests/test_planners.py
+import os
+from agent.answer_cache import answer_cache
+from agent.planners import plan_and_answer, plan_and_answer_many
+from agent.tools.data_loader import load_finance_data
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "..", "fixtures", "finance.xlsx")
+
+def test_answers_are_cached_per_dataset_version():
+    answer_cache.invalidate()
+    data = load_finance_data(FIXTURE, cache=False)
+    first = plan_and_answer("What is our cash runway right now?", data)
+    again = plan_and_answer("cash runway?", data)  # same routed query
+    assert again["text"] == first["text"] and again["figure"] is first["figure"]
+    assert answer_cache.stats()["hits"] == 1
+
+    reloaded = dict(data, version="other")
+    assert plan_and_answer("cash runway?", reloaded)["figure"] is not first["figure"]
+    assert plan_and_answer("cash runway?", data, cache=False)["text"] == first["text"]
+
+def test_plan_and_answer_many_matches_single_queries():
+    from agent.planners import plan_and_answer_many
+    data = load_finance_data(FIXTURE, cache=False)
+    queries = [
+        "What was June 2025 revenue vs budget in USD?",
+        "revenue vs budget",                      # defaults to the latest month
+        "Show Gross Margin % trend for the last 3 months.",
+        "GM trend last 12 months",
+        "Break down Opex by category for 2025-05.",
+        "opex breakdown for Jan 2031",            # month without data
+        "What is our cash runway right now?",
+        "What was June 2025 revenue vs budget in USD?",
+        "hello",
+    ]
+    many = plan_and_answer_many(queries, data, cache=False)
+    for q, got in zip(queries, many):
+        want = plan_and_answer(q, data, cache=False)
+        assert got["intent"] == want["intent"] and got["text"] == want["text"]
+        if want["figure"] is None:
+            assert got["figure"] is None
+        else:
+            assert got["figure"].to_json() == want["figure"].to_json()
+    assert many[0]["figure"] is many[7]["figure"]
+
+def test_timings_are_reported_only_when_enabled():
+    from agent.tools import timing
+    data = load_finance_data(FIXTURE, cache=False)
+    assert "timings" not in plan_and_answer("Show GM trend for the last 3 months", data, cache=False)
+    timing.reset()
+    timing.set_enabled(True)
+    try:
+        ans = plan_and_answer("Show GM trend for the last 3 months", data, cache=False)
+    finally:
+        timing.set_enabled(False)
+    stages = ans["timings"]
+    assert {"plan.route", "plan.metric", "plan.text", "plan.figure", "plan.total"} <= stages.keys()
+    assert stages["plan.total"] >= stages["plan.metric"] > 0
+    assert ans["figure_bytes"] == len(ans["figure"].to_json().encode())
+    assert timing.recent_traces(1)[0]["label"] == "plan"
+    prom = timing.prometheus_text()
+    assert 'fpna_stage_seconds_bucket{stage="plan.total",le="+Inf"} 1' in prom
+    assert 'fpna_stage_seconds_count{stage="plan.metric"} 1' in prom
+
+def test_entity_drilldowns_answer_with_ranked_charts():
+    data = load_finance_data(FIXTURE, cache=False)
+    ans = plan_and_answer("Revenue vs budget by entity for June 2025", data, cache=False)
+    assert ans["intent"] == "revenue_vs_budget_by_entity" and ans["text"].startswith("Jun 2025 revenue across")
+    assert ans["figure"].data[0].orientation == "h"
+    for q, intent in [("Which entity drives opex?", "opex_by_entity"),
+                      ("GM by entity for the last 3 months", "gross_margin_by_entity"),
+                      ("EBITDA by entity", "ebitda_by_entity")]:
+        got = plan_and_answer(q, data, cache=False)
+        assert got["intent"] == intent and got["figure"] is not None
+    gm = plan_and_answer("Gross margin by entity", data, cache=False)
+    assert gm["text"].startswith("Gross Margin % for Oct 2025–Dec 2025")  # same 3-month default as the trend
+    empty = dict(data, actuals_usd=data["actuals_usd"].iloc[:0])
+    assert plan_and_answer("Gross margin by entity", empty, cache=False)["text"].startswith("No data")
+
+def test_range_questions():
+    data = load_finance_data(FIXTURE, cache=False)
+    ans = plan_and_answer("Revenue vs budget Q2 2025", data, cache=False)
+    assert ans["intent"] == "revenue_vs_budget_range" and ans["text"].startswith("Q2 2025 (Apr–Jun 2025) revenue")
+    assert list(ans["figure"].data[0].x) == ["2025-04", "2025-05", "2025-06"]
+    for q, intent in [("GM% for H1 2025", "gross_margin_range"), ("Opex breakdown YTD", "opex_breakdown_range"),
+                      ("EBITDA FY2025", "ebitda_range"), ("EBITDA by entity for Q1 2025", "ebitda_by_entity")]:
+        assert plan_and_answer(q, data, cache=False)["intent"] == intent
+    backwards = plan_and_answer("revenue 2025-06 to 2025-01", data, cache=False)
+    assert backwards["intent"] == "revenue_vs_budget_range"
+    assert backwards["text"] == plan_and_answer("revenue 2025-01 to 2025-06", data, cache=False)["text"]
+    by_entity = plan_and_answer("revenue by entity Jun 2025 to Jan 2025", data, cache=False)
+    assert not by_entity["text"].startswith("No ")
+    qs = ["Revenue vs budget Q2 2025", "revenue vs budget June 2025", "Revenue vs budget Q2 2025"]
+    assert [a["text"] for a in plan_and_answer_many(qs, data, cache=False)] == \
+        [plan_and_answer(q, data, cache=False)["text"] for q in qs]
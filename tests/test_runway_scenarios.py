@@ -0,0 +1,34 @@
+# tests/test_runway_scenarios.py
+import numpy as np
+import pandas as pd
+from agent.tools.metrics import cash_runway_months
+from agent.tools.runway_scenarios import RunwayScenario, simulate_runway
+
+def _frames(months=12, revenue=100.0, opex=150.0):
+    ms = pd.period_range("2024-01", periods=months, freq="M")
+    rows = [(m, "A", c, v) for m in ms for c, v in (("Revenue", revenue), ("COGS", 20.0), ("Opex:IT", opex))]
+    actuals = pd.DataFrame(rows, columns=["month", "entity", "account_category", "amount_usd"])
+    cash = pd.DataFrame({"month": [ms[-1]], "cash_usd": [1000.0]})
+    return actuals, cash
+
+def test_without_shocks_every_path_matches_the_point_estimate():
+    actuals, cash = _frames()  # burn 70/mo on 1000 cash
+    res = simulate_runway(actuals, cash, RunwayScenario(paths=500, revenue_sigma=0.0, opex_sigma=0.0))
+    point = cash_runway_months(actuals, cash)["runway_months"]
+    assert res["prob_cash_out"] == 1.0
+    assert all(abs(v - point) < 1e-9 for v in res["runway_months"].values())
+    assert res["cash_out_month"][50] == pd.Period("2026-03", freq="M")  # during month 15 after Dec 2024
+    assert list(res["cash_pct"].index[:2].astype(str)) == ["2025-01", "2025-02"]
+
+def test_shocked_paths_spread_around_the_point_estimate_and_are_seeded():
+    actuals, cash = _frames()
+    sc = RunwayScenario(paths=5_000, horizon=36, revenue_sigma=0.1, opex_sigma=0.1, distribution="t",
+                        correlation=0.3, persistence=0.5, seed=7)
+    res = simulate_runway(actuals, cash, sc)
+    rw = [res["runway_months"][p] for p in (5, 25, 50, 75, 95)]
+    assert rw == sorted(rw) and rw[0] < 1000 / 70 < rw[-1]
+    pct = res["cash_pct"].to_numpy()
+    assert (np.diff(pct, axis=1) >= 0).all()  # bands nest month by month
+    assert simulate_runway(actuals, cash, sc)["runway_months"] == res["runway_months"]
+    profitable = simulate_runway(*_frames(opex=50.0), RunwayScenario(paths=1000))
+    assert profitable["prob_cash_out"] == 0.0 and profitable["runway_months"][50] is None
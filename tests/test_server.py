@@ -0,0 +1,78 @@
+# tests/test_server.py
+import asyncio
+import json
+import os
+import time
+import pandas as pd
+
+from agent import server as srv
+from agent.tools.data_loader import load_finance_data
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "..", "fixtures", "finance.xlsx")
+
+async def _request(port, method, path, body=None):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    payload = b"" if body is None else json.dumps(body).encode()
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: x\r\nConnection: close\r\n"
+                 f"Content-Length: {len(payload)}\r\n\r\n".encode() + payload)
+    await writer.drain()
+    raw = await reader.read()
+    writer.close()
+    head, _, data = raw.partition(b"\r\n\r\n")
+    lines = head.decode().split("\r\n")
+    headers = dict(line.split(": ", 1) for line in lines[1:])
+    return int(lines[0].split()[1]), headers, data
+
+def _serve(data, config, scenario):
+    async def main():
+        server = srv.FinanceServer(data, config)
+        await server.start()
+        try:
+            return await scenario(server)
+        finally:
+            await server.close()
+    return asyncio.run(main())
+
+def test_ask_pdf_and_health_endpoints(monkeypatch):
+    data = load_finance_data(FIXTURE, cache=False)
+    monkeypatch.setattr(srv.FinanceServer, "_pdf",
+                        lambda self, data, month, entity, renderer: f"%PDF {month} {renderer}".encode())
+
+    async def scenario(server):
+        port = server.port
+        status, _, body = await _request(port, "GET", "/ask?q=What%20is%20our%20cash%20runway%3F")
+        ans = json.loads(body)
+        assert status == 200 and ans["intent"] == "cash_runway" and ans["figure"]["data"]
+        status, _, body = await _request(port, "POST", "/ask_many",
+                                         {"queries": ["revenue vs budget 2025-06", "hello"], "figure": False})
+        many = json.loads(body)
+        assert [a["intent"] for a in many] == ["revenue_vs_budget", None] and many[0]["figure"] is None
+        status, headers, body = await _request(port, "GET", "/pdf?month=2025-06")
+        assert status == 200 and headers["Content-Type"] == "application/pdf" and body == b"%PDF 2025-06 None"
+        assert (await _request(port, "GET", "/pdf?month=2025-06&renderer=vector"))[2] == b"%PDF 2025-06 vector"
+        assert (await _request(port, "GET", "/pdf?renderer=svg"))[0] == 400
+        assert (await _request(port, "GET", "/pdf?entity=nope"))[0] == 404
+        assert (await _request(port, "POST", "/ask", {"q": ""}))[0] == 400
+        assert (await _request(port, "GET", "/nope"))[0] == 404
+        status, _, body = await _request(port, "GET", "/healthz")
+        assert json.loads(body)["version"] == data["version"]
+
+    _serve(data, srv.ServerConfig(port=0), scenario)
+
+def test_overload_is_rejected_with_503(monkeypatch):
+    data = load_finance_data(FIXTURE, cache=False)
+
+    def slow(q, data):
+        time.sleep(0.3)
+        return {"intent": None, "text": q, "figure": None}
+    monkeypatch.setattr(srv, "plan_and_answer", slow)
+
+    async def scenario(server):
+        reqs = [_request(server.port, "POST", "/ask", {"q": f"q{i}"}) for i in range(5)]
+        results = await asyncio.gather(*reqs)
+        return [status for status, _, _ in results], [h.get("Retry-After") for s, h, _ in results if s == 503]
+
+    # one running, one queued, the rest turned away immediately
+    statuses, retry = _serve(data, srv.ServerConfig(port=0, ask_limit=1, ask_backlog=1), scenario)
+    assert sorted(statuses) == [200, 200, 503, 503, 503]
+    assert retry == ["1"] * 3
@@ -0,0 +1,46 @@
+# tests/test_shared_data.py
+import os
+import numpy as np
+import pandas as pd
+import pytest
+
+from agent.planners import plan_and_answer
+from agent.tools import shared_data
+from agent.tools.data_loader import load_finance_data
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "..", "fixtures", "finance.xlsx")
+
+def test_publish_and_attach_zero_copy(tmp_path):
+    data = load_finance_data(FIXTURE, cache=False)
+    root = tmp_path / "shm"
+    version = shared_data.publish(data, root)
+    assert version == data["version"] and shared_data.current_version(root) == version
+
+    shared = shared_data.attach(root)
+    assert shared["version"] == version
+    for name in shared_data.SHARED_FRAMES:
+        pd.testing.assert_frame_equal(shared[name], data[name].reset_index(drop=True), check_categorical=True)
+    amounts = shared["actuals_usd"]["amount_usd"].to_numpy()
+    assert not amounts.flags.owndata and not amounts.flags.writeable
+    with pytest.raises(ValueError):
+        amounts[0] = 1.0  # read-only mapping
+    q = "Revenue vs budget by entity for June 2025"
+    assert plan_and_answer(q, shared, cache=False)["text"] == plan_and_answer(q, data, cache=False)["text"]
+
+def test_new_versions_swap_atomically(tmp_path):
+    data = load_finance_data(FIXTURE, cache=False)
+    root = tmp_path / "shm"
+    shared_data.publish(data, root)
+    follower = shared_data.SharedDataset(root, check_interval=0)
+    first = follower.get()
+    assert follower.get() is first  # unchanged pointer: same attachment
+
+    cash = data["cash_usd"].copy()
+    cash["cash_usd"] = cash["cash_usd"] + 1
+    edited = dict(data, cash_usd=cash, version="v2")
+    for i in range(3):
+        shared_data.publish(dict(edited, version=f"v{i + 2}"), root, keep=2)
+    second = follower.get()
+    assert second["version"] == "v4" and second["cash_usd"]["cash_usd"].iloc[0] == cash["cash_usd"].iloc[0]
+    assert first["cash_usd"]["cash_usd"].iloc[0] == data["cash_usd"]["cash_usd"].iloc[0]  # old snapshot intact
+    assert sorted(p.name for p in root.iterdir()) == ["CURRENT", "v3", "v4"]